@@ -1,10 +1,271 @@
-from flask import Flask, render_template
+import logging
+import math
+import os
+import sys
+import threading
+from dataclasses import asdict
+
+from flask import Flask, Response, jsonify, render_template, request, send_from_directory, url_for
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, REPO_ROOT)
+
+import marine_optimizer as marine
+from aco_metrics import ACOMetrics
+from aco_engine import ColonyProcessPool
+from route_jobs import JOB_WORKERS, JobPool, JobQueueFull
 
 app = Flask(__name__)
 
+# Binary map tiles written by tile_export.py, one directory per dataset
+TILE_ROOT = os.path.join(REPO_ROOT, "Fishery", "public", "tiles")
+TILE_MAX_AGE = 3600
+
+# Ports whose weather is fetched at startup and kept fresh, overridable as a comma separated WARM_PORTS
+WARM_PORTS = os.environ.get("WARM_PORTS", "Chennai,Mumbai,Kochi,Visakhapatnam,Kolkata,Colombo,Singapore").split(",")
+
+# Ship fields a request may set: name -> (default, lowest, highest accepted)
+SHIP_FIELDS = {"max_speed": (20, 1, 60), "fuel_consumption": (0.1, 0, 100), "safety_rating": (0.9, 0, 1),
+               "fuel_capacity": (1000, 1, 1e7), "vessel_weight": (50, 1, 1e6)}
+
+# ACO parameters a route request may override: name -> (type, lowest, highest accepted)
+ROUTE_PARAMS = {"num_ants": (int, 1, 1000), "max_iterations": (int, 1, 100000), "alpha": (float, 0, 10),
+                "beta": (float, 0, 10), "evaporation_rate": (float, 0, 1), "seed": (int, 0, 2 ** 32 - 1)}
+
+_analyzer = None
+_analyzer_lock = threading.Lock()
+_jobs = JobPool()
+_route_processes = ColonyProcessPool(JOB_WORKERS)  # Route jobs run their ACO here, off the request threads
+_aco_metrics = ACOMetrics()  # Shared by every route job, scraped from /metrics
+_refresh_stop = threading.Event()
+_refresh_thread = None  # Started once by the first warm_caches call
+
+
+def get_analyzer():
+    """The one MarineWeatherAnalyzer shared by every request, so its caches are shared too"""
+    global _analyzer
+    with _analyzer_lock:
+        if _analyzer is None:
+            _analyzer = marine.MarineWeatherAnalyzer(root=REPO_ROOT)
+        return _analyzer
+
+
+def warm_caches():
+    """Load the gazetteer, disaster index, sea lattice and port weather before serving requests.
+
+    Safe to call more than once: the weather refresh thread is only started the first time.
+    """
+    global _refresh_thread
+    analyzer = get_analyzer()
+    if os.path.exists(analyzer.path(marine.LAND_MASK_PATH)):
+        analyzer.load_sea_lattice(None, None)
+    refresh_port_weather()
+    with _analyzer_lock:
+        if _refresh_thread is None and not _refresh_stop.is_set():
+            _refresh_thread = threading.Thread(target=_refresh_loop, args=(marine.WEATHER_CACHE_TTL / 2,),
+                                               daemon=True, name="weather-refresh")
+            _refresh_thread.start()
+    logging.info(f"Caches warmed: weather {analyzer.weather_field.stats()}, geocode {analyzer.geocode_cache.stats()}")
+
+
+def refresh_port_weather():
+    """Refetch the weather of WARM_PORTS into the shared weather field, fresh or not.
+
+    Run every half TTL, this renews each cell well before it expires, so
+    requests for warm ports never wait on the network.
+    """
+    analyzer = get_analyzer()
+    points = [coords for coords in (analyzer.get_coordinates(port) for port in WARM_PORTS if port.strip()) if coords]
+    fetched = analyzer.fetch_weather_many(points, refresh=True)
+    logging.info(f"Refreshed weather for {sum(data is not None for data in fetched)}/{len(points)} warm ports")
+
+
+def _refresh_loop(interval):
+    # Refresh at half the TTL so every warm port is renewed before it expires
+    while not _refresh_stop.wait(interval):
+        try:
+            refresh_port_weather()
+        except Exception as e:
+            logging.error(f"Error refreshing port weather: {e}")
+
+
+def create_app():
+    """WSGI entry point that warms the caches first, e.g. gunicorn --threads 8 "appgg:create_app()" """
+    warm_caches()
+    return app
+
+
+def error(message, status=400):
+    return jsonify({"error": message}), status
+
+
+def bounded(name, value, low, high, cast=float):
+    """value cast to a number, raising ValueError unless it is finite and within [low, high]"""
+    number = cast(value)
+    if not math.isfinite(number) or not low <= number <= high:
+        raise ValueError(f"{name} must be between {low} and {high}")
+    return number
+
+
+def parse_coords(lat, lon):
+    return bounded("lat", lat, -90, 90), bounded("lon", lon, -180, 180)
+
+
+def parse_location(value):
+    """(lat, lon) of a [lat, lon] pair or a place name, or None"""
+    if isinstance(value, (list, tuple)) and len(value) == 2:
+        return parse_coords(*value)
+    if isinstance(value, str) and value.strip():
+        return get_analyzer().get_coordinates(value)
+    return None
+
+
+def parse_ship(data):
+    """Ship from request fields, defaulting to the GUI's cargo vessel"""
+    fields = {name: bounded(name, data.get(name, default), low, high)
+              for name, (default, low, high) in SHIP_FIELDS.items()}
+    return marine.Ship(ship_type=str(data.get("ship_type", "Cargo")), **fields)
+
+
+def weather_to_dict(weather_data):
+    data = asdict(weather_data)
+    data["timestamp"] = weather_data.timestamp.isoformat()
+    return data
+
+
+def voyage_to_dict(result):
+    data = {
+        "start": result.voyage.start_location,
+        "end": result.voyage.end_location,
+        "start_coords": result.start_coords,
+        "end_coords": result.end_coords,
+        "error": result.error,
+    }
+    if result.weather_data is not None:
+        data["weather"] = weather_to_dict(result.weather_data)
+    if result.route is not None:
+        data["route"] = [int(node) for node in result.route]
+        data["cost"] = float(result.cost)
+    if result.profile is not None:
+        data["waypoints"] = result.waypoints
+        data["distance_nm"] = result.profile.total_nm
+        data["eta_hours"] = result.profile.total_hours
+        data["eta_hours_by_waypoint"] = result.profile.eta_hours.tolist()
+        data["fuel_remaining"] = float(result.profile.fuel_remaining[-1])
+    return data
+
+
+def run_route_job(job, voyage, aco_params):
+    result = get_analyzer().plan_voyage(voyage, progress=job.report, stop=job.stop, metrics=_aco_metrics,
+                                        pool=_route_processes, **aco_params)
+    return voyage_to_dict(result)
+
+
 @app.route('/')
 def index():
     return render_template('index.html')
 
+@app.route('/tiles/<path:filename>')
+def tiles(filename):
+    """Serve tiles and manifests with ETag, Last-Modified and Range support"""
+    response = send_from_directory(TILE_ROOT, filename, conditional=True, etag=True, max_age=TILE_MAX_AGE)
+    response.headers["Access-Control-Allow-Origin"] = "*"
+    response.headers["Access-Control-Expose-Headers"] = "ETag, Content-Range, Accept-Ranges"
+    return response
+
+@app.route('/api/health')
+def health():
+    analyzer = get_analyzer()
+    return jsonify({"status": "ok", "jobs": _jobs.stats(), "weather_cache": analyzer.weather_field.stats(),
+                    "geocode_cache": analyzer.geocode_cache.stats()})
+
+@app.route('/metrics')
+def metrics():
+    """ACO run counters and phase timings in the Prometheus text format"""
+    return Response(_aco_metrics.prometheus_text(), mimetype="text/plain; version=0.0.4")
+
+@app.route('/api/weather')
+def weather():
+    """Current weather at ?lat=&lon= or ?location=, served from the shared weather field when cached"""
+    try:
+        if "location" in request.args:
+            coords = parse_location(request.args["location"])
+        else:
+            coords = parse_coords(request.args["lat"], request.args["lon"])
+    except KeyError:
+        return error("Pass lat and lon, or location")
+    except ValueError as e:
+        return error(f"Invalid coordinates: {e}")
+    if coords is None:
+        return error("Could not find coordinates for the specified location.", 404)
+    weather_data = get_analyzer().fetch_weather_data(*coords)
+    if weather_data is None:
+        return error("Could not fetch weather data.", 502)
+    return jsonify({"coords": coords, "weather": weather_to_dict(weather_data)})
+
+@app.route('/api/eta', methods=['POST'])
+def eta():
+    """Great-circle distance, ETA and fuel between start and end, or along waypoints when given"""
+    data = request.get_json(silent=True) or {}
+    try:
+        ship = parse_ship(data)
+        if "waypoints" in data:
+            waypoints = [parse_coords(lat, lon) for lat, lon in data["waypoints"]]
+            if len(waypoints) < 2:
+                return error("Pass at least two waypoints")
+        else:
+            waypoints = [parse_location(data.get("start")), parse_location(data.get("end"))]
+    except (TypeError, ValueError) as e:
+        return error(f"Invalid ship fields or coordinates: {e}")
+    if None in waypoints:
+        return error("Could not find coordinates for the specified locations.", 404)
+    profile = get_analyzer().voyage_profile(waypoints, ship)
+    return jsonify({"distance_nm": profile.total_nm, "eta_hours": profile.total_hours,
+                    "fuel_used": float(profile.leg_fuel.sum()), "fuel_remaining": float(profile.fuel_remaining[-1])})
+
+@app.route('/api/routes', methods=['POST'])
+def submit_route():
+    """Queue a route optimization and return its job; poll the Location header for the result"""
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data.get("start"), str) or not isinstance(data.get("end"), str):
+        return error("Pass start and end location names")
+    try:
+        ship = parse_ship(data)
+        aco_params = {name: bounded(name, data[name], low, high, cast)
+                      for name, (cast, low, high) in ROUTE_PARAMS.items() if name in data}
+    except (TypeError, ValueError) as e:
+        return error(f"Invalid ship fields or ACO parameters: {e}")
+    voyage = marine.Voyage(data["start"], data["end"], ship)
+    try:
+        job = _jobs.submit("route", run_route_job, voyage, aco_params)
+    except JobQueueFull as e:
+        return error(str(e), 503)
+    response = jsonify(job.to_dict())
+    response.status_code = 202
+    response.headers["Location"] = url_for("job_status", job_id=job.id)
+    return response
+
+@app.route('/api/jobs/<job_id>')
+def job_status(job_id):
+    """Job status with the last iteration's best cost; finished jobs include their result"""
+    job = _jobs.get(job_id)
+    if job is None:
+        return error("Unknown or expired job", 404)
+    data = job.to_dict()
+    if job.status in ("done", "cancelled"):
+        data["result"] = job.result
+    return jsonify(data)
+
+@app.route('/api/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    """Cancel a job; a running optimization stops after its current iteration and keeps its best route"""
+    job = _jobs.cancel(job_id)
+    if job is None:
+        return error("Unknown or expired job", 404)
+    response = jsonify(job.to_dict())
+    response.status_code = 202
+    return response
+
 if __name__ == '__main__':
-    app.run(debug=True)
+    warm_caches()
+    app.run(debug=os.environ.get("FLASK_DEBUG") == "1", threaded=True, use_reloader=False)
@@ -0,0 +1,648 @@
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from bisect import bisect
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures import wait as wait_for_futures
+from contextlib import nullcontext
+from itertools import accumulate
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from aco_metrics import ACOMetrics
+from sea_graph import as_sea_graph
+
+# Seconds between checks of a process run's progress reports and stop event
+RELAY_INTERVAL = 0.1
+
+
+def weather_factor(wind_speed, visibility):
+    """Cost multiplier for wind speed (m/s) and visibility (km), for scalars or arrays"""
+    factor = 1 + (np.asarray(wind_speed, dtype=float) / 10)  # Higher wind speed increases cost
+    return np.where(np.asarray(visibility) < 5, factor * 1.5, factor)  # Low visibility increases cost
+
+
+def ship_factor(base_cost, ship):
+    """Cost multiplier for fuel consumption and vessel weight"""
+    fuel_factor = (ship.fuel_consumption * base_cost) / ship.fuel_capacity
+    weight_factor = ship.vessel_weight / 1000  # Heavier vessels have higher costs
+    return 1 + fuel_factor + weight_factor
+
+
+def edge_cost(base_cost, ship, weather_data):
+    """Calculate the cost of a single edge considering fuel, weight, and weather"""
+    factor = weather_factor(weather_data.wind_speed, weather_data.visibility)
+    return base_cost * factor * ship_factor(base_cost, ship)
+
+
+class AntColony:
+    """Ant Colony Optimization over a sparse sea graph.
+
+    Edge costs and heuristics are computed once in the constructor and stored per
+    edge id; the batched engine then moves every ant of an iteration together,
+    gathering only the neighbor slices of the nodes the ants stand on. Each cost
+    is weight * weather factor * ship factor * hazard factor, so a weather update only touches
+    the edges whose weather factor changed, and the pheromones of the last run
+    are kept for warm-started re-plans.
+    """
+
+    def __init__(self, graph, ship, weather_data, factors=None):
+        """factors, when given, are the (weather, ship, hazard) factor arrays of another colony, see factors"""
+        self.graph = as_sea_graph(graph)
+        self.ship = ship
+        self.weather_data = weather_data
+        base = self.graph.weights.astype(np.float64)
+        if factors is None:
+            factor = weather_factor(weather_data.wind_speed, weather_data.visibility)
+            factors = (np.full(self.graph.num_edges, float(factor)), ship_factor(base, ship),
+                       np.ones(self.graph.num_edges))
+        # Copied so that weather updates never write into a caller's arrays
+        self.weather_factors, self.ship_factors, self.hazard_factors = (np.array(values, dtype=np.float64)
+                                                                        for values in factors)
+        self.costs = base * self.weather_factors * self.ship_factors * self.hazard_factors
+        self.pheromones = None
+        self._heuristics = {}
+        self._edge_midpoints = None
+        self._neighbor_table = None
+        self._phase = nullcontext  # Phase timer of the run being measured, see aco_metrics
+
+    @property
+    def num_nodes(self):
+        return self.graph.num_nodes
+
+    @property
+    def factors(self):
+        """(weather, ship, hazard) per-edge factor arrays, from which a worker process rebuilds the colony"""
+        return self.weather_factors, self.ship_factors, self.hazard_factors
+
+    def update_weather(self, weather_data, threshold=0.05):
+        """Apply a new weather snapshot to every edge, see update_weather_factors"""
+        self.weather_data = weather_data
+        factor = weather_factor(weather_data.wind_speed, weather_data.visibility)
+        return self.update_weather_factors(np.full(self.graph.num_edges, float(factor)), threshold)
+
+    def update_weather_factors(self, factors, threshold=0.05):
+        """Recompute the cost of every edge whose weather factor moved by more than threshold (relative).
+
+        Returns the number of edges updated; cached heuristics are dropped only
+        when at least one edge changed.
+        """
+        changed = np.flatnonzero(np.abs(factors - self.weather_factors) > threshold * self.weather_factors)
+        if changed.size:
+            self.weather_factors[changed] = factors[changed]
+            self.costs[changed] = (self.graph.weights[changed].astype(np.float64)
+                                   * self.weather_factors[changed] * self.ship_factors[changed]
+                                   * self.hazard_factors[changed])
+            self._heuristics.clear()
+        return changed.size
+
+    def apply_hazard_factors(self, factors):
+        """Set a per-edge hazard cost multiplier (>= 1), e.g. from DisasterStore.hazard_factors, and re-cost"""
+        self.hazard_factors = np.asarray(factors, dtype=np.float64)
+        self.costs = (self.graph.weights.astype(np.float64) * self.weather_factors * self.ship_factors
+                      * self.hazard_factors)
+        self._heuristics.clear()
+
+    def edge_midpoints(self):
+        """(lats, lons) arrays of the midpoint of every edge, computed once per colony"""
+        if self._edge_midpoints is None:
+            sources = self.graph.edge_sources()
+            self._edge_midpoints = ((self.graph.lat[sources] + self.graph.lat[self.graph.indices]) / 2,
+                                    (self.graph.lon[sources] + self.graph.lon[self.graph.indices]) / 2)
+        return self._edge_midpoints
+
+    def apply_weather_field(self, field, fallback=None, threshold=0.05):
+        """Re-cost edges from conditions sampled at each edge midpoint of a WeatherField.
+
+        Edges where the field has no data use the fallback snapshot (the colony's
+        current weather by default). Returns the number of edges updated.
+        """
+        fallback = fallback or self.weather_data
+        conditions = field.sample(*self.edge_midpoints())
+        wind_speed = np.where(np.isnan(conditions["wind_speed"]), fallback.wind_speed, conditions["wind_speed"])
+        visibility = np.where(np.isnan(conditions["visibility"]), fallback.visibility, conditions["visibility"])
+        self.weather_data = fallback
+        return self.update_weather_factors(weather_factor(wind_speed, visibility), threshold)
+
+    def goal_costs(self, end):
+        """Lower bound on the cost from every node to end, None when the graph has no coordinates"""
+        if not self.graph.has_coordinates():
+            return None
+        cheapest_rate = np.min(self.costs / self.graph.weights)  # Cost per nautical mile
+        return self.graph.distances_to(end) * cheapest_rate
+
+    def heuristic(self, beta, end=None):
+        """Return the desirability of every edge, cached per beta (and per end on geographic graphs).
+
+        Plain graphs use (1 / cost) ** beta. On graphs with coordinates each edge is
+        also charged the change in goal_costs it causes, which steers ants toward
+        end instead of letting them wander across large lattices.
+        """
+        goal = None if end is None else self.goal_costs(end)
+        key = (beta, None if goal is None else end)
+        if key not in self._heuristics:
+            if goal is None:
+                denominators = self.costs
+            else:
+                reduced = self.costs + goal[self.graph.indices] - goal[self.graph.edge_sources()]
+                denominators = self.costs + np.maximum(reduced, 0)
+            heuristic = np.divide(1, denominators)
+            np.power(heuristic, beta, out=heuristic)
+            self._heuristics[key] = heuristic
+        return self._heuristics[key]
+
+    def optimize(self, start, end, num_ants=10, max_iterations=100, alpha=1, beta=2,
+                 evaporation_rate=0.5, seed=None, vectorized=True, workers=1, colonies=1,
+                 warm_start=False, forecast=None, progress=None, stop=None, metrics=None):
+        """Run the colony and return (best_route, best_cost).
+
+        Each iteration draws one uniform per ant and step up front, so the
+        batched and per-ant engines produce identical routes for the same seed.
+        With colonies > 1, independent colonies run on up to workers processes
+        and their pheromones are merged after every iteration; a single colony
+        always runs in-process, so workers never changes the result. With warm_start,
+        the run continues from the pheromones left by the previous run.
+
+        Passing a ForecastTensor switches to time-dependent routing: every edge is
+        costed with the forecast slice valid when the ant reaches it, given the
+        ship's max_speed. This mode always uses the batched engine in-process.
+
+        progress(iteration, best_cost) is called after every iteration. Setting
+        the stop event ends the run after the current iteration, returning the
+        best route found so far. An aco_metrics.ACOMetrics passed as metrics
+        records every iteration's costs, dead ends, pheromone entropy and phase timings.
+        """
+        if colonies > 1 and forecast is None:
+            if not vectorized:
+                raise ValueError("Multiple colonies always use the batched engine, vectorized=False is not supported")
+            return self.optimize_parallel(start, end, num_ants, max_iterations, alpha, beta,
+                                          evaporation_rate, seed, workers, colonies, warm_start, progress, stop,
+                                          metrics)
+
+        rng = np.random.default_rng(seed)
+        heuristic = self.heuristic(beta, end) if forecast is None else None
+        goal = self.goal_costs(end)
+        if not warm_start or self.pheromones is None:
+            self.pheromones = np.ones(self.graph.num_edges, dtype=float)
+        pheromones = self.pheromones
+        best_route = None
+        best_cost = float('inf')
+
+        convergence_count = 0
+        prev_best_cost = float('inf')
+
+        run = None
+        if metrics is not None:
+            run = metrics.start_run(num_ants=num_ants, max_iterations=max_iterations, alpha=alpha, beta=beta,
+                                    evaporation_rate=evaporation_rate, colonies=1, forecast=forecast is not None)
+            self._phase = run.phase
+        stop_reason = "max_iterations"
+        started = time.perf_counter()
+        try:
+            for iteration in range(max_iterations):
+                draws = rng.random((num_ants, max(self.num_nodes - 1, 0)))
+                with self._phase("construct"):
+                    if forecast is not None:
+                        routes, route_edges, costs = self.construct_routes(start, end, pheromones, alpha, heuristic,
+                                                                           draws, forecast=forecast, beta=beta,
+                                                                           goal=goal)
+                    elif vectorized:
+                        routes, route_edges, _ = self.construct_routes(start, end, pheromones, alpha, heuristic, draws)
+                        costs = self.route_costs(route_edges)
+                    else:
+                        routes, route_edges = zip(*[self.construct_route(start, end, pheromones, alpha, beta,
+                                                                         draws[ant], goal)
+                                                    for ant in range(num_ants)])
+                        costs = [self.calculate_cost(route) for route in routes]
+                costs = discard_dead_ends(routes, costs, end)
+
+                converged = False
+                for route, cost in zip(routes, costs):
+                    if cost < best_cost:
+                        best_route = [int(node) for node in route]
+                        best_cost = cost
+                        convergence_count = 0
+                    elif cost == prev_best_cost and cost < float('inf'):
+                        convergence_count += 1
+
+                    if convergence_count >= 10:
+                        converged = True
+                        break
+                if converged:
+                    logging.info(f"ACO converged after {iteration + 1} iterations")
+                    stop_reason = "converged"
+                    if run is not None:
+                        run.record(iteration, costs, best_cost, pheromones)
+                    return best_route, best_cost
+
+                prev_best_cost = best_cost
+                with self._phase("pheromones"):
+                    self.update_pheromones(pheromones, route_edges, costs, evaporation_rate)
+                if run is not None:
+                    run.record(iteration, costs, best_cost, pheromones)
+                if progress is not None:
+                    progress(iteration, best_cost)
+                if stop is not None and stop.is_set():
+                    logging.info(f"ACO stopped after {iteration + 1} iterations")
+                    stop_reason = "stopped"
+                    break
+
+            return best_route, best_cost
+        finally:
+            if run is not None:
+                self._phase = nullcontext
+                metrics.finish_run(run, stop_reason, time.perf_counter() - started)
+
+    def optimize_parallel(self, start, end, num_ants=10, max_iterations=100, alpha=1, beta=2,
+                          evaporation_rate=0.5, seed=None, workers=1, colonies=1, warm_start=False,
+                          progress=None, stop=None, metrics=None):
+        """Run independent colonies in a process pool, averaging their pheromones each iteration.
+
+        Every colony owns one row of a shared-memory pheromone matrix and draws
+        its random numbers from a stream keyed by (seed, colony, iteration), so
+        the result depends only on seed and colonies, never on workers. With
+        metrics, "construct" times the whole colony iteration, pheromone update
+        included, and "pheromones" the merge.
+        """
+        entropy = np.random.SeedSequence(seed).entropy
+        block = shared_memory.SharedMemory(create=True, size=max(colonies * self.graph.num_edges * 8, 1))
+        pool = None
+        pheromones = np.ndarray((colonies, self.graph.num_edges), dtype=float, buffer=block.buf)
+        run = None
+        phase = nullcontext
+        if metrics is not None:
+            run = metrics.start_run(num_ants=num_ants, max_iterations=max_iterations, alpha=alpha, beta=beta,
+                                    evaporation_rate=evaporation_rate, colonies=colonies, forecast=False)
+            phase = run.phase
+        stop_reason = "max_iterations"
+        started = time.perf_counter()
+        try:
+            pheromones[:] = self.pheromones if warm_start and self.pheromones is not None else 1.0
+            if workers > 1:
+                pool = ProcessPoolExecutor(max_workers=min(workers, colonies), initializer=_init_worker,
+                                           initargs=(self.graph, self.ship, self.weather_data, self.factors,
+                                                     block.name, pheromones.shape))
+            best_route = None
+            best_cost = float('inf')
+
+            convergence_count = 0
+            prev_best_cost = float('inf')
+
+            for iteration in range(max_iterations):
+                tasks = [(colony, iteration, start, end, num_ants, alpha, beta, evaporation_rate, entropy)
+                         for colony in range(colonies)]
+                with phase("construct"):
+                    if pool is None:
+                        results = [run_colony_iteration(self, pheromones[task[0]], *task) for task in tasks]
+                    else:
+                        results = list(pool.map(_worker_colony_iteration, tasks))
+
+                for routes, costs in results:
+                    for route, cost in zip(routes, costs):
+                        if cost < best_cost:
+                            best_route = route
+                            best_cost = cost
+                            convergence_count = 0
+                        elif cost == prev_best_cost and cost < float('inf'):
+                            convergence_count += 1
+
+                        if convergence_count >= 10:
+                            logging.info(f"ACO converged after {iteration + 1} iterations across {colonies} colonies")
+                            stop_reason = "converged"
+                            if run is not None:
+                                run.record(iteration, [cost for _, costs in results for cost in costs], best_cost,
+                                           pheromones.mean(axis=0))
+                            return best_route, best_cost
+
+                prev_best_cost = best_cost
+                with phase("pheromones"):
+                    pheromones[:] = pheromones.mean(axis=0)
+                if run is not None:
+                    run.record(iteration, [cost for _, costs in results for cost in costs], best_cost, pheromones[0])
+                if progress is not None:
+                    progress(iteration, best_cost)
+                if stop is not None and stop.is_set():
+                    logging.info(f"ACO stopped after {iteration + 1} iterations across {colonies} colonies")
+                    stop_reason = "stopped"
+                    break
+
+            return best_route, best_cost
+        finally:
+            if pool is not None:
+                pool.shutdown()
+            if run is not None:
+                metrics.finish_run(run, stop_reason, time.perf_counter() - started)
+            self.pheromones = pheromones.mean(axis=0)
+            del pheromones
+            block.close()
+            block.unlink()
+
+    def construct_routes(self, start, end, pheromones, alpha, heuristic, draws, forecast=None, beta=None, goal=None):
+        """Construct one route per row of draws, moving all ants one step at a time.
+
+        Returns the node sequence and the traversed edge ids of every ant. With a
+        forecast, candidate edges are costed at each ant's elapsed sailing time
+        and the time-dependent route costs are returned as well, otherwise None.
+        """
+        graph = self.graph
+        num_ants = draws.shape[0]
+        table_edges, table_nodes = self.neighbor_table()
+        # The extra column is the padding node of the neighbor table, always visited
+        visited = np.zeros((num_ants, self.num_nodes + 1), dtype=bool)
+        visited[:, self.num_nodes] = True
+        visited[:, start] = True
+        current = np.full(num_ants, start)
+        steps = np.zeros((num_ants, self.num_nodes), dtype=np.intp)
+        steps[:, 0] = start
+        edges_taken = np.zeros((num_ants, self.num_nodes), dtype=np.intp)
+        lengths = np.ones(num_ants, dtype=np.intp)
+        active = np.flatnonzero(current != end)
+        if forecast is not None:
+            elapsed = np.zeros(num_ants)  # Hours since departure
+            leg_costs = np.zeros((num_ants, self.num_nodes))
+        else:
+            # Pheromone and heuristic only change between iterations, so their product is taken once
+            with self._phase("probabilities"):
+                edge_weights = pheromones ** alpha * heuristic
+
+        step = 0
+        while active.size:
+            rows = current[active]
+            edges = table_edges[rows]
+            allowed = ~visited[active[:, None], table_nodes[rows]]
+
+            has_neighbors = allowed.any(axis=1)
+            if not has_neighbors.all():
+                active, rows = active[has_neighbors], rows[has_neighbors]
+                edges, allowed = edges[has_neighbors], allowed[has_neighbors]
+                if not active.size:
+                    break
+
+            with self._phase("probabilities"):
+                if forecast is None:
+                    weights = np.where(allowed, edge_weights[edges], 0.0)
+                else:
+                    desirability, candidate_costs = self.forecast_desirability(
+                        forecast, edges, rows, elapsed[active], beta, goal)
+                    weights = np.where(allowed, pheromones[edges] ** alpha * desirability, 0.0)
+                probabilities = self.normalize_weights(weights, allowed)
+            cumulative = np.cumsum(probabilities, axis=1)
+            targets = draws[active, step] * cumulative[:, -1]
+            slots = (cumulative <= targets[:, None]).sum(axis=1)
+            # Rounding can push the target past the last neighbor, clamp like random.choices
+            if slots.max() == allowed.shape[1]:
+                overflow = slots == allowed.shape[1]
+                slots[overflow] = allowed.shape[1] - 1 - np.argmax(allowed[overflow, ::-1], axis=1)
+            next_edges = edges[np.arange(active.size), slots]
+            next_nodes = graph.indices[next_edges]
+            if forecast is not None:
+                leg_costs[active, lengths[active] - 1] = candidate_costs[np.arange(active.size), slots]
+                elapsed[active] += graph.weights[next_edges] / self.ship.max_speed
+
+            current[active] = next_nodes
+            visited[active, next_nodes] = True
+            edges_taken[active, lengths[active] - 1] = next_edges
+            steps[active, lengths[active]] = next_nodes
+            lengths[active] += 1
+            active = active[next_nodes != end]
+            step += 1
+
+        routes = [steps[ant, :lengths[ant]] for ant in range(num_ants)]
+        route_edges = [edges_taken[ant, :lengths[ant] - 1] for ant in range(num_ants)]
+        if forecast is None:
+            return routes, route_edges, None
+        costs = [float(np.cumsum(leg_costs[ant, :lengths[ant] - 1])[-1]) if lengths[ant] > 1 else 0
+                 for ant in range(num_ants)]
+        return routes, route_edges, costs
+
+    def forecast_desirability(self, forecast, edges, rows, elapsed, beta, goal):
+        """Costs and desirabilities of candidate edges at each ant's elapsed time, see heuristic"""
+        costs = (self.graph.weights[edges] * forecast.at(elapsed[:, None], edges) * self.ship_factors[edges]
+                 * self.hazard_factors[edges])
+        denominators = costs
+        if goal is not None:
+            reduced = costs + goal[self.graph.indices[edges]] - goal[rows][:, None]
+            denominators = costs + np.maximum(reduced, 0)
+        return (1 / denominators) ** beta, costs
+
+    def neighbor_table(self):
+        """(edges, nodes) arrays of shape (num_nodes, max degree) listing every node's out-edges and targets.
+
+        Rows of lower-degree nodes are padded with edge 0 and the node id
+        num_nodes, so a batch of ants gathers its candidates with one index
+        per array instead of slicing the CSR arrays at every step.
+        """
+        if self._neighbor_table is None:
+            graph = self.graph
+            degrees = graph.degrees()
+            slots = np.arange(degrees.max() if degrees.size else 0)
+            valid = slots < degrees[:, None]
+            edges = np.where(valid, graph.indptr[:-1, None] + slots, 0)
+            nodes = np.where(valid, graph.indices[edges], self.num_nodes)
+            self._neighbor_table = (edges, nodes)
+        return self._neighbor_table
+
+    @staticmethod
+    def normalize_weights(weights, allowed):
+        """Rows of weights scaled to sum to one, uniform over the allowed slots where every weight is zero"""
+        totals = np.cumsum(weights, axis=1)[:, -1]
+        positive = totals > 0
+        if positive.all():
+            return weights / totals[:, None]
+        probabilities = weights / np.where(positive, totals, 1.0)[:, None]
+        uniform = allowed / allowed.sum(axis=1, keepdims=True)
+        return np.where(positive[:, None], probabilities, uniform)
+
+    def route_costs(self, route_edges):
+        """Sum edge costs along each route, adding legs in order"""
+        costs = []
+        for edges in route_edges:
+            legs = self.costs[edges]
+            costs.append(float(np.cumsum(legs)[-1]) if legs.size else 0)
+        return costs
+
+    def construct_route(self, start, end, pheromones, alpha, beta, draws, goal=None):
+        """Construct a route for a single ant one neighbor at a time (reference engine)"""
+        route = [start]
+        edges_taken = []
+        current = start
+        visited = {start}
+
+        while current != end:
+            first = self.graph.indptr[current]
+            targets, weights = self.graph.neighbors(current)
+            neighbors = [(first + i, int(n), w) for i, (n, w) in enumerate(zip(targets, weights)) if n not in visited]
+            if not neighbors:
+                break
+
+            probabilities = []
+            total = 0
+            for edge, neighbor, weight in neighbors:
+                pheromone = pheromones[edge] ** alpha
+                cost = weight * self.weather_factors[edge] * self.ship_factors[edge] * self.hazard_factors[edge]
+                if goal is not None:
+                    cost = cost + max(cost + goal[neighbor] - goal[current], 0)
+                heuristic = (1 / cost) ** beta
+                probability = pheromone * heuristic
+                probabilities.append(probability)
+                total += probability
+            probabilities = [p / total if total > 0 else 1 / len(neighbors) for p in probabilities]
+
+            cumulative = list(accumulate(probabilities))
+            index = bisect(cumulative, draws[len(route) - 1] * cumulative[-1], 0, len(neighbors) - 1)
+            edge, next_node, _ = neighbors[index]
+            route.append(next_node)
+            edges_taken.append(edge)
+            visited.add(next_node)
+            current = next_node
+
+        return route, edges_taken
+
+    def calculate_cost(self, route):
+        """Calculate route cost by evaluating each edge on the fly (reference engine)"""
+        edges = [self.graph.edge_index(route[i], route[i + 1]) for i in range(len(route) - 1)]
+        return sum(self.graph.weights[edge] * self.weather_factors[edge] * self.ship_factors[edge]
+                   * self.hazard_factors[edge] for edge in edges)
+
+    def update_pheromones(self, pheromones, route_edges, costs, evaporation_rate):
+        """Evaporate, then deposit 1 / cost on the edges of every completed route in ant order"""
+        pheromones *= (1 - evaporation_rate)
+        edges, deposits = [], []
+        for taken, cost in zip(route_edges, costs):
+            if cost == float('inf'):
+                continue
+            edges.append(np.asarray(taken, dtype=np.intp))
+            deposits.append(np.full(len(taken), 1.0 / cost if cost > 0 else 1.0))
+        if edges:
+            np.add.at(pheromones, np.concatenate(edges), np.concatenate(deposits))
+
+
+def discard_dead_ends(routes, costs, end):
+    """Give routes that stopped short of end an infinite cost so they never win or deposit"""
+    return [cost if route[-1] == end else float('inf') for route, cost in zip(routes, costs)]
+
+
+def optimize_batch(colonies, jobs, workers=None):
+    """Run many optimizations, yielding (job_id, best_route, best_cost) as each one finishes.
+
+    colonies maps a key to an AntColony and jobs are (job_id, colony_key, start,
+    end, params) tuples, params being keyword arguments for AntColony.optimize.
+    Each colony's graph, ship and cost factors are sent to a worker process
+    once, however many jobs share it.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for job_id, key, start, end, params in jobs:
+            yield (job_id, *colonies[key].optimize(start, end, **params))
+        return
+
+    shared = {key: (colony.graph, colony.ship, colony.weather_data, colony.factors)
+              for key, colony in colonies.items()}
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker, initargs=(shared,))
+    try:
+        futures = {pool.submit(_worker_optimize, key, start, end, params): job_id
+                   for job_id, key, start, end, params in jobs}
+        for future in as_completed(futures):
+            yield (futures[future], *future.result())
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+
+class ColonyProcessPool:
+    """Runs AntColony.optimize in worker processes, so CPU-bound runs never hold the caller's GIL.
+
+    optimize() blocks the calling thread, which only relays: progress reports
+    come back and the stop event goes out through a multiprocessing manager, and
+    a run recorded by the worker is added to metrics when it finishes. The
+    colony's graph, ship and cost factors are sent with every run. The pool and
+    manager start on first use.
+    """
+
+    def __init__(self, workers=None):
+        self.workers = workers or os.cpu_count() or 1
+        self._pool = None
+        self._manager = None
+        self._lock = threading.Lock()
+
+    def optimize(self, colony, start, end, progress=None, stop=None, metrics=None, **params):
+        """colony.optimize(start, end, ...) run in a worker process, returning (best_route, best_cost)"""
+        with self._lock:
+            if self._pool is None:
+                self._manager = multiprocessing.Manager()
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        reports, cancel = self._manager.Queue(), self._manager.Event()
+        future = self._pool.submit(_process_optimize, (colony.graph, colony.ship, colony.weather_data, colony.factors),
+                                   start, end, params, reports, cancel, metrics is not None)
+        while True:
+            finished = future.done()  # Checked before draining, so the last reports are not missed
+            while True:
+                try:
+                    report = reports.get_nowait()
+                except queue.Empty:
+                    break
+                if progress is not None:
+                    progress(*report)
+            if finished:
+                break
+            if stop is not None and stop.is_set():
+                cancel.set()
+            wait_for_futures([future], timeout=RELAY_INTERVAL)
+        route, cost, run = future.result()
+        if run is not None:
+            metrics.finish_run(run, run.stop_reason, run.seconds)
+        return route, cost
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=wait, cancel_futures=not wait)
+                self._manager.shutdown()
+                self._pool = self._manager = None
+
+
+def run_colony_iteration(colony, pheromones, index, iteration, start, end, num_ants, alpha, beta,
+                         evaporation_rate, entropy):
+    """Run one iteration of one colony in place on its pheromone row and return (routes, costs)"""
+    rng = np.random.default_rng(np.random.SeedSequence(entropy, spawn_key=(index, iteration)))
+    draws = rng.random((num_ants, max(colony.num_nodes - 1, 0)))
+    routes, route_edges, _ = colony.construct_routes(start, end, pheromones, alpha, colony.heuristic(beta, end), draws)
+    costs = discard_dead_ends(routes, colony.route_costs(route_edges), end)
+    colony.update_pheromones(pheromones, route_edges, costs, evaporation_rate)
+    return [route.tolist() for route in routes], costs
+
+
+# Per-process state of pool workers, set once by _init_worker
+_worker = {}
+
+
+def _init_worker(graph, ship, weather_data, factors, block_name, shape):
+    block = shared_memory.SharedMemory(name=block_name)
+    _worker['block'] = block
+    _worker['colony'] = AntColony(graph, ship, weather_data, factors=factors)
+    _worker['pheromones'] = np.ndarray(shape, dtype=float, buffer=block.buf)
+
+
+def _worker_colony_iteration(task):
+    return run_colony_iteration(_worker['colony'], _worker['pheromones'][task[0]], *task)
+
+
+def _init_batch_worker(shared):
+    _worker['colonies'] = {key: AntColony(graph, ship, weather_data, factors=factors)
+                           for key, (graph, ship, weather_data, factors) in shared.items()}
+
+
+def _worker_optimize(key, start, end, params):
+    return _worker['colonies'][key].optimize(start, end, **params)
+
+
+def _process_optimize(colony_state, start, end, params, reports, cancel, measure):
+    graph, ship, weather_data, factors = colony_state
+    metrics = ACOMetrics(keep_runs=1) if measure else None
+    route, cost = AntColony(graph, ship, weather_data, factors=factors).optimize(
+        start, end, progress=lambda iteration, best_cost: reports.put((iteration, float(best_cost))), stop=cancel,
+        metrics=metrics, **params)
+    return route, cost, metrics.runs[-1] if metrics is not None and metrics.runs else None
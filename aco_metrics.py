@@ -0,0 +1,181 @@
+import json
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Phases timed by AntColony.optimize. "construct" is route construction including
+# the probability computation, which the batched engine also reports on its own
+# as "probabilities"; "pheromones" is evaporation and deposit.
+PHASES = ("construct", "probabilities", "pheromones")
+
+# Finished runs kept for export; the counters cover every run
+KEEP_RUNS = 100
+
+
+def pheromone_entropy(pheromones) -> float:
+    """Shannon entropy of the normalized pheromone trail, scaled to [0, 1].
+
+    1 means pheromone is spread evenly over every edge, as before the first
+    deposit; values falling towards 0 mean the colony is concentrating on a few edges.
+    """
+    tau = np.asarray(pheromones, dtype=np.float64)
+    total = tau.sum()
+    if tau.size < 2 or total <= 0:
+        return 0.0
+    p = tau[tau > 0] / total
+    return float(-(p * np.log(p)).sum() / np.log(tau.size))
+
+
+def prometheus_value(value) -> str:
+    if isinstance(value, float) and math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return f"{value}"
+
+
+@dataclass
+class IterationMetrics:
+    iteration: int
+    best_cost: float  # Best found so far in the run
+    iteration_best: float  # Best of this iteration's ants
+    mean_cost: float  # Mean over this iteration's ants that reached the goal
+    ants: int
+    dead_ends: int  # Ants that got stuck before the goal
+    entropy: float  # pheromone_entropy after the update
+    construct_seconds: float = 0.0
+    probabilities_seconds: float = 0.0
+    pheromones_seconds: float = 0.0
+
+
+@dataclass
+class RunMetrics:
+    """Per-iteration metrics of one AntColony.optimize run"""
+    params: Dict
+    iterations: List[IterationMetrics] = field(default_factory=list)
+    stop_reason: Optional[str] = None  # "converged", "max_iterations" or "stopped"
+    seconds: float = 0.0
+    _phases: Dict[str, float] = field(default_factory=dict, repr=False)
+
+    @contextmanager
+    def phase(self, name):
+        """Add the time spent in the block to phase name of the current iteration"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._phases[name] = self._phases.get(name, 0.0) + time.perf_counter() - started
+
+    def record(self, iteration, costs, best_cost, pheromones) -> IterationMetrics:
+        """Close an iteration given its ants' costs (inf for dead ends) and the pheromones after the update"""
+        costs = np.asarray(costs, dtype=np.float64)
+        finite = costs[np.isfinite(costs)]
+        metrics = IterationMetrics(
+            iteration, float(best_cost),
+            float(finite.min()) if finite.size else math.inf,
+            float(finite.mean()) if finite.size else math.inf,
+            int(costs.size), int(costs.size - finite.size), pheromone_entropy(pheromones),
+            **{f"{name}_seconds": seconds for name, seconds in self._phases.items()})
+        self._phases = {}
+        self.iterations.append(metrics)
+        return metrics
+
+    @property
+    def converged(self) -> bool:
+        return self.stop_reason == "converged"
+
+    def summary(self) -> Dict:
+        """Run-level figures for comparing parameter settings"""
+        best = self.iterations[-1].best_cost if self.iterations else math.inf
+        ants = sum(metrics.ants for metrics in self.iterations)
+        return {
+            **self.params,
+            "stop_reason": self.stop_reason,
+            "iterations": len(self.iterations),
+            "best_cost": best,
+            "best_found_at": next((metrics.iteration for metrics in self.iterations if metrics.best_cost == best),
+                                  None),
+            "dead_end_rate": sum(metrics.dead_ends for metrics in self.iterations) / ants if ants else 0.0,
+            "final_entropy": self.iterations[-1].entropy if self.iterations else None,
+            "seconds": self.seconds,
+            **{f"{name}_seconds": sum(getattr(metrics, f"{name}_seconds") for metrics in self.iterations)
+               for name in PHASES},
+        }
+
+
+class ACOMetrics:
+    """Collects RunMetrics and cumulative counters over any number of optimize runs.
+
+    Pass one instance as AntColony.optimize(metrics=...); runs may come from
+    several threads. The last ``keep_runs`` runs are kept for export as
+    structured records, and the counters can be scraped as Prometheus text.
+    """
+
+    def __init__(self, keep_runs=KEEP_RUNS):
+        self.runs = deque(maxlen=keep_runs)
+        self.runs_by_reason: Dict[str, int] = {}
+        self.iterations = 0
+        self.ants = 0
+        self.dead_ends = 0
+        self.phase_seconds = {name: 0.0 for name in PHASES}
+        self._lock = threading.Lock()
+
+    def start_run(self, **params) -> RunMetrics:
+        return RunMetrics(params)
+
+    def finish_run(self, run: RunMetrics, stop_reason, seconds):
+        run.stop_reason = stop_reason
+        run.seconds = seconds
+        with self._lock:
+            self.runs.append(run)
+            self.runs_by_reason[stop_reason] = self.runs_by_reason.get(stop_reason, 0) + 1
+            for metrics in run.iterations:
+                self.iterations += 1
+                self.ants += metrics.ants
+                self.dead_ends += metrics.dead_ends
+                for name in PHASES:
+                    self.phase_seconds[name] += getattr(metrics, f"{name}_seconds")
+
+    def records(self) -> List[Dict]:
+        """One flat dict per iteration of the kept runs, with the run's index, parameters and stop reason"""
+        with self._lock:
+            runs = list(self.runs)
+        return [{"run": index, **run.params, "stop_reason": run.stop_reason, **asdict(metrics)}
+                for index, run in enumerate(runs) for metrics in run.iterations]
+
+    def write_jsonl(self, path):
+        """Write records() as JSON lines, with infinite costs written as null"""
+        with open(path, "w") as jsonl_file:
+            for record in self.records():
+                record = {key: None if isinstance(value, float) and not math.isfinite(value) else value
+                          for key, value in record.items()}
+                jsonl_file.write(json.dumps(record) + "\n")
+
+    def prometheus_text(self, prefix="aco") -> str:
+        """Counters and last-run gauges in the Prometheus text exposition format"""
+        with self._lock:
+            last = self.runs[-1].iterations[-1] if self.runs and self.runs[-1].iterations else None
+            lines = [f"# HELP {prefix}_runs_total Optimization runs by stop reason",
+                     f"# TYPE {prefix}_runs_total counter"]
+            lines += [f'{prefix}_runs_total{{reason="{reason}"}} {count}'
+                      for reason, count in sorted(self.runs_by_reason.items())]
+            for name, value, help_text in [("iterations", self.iterations, "Iterations run"),
+                                           ("ants", self.ants, "Ants released"),
+                                           ("dead_end_ants", self.dead_ends, "Ants that got stuck before the goal")]:
+                lines += [f"# HELP {prefix}_{name}_total {help_text}", f"# TYPE {prefix}_{name}_total counter",
+                          f"{prefix}_{name}_total {value}"]
+            lines += [f"# HELP {prefix}_phase_seconds_total Time spent per optimization phase",
+                      f"# TYPE {prefix}_phase_seconds_total counter"]
+            lines += [f'{prefix}_phase_seconds_total{{phase="{name}"}} {seconds:.6f}'
+                      for name, seconds in self.phase_seconds.items()]
+            if last is not None:
+                for name, value, help_text in [("best_cost", last.best_cost, "Best cost of the last run"),
+                                               ("pheromone_entropy", last.entropy,
+                                                "Pheromone entropy at the end of the last run")]:
+                    lines += [f"# HELP {prefix}_last_{name} {help_text}", f"# TYPE {prefix}_last_{name} gauge",
+                              f"{prefix}_last_{name} {prometheus_value(value)}"]
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,91 @@
+import json
+import logging
+import math
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from aco_engine import weather_factor
+
+ACO_TUNING_PATH = "data/aco_tuning.json"
+
+# Parameters ant_colony_optimization used for every run before tuning, and still
+# uses where the table has no entry
+ACO_DEFAULTS = {"num_ants": 10, "max_iterations": 100, "alpha": 1, "beta": 2, "evaporation_rate": 0.5}
+
+# Upper bounds in nodes of the graph size buckets; larger graphs use the last bucket
+SIZE_BUCKETS = [2000, 8000, 32000]
+
+# (severity, upper bound of the weather cost factor at departure); a factor of 1.75
+# is about 7.5 m/s of wind in good visibility, 2.5 about 15 m/s
+SEVERITY_LEVELS = [("calm", 1.75), ("rough", 2.5), ("severe", math.inf)]
+
+
+def size_bucket(num_nodes) -> int:
+    """Upper bound of the size bucket of a graph with num_nodes nodes"""
+    for bound in SIZE_BUCKETS:
+        if num_nodes <= bound:
+            return bound
+    return SIZE_BUCKETS[-1]
+
+
+def weather_severity(weather_data) -> str:
+    """Severity level of a voyage's weather, from the cost factor of the current weather_data.
+
+    Runs with and without a forecast use this same definition, so a voyage gets
+    the same table entry whichever mode it is routed in.
+    """
+    factor = float(weather_factor(weather_data.wind_speed or 0, weather_data.visibility
+                                  if weather_data.visibility is not None else np.inf))
+    return next(level for level, bound in SEVERITY_LEVELS if factor < bound)
+
+
+@dataclass
+class TuningEntry:
+    max_nodes: int
+    severity: str
+    params: Dict
+    gap: Optional[float] = None  # Mean cost gap to the best route found on the tuning corpus
+    seconds: Optional[float] = None  # Mean wall time of one run on the tuning corpus
+    default_gap: Optional[float] = None  # The same figures for ACO_DEFAULTS, for comparison
+    default_seconds: Optional[float] = None
+
+
+@dataclass
+class ACOTuningTable:
+    """ACO parameters by graph size bucket and weather severity, as written by tune_aco.py"""
+    entries: List[TuningEntry] = field(default_factory=list)
+    created: Optional[str] = None
+    revision: Optional[str] = None
+
+    @classmethod
+    def load(cls, path=ACO_TUNING_PATH) -> "ACOTuningTable":
+        """Table stored at path, or an empty table (always ACO_DEFAULTS) if it is missing or unreadable"""
+        try:
+            with open(path) as table_file:
+                data = json.load(table_file)
+            return cls([TuningEntry(**entry) for entry in data["entries"]], data.get("created"),
+                       data.get("revision"))
+        except FileNotFoundError:
+            return cls()
+        except (ValueError, KeyError, TypeError) as e:
+            logging.error(f"Error loading ACO tuning table {path}: {e}")
+            return cls()
+
+    def save(self, path=ACO_TUNING_PATH):
+        with open(path, "w") as table_file:
+            json.dump(asdict(self), table_file, indent=2)
+
+    def lookup(self, num_nodes, severity) -> Dict:
+        """Parameters for a graph of num_nodes nodes in weather of the given severity.
+
+        Falls back to the closest size bucket tuned for that severity, then to ACO_DEFAULTS.
+        Keys missing from an entry keep their default.
+        """
+        candidates = [entry for entry in self.entries if entry.severity == severity]
+        if not candidates:
+            return dict(ACO_DEFAULTS)
+        bucket = size_bucket(num_nodes)
+        entry = min(candidates, key=lambda entry: abs(math.log(entry.max_nodes / bucket)))
+        return {**ACO_DEFAULTS, **entry.params}
@@ -0,0 +1,243 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import requests
+
+# Consecutive polls a condition must hold before alerting, and be absent before clearing
+RAISE_AFTER = 2
+CLEAR_AFTER = 2
+
+# Seconds before an ongoing alert is repeated; each repeat escalates one level up to MAX_LEVEL
+ALERT_COOLDOWN = 1800
+MAX_LEVEL = 2
+
+# Longest SMS body the provider accepts; batches over it are sent as several messages
+SMS_MAX_LENGTH = 1600
+
+
+def pack_messages(bodies, limit=SMS_MAX_LENGTH) -> List[str]:
+    """Join bodies with newlines into as few SMS bodies of at most limit characters as possible.
+
+    Bodies are never split between messages; one longer than limit on its own is cut and ends with "...".
+    """
+    packed = []
+    for body in bodies:
+        if len(body) > limit:
+            body = body[:limit - 3] + "..."
+        if packed and len(packed[-1]) + 1 + len(body) <= limit:
+            packed[-1] += "\n" + body
+        else:
+            packed.append(body)
+    return packed
+
+
+@dataclass
+class AlertState:
+    active: bool = False
+    seen: int = 0  # Consecutive polls with the condition
+    missed: int = 0  # Consecutive polls without it
+    level: int = 0
+    notified_at: float = float('-inf')
+
+
+@dataclass
+class Notification:
+    vessel_id: str
+    condition: str
+    level: int
+    kind: str  # "alert", "escalation" or "clear"
+    message: str
+    recipients: List[str] = field(default_factory=list)
+
+
+class AlertStateMachine:
+    """Turns raw per-poll alerts into notifications with hysteresis, cooldowns and escalation.
+
+    A (vessel, condition) pair becomes active after ``raise_after`` consecutive
+    polls with the condition and clears after ``clear_after`` polls without it,
+    so a reading hovering around a threshold does not flap. While active it is
+    re-notified at most every ``cooldown`` seconds, one escalation level higher
+    each time, and ``recipients_by_level[level]`` are the numbers to text.
+    """
+
+    def __init__(self, recipients_by_level: Sequence[Sequence[str]], raise_after=RAISE_AFTER,
+                 clear_after=CLEAR_AFTER, cooldown=ALERT_COOLDOWN, max_level=MAX_LEVEL, notify_clear=True,
+                 clock=time.monotonic):
+        self.recipients_by_level = [list(recipients) for recipients in recipients_by_level]
+        self.raise_after = raise_after
+        self.clear_after = clear_after
+        self.cooldown = cooldown
+        self.max_level = max_level
+        self.notify_clear = notify_clear
+        self.clock = clock
+        self._states: Dict[Tuple[str, str], AlertState] = {}
+
+    def recipients(self, level) -> List[str]:
+        return self.recipients_by_level[min(level, len(self.recipients_by_level) - 1)]
+
+    def update(self, alerts, observed) -> List[Notification]:
+        """Advance every pair by one poll.
+
+        alerts are this poll's fleet_monitor.Alert objects; observed are the
+        vessel ids that had weather data, so only those count towards clearing.
+        """
+        now = self.clock()
+        current = {(alert.vessel_id, alert.condition): alert for alert in alerts}
+        observed = set(observed)
+        notifications = []
+
+        for key, alert in current.items():
+            state = self._states.setdefault(key, AlertState())
+            state.seen += 1
+            state.missed = 0
+            if not state.active and state.seen >= self.raise_after:
+                state.active, state.level, state.notified_at = True, 0, now
+                notifications.append(Notification(*key, 0, "alert", alert.message, self.recipients(0)))
+            elif state.active and now - state.notified_at >= self.cooldown:
+                state.level = min(state.level + 1, self.max_level)
+                state.notified_at = now
+                message = f"ESCALATED (level {state.level}): {alert.message}"
+                notifications.append(Notification(*key, state.level, "escalation", message,
+                                                  self.recipients(state.level)))
+
+        for key in list(self._states):
+            if key in current or key[0] not in observed:
+                continue
+            state = self._states[key]
+            state.seen = 0
+            state.missed += 1
+            if state.missed >= self.clear_after:
+                if state.active and self.notify_clear:
+                    message = f"ALL CLEAR: {key[1].replace('_', ' ')} condition has ended"
+                    notifications.append(Notification(*key, state.level, "clear", message,
+                                                      self.recipients(state.level)))
+                del self._states[key]
+        return notifications
+
+    def active(self) -> List[Tuple[str, str]]:
+        return [key for key, state in self._states.items() if state.active]
+
+
+class TwilioTransport:
+    """Sends through one shared Twilio client"""
+
+    def __init__(self, client, from_number):
+        self.client = client
+        self.from_number = from_number
+
+    def send(self, to, body):
+        self.client.messages.create(body=body, from_=self.from_number, to=to)
+
+
+class HttpSmsTransport:
+    """Posts Twilio-style form fields (To, From, Body) to an HTTP endpoint over one pooled session"""
+
+    def __init__(self, url, from_number, auth=None, timeout=10):
+        self.url = url
+        self.from_number = from_number
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.auth = auth
+
+    def send(self, to, body):
+        response = self.session.post(self.url, data={"To": to, "From": self.from_number, "Body": body},
+                                     timeout=self.timeout)
+        response.raise_for_status()
+
+
+class SmsDispatcher:
+    """Batched outbound SMS queue delivered by a small worker pool.
+
+    Messages submitted within ``batch_window`` seconds of each other are merged
+    into one SMS per recipient, or several when they exceed SMS_MAX_LENGTH
+    (see pack_messages). Each batch is sent by one of ``workers``
+    threads through a single shared transport, retrying failures with
+    exponential backoff up to ``max_retries`` attempts.
+    """
+
+    def __init__(self, transport, workers=4, batch_window=2.0, max_retries=3, backoff=1.0,
+                 sleep: Callable = time.sleep):
+        self.transport = transport
+        self.batch_window = batch_window
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.sleep = sleep
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+        self._pending: Dict[str, List[str]] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sms")
+        self._futures = []
+        self._timer: Optional[threading.Timer] = None
+
+    def submit(self, to, body):
+        """Queue a message; it is sent with the rest of its batch when the window closes"""
+        with self._lock:
+            self._pending.setdefault(to, []).append(body)
+            if self._timer is None:
+                self._timer = threading.Timer(self.batch_window, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def submit_notifications(self, notifications: Sequence[Notification]):
+        for notification in notifications:
+            for recipient in notification.recipients:
+                self.submit(recipient, f"[{notification.vessel_id}] {notification.message}")
+
+    def flush(self):
+        """Hand every pending batch to the worker pool now"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            for to, bodies in pending.items():
+                for body in pack_messages(bodies):
+                    self._futures.append(self._executor.submit(self._deliver, to, body))
+            self._futures = [future for future in self._futures if not future.done()]
+
+    def close(self, wait=True):
+        """Flush and stop the workers, waiting for in-flight sends when wait is True"""
+        self.flush()
+        self._executor.shutdown(wait=wait)
+
+    def stats(self):
+        return {"sent": self.sent, "failed": self.failed, "retries": self.retries}
+
+    def _deliver(self, to, body):
+        for attempt in range(self.max_retries):
+            try:
+                self.transport.send(to, body)
+                with self._lock:
+                    self.sent += 1
+                logging.info(f"SMS sent to {to}")
+                return True
+            except Exception as e:
+                if attempt == self.max_retries - 1:
+                    with self._lock:
+                        self.failed += 1
+                    logging.error(f"Failed to send SMS to {to} after {self.max_retries} attempts: {e}")
+                    return False
+                with self._lock:
+                    self.retries += 1
+                logging.warning(f"SMS attempt {attempt + 1} to {to} failed, retrying...")
+                self.sleep(self.backoff * 2 ** attempt)  # Exponential backoff
+
+
+class AlertingSink:
+    """fleet_monitor sink that runs alerts through a state machine into an SMS dispatcher"""
+
+    def __init__(self, state_machine: AlertStateMachine, dispatcher: SmsDispatcher):
+        self.state_machine = state_machine
+        self.dispatcher = dispatcher
+
+    async def emit(self, alerts, observed):
+        notifications = self.state_machine.update(alerts, observed)
+        for notification in notifications:
+            logging.info(f"{notification.kind} for {notification.vessel_id}: {notification.message}")
+        self.dispatcher.submit_notifications(notifications)
@@ -0,0 +1,54 @@
+import numpy as np
+
+KNOTS_PER_MS = 1.944
+
+# Lowest wind speed in knots of Beaufort forces 1-12. The WMO bands are whole
+# knots (force 1 is 1-3 kn, force 2 is 4-6 kn, ...), so the boundaries sit
+# halfway between them to leave no gaps for fractional speeds.
+BEAUFORT_THRESHOLDS = np.array([1, 3.5, 6.5, 10.5, 16.5, 21.5, 27.5, 33.5, 40.5, 47.5, 55.5, 63.5])
+
+# (condition, sea state) of forces 0-12
+BEAUFORT_DESCRIPTIONS = [
+    ("Calm", "Sea like a mirror"),
+    ("Light air", "Ripples with appearance of scales"),
+    ("Light breeze", "Small wavelets"),
+    ("Gentle breeze", "Large wavelets"),
+    ("Moderate breeze", "Small waves with breaking crests"),
+    ("Fresh breeze", "Moderate waves with whitecaps"),
+    ("Strong breeze", "Larger waves with extensive whitecaps"),
+    ("Near gale", "Sea heaps up, foam begins to streak"),
+    ("Gale", "Moderately high waves with breaking crests"),
+    ("Strong gale", "High waves with dense foam"),
+    ("Storm", "Very high waves with overhanging crests"),
+    ("Violent storm", "Exceptionally high waves"),
+    ("Hurricane", "Air filled with foam and spray"),
+]
+
+# Force given to a missing (NaN) wind speed; the description arrays end with its entry,
+# so indexing them with UNKNOWN_FORCE reads it
+UNKNOWN_FORCE = -1
+UNKNOWN_DESCRIPTION = ("Unknown", "Unable to determine")
+
+BEAUFORT_CONDITIONS = np.array([condition for condition, _ in BEAUFORT_DESCRIPTIONS + [UNKNOWN_DESCRIPTION]])
+BEAUFORT_SEA_STATES = np.array([sea_state for _, sea_state in BEAUFORT_DESCRIPTIONS + [UNKNOWN_DESCRIPTION]])
+
+
+def beaufort_force(wind_speed):
+    """Beaufort force (0-12) of wind speeds in m/s, for a scalar or an array of any shape; NaN gives UNKNOWN_FORCE"""
+    wind_knots = np.asarray(wind_speed, dtype=np.float64) * KNOTS_PER_MS
+    return np.where(np.isnan(wind_knots), UNKNOWN_FORCE, np.searchsorted(BEAUFORT_THRESHOLDS, wind_knots, side="right"))
+
+
+def classify_beaufort(wind_speed):
+    """Force, condition, sea state and knots of wind speeds in m/s, as arrays shaped like the input.
+
+    A NaN wind speed is classified as UNKNOWN_FORCE, "Unknown", with NaN knots.
+    """
+    wind_knots = np.asarray(wind_speed, dtype=np.float64) * KNOTS_PER_MS
+    force = beaufort_force(wind_speed)
+    return {
+        "force": force,
+        "condition": BEAUFORT_CONDITIONS[force],
+        "sea_state": BEAUFORT_SEA_STATES[force],
+        "wind_knots": np.round(wind_knots, 1),
+    }
@@ -0,0 +1,67 @@
+import argparse
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from aco_engine import AntColony
+from sea_graph import SeaGraph
+
+SHIP = SimpleNamespace(ship_type="Cargo", max_speed=20, fuel_consumption=0.1,
+                       safety_rating=0.9, fuel_capacity=1000.0, vessel_weight=50.0)
+WEATHER = SimpleNamespace(wind_speed=6.0, visibility=10.0)
+
+
+def lattice_graph(num_nodes, seed=0):
+    """Square 8-connected lattice with random integer weights as a SeaGraph"""
+    rng = np.random.default_rng(seed)
+    side = int(np.ceil(np.sqrt(num_nodes)))
+    nodes = np.arange(num_nodes)
+    row, col = np.divmod(nodes, side)
+    sources, targets = [], []
+    for d_row, d_col in [(0, 1), (1, -1), (1, 0), (1, 1)]:
+        r, c = row + d_row, col + d_col
+        neighbor = r * side + c
+        keep = (c >= 0) & (c < side) & (neighbor < num_nodes)
+        sources.append(nodes[keep])
+        targets.append(neighbor[keep])
+    sources, targets = np.concatenate(sources), np.concatenate(targets)
+    weights = rng.integers(1, 10, size=sources.size).astype(np.int32)
+    return SeaGraph.from_edges(num_nodes, np.concatenate([sources, targets]),
+                               np.concatenate([targets, sources]), np.concatenate([weights, weights]))
+
+
+def run(colony, args, vectorized):
+    started = time.perf_counter()
+    route, cost = colony.optimize(0, colony.num_nodes - 1, num_ants=args.ants,
+                                  max_iterations=args.iterations, seed=args.seed,
+                                  vectorized=vectorized)
+    return route, cost, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the batched ACO engine against the per-ant engine")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 10000, 100000])
+    parser.add_argument("--ants", type=int, default=10)
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--legacy-max", type=int, default=10000,
+                        help="largest graph the per-ant engine is run on, so speedups cover 1k to 10k nodes")
+    args = parser.parse_args()
+
+    print(f"{'nodes':>8} {'graph MB':>9} {'batched s':>10} {'per-ant s':>10} {'speedup':>8}  match")
+    for size in args.sizes:
+        graph = lattice_graph(size, args.seed)
+        colony = AntColony(graph, SHIP, WEATHER)
+        megabytes = graph.nbytes() / 1e6
+        route, cost, batched = run(colony, args, vectorized=True)
+        if size <= args.legacy_max:
+            legacy_route, legacy_cost, legacy = run(colony, args, vectorized=False)
+            match = route == legacy_route and cost == legacy_cost
+            print(f"{size:>8} {megabytes:>9.2f} {batched:>10.3f} {legacy:>10.3f} {legacy / batched:>7.1f}x  {match}")
+        else:
+            print(f"{size:>8} {megabytes:>9.2f} {batched:>10.3f} {'-':>10} {'-':>8}  -")
+
+
+if __name__ == "__main__":
+    main()
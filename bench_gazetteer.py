@@ -0,0 +1,44 @@
+import argparse
+import time
+
+from gazetteer import PORTS_PATH, Gazetteer
+
+# (label, method, query) lookups timed by the benchmark
+QUERIES = [
+    ("exact", "resolve", "Colombo"),
+    ("exact with country", "resolve", "Chennai, India"),
+    ("other country", "resolve", "Lagos, Portugal"),
+    ("prefix", "prefix", "sin"),
+    ("word prefix", "prefix", "louis"),
+    ("typo", "suggest", "Rotterdma"),
+    ("fuzzy miss", "suggest", "Atlantis"),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark gazetteer lookup latency")
+    parser.add_argument("--path", default=PORTS_PATH)
+    parser.add_argument("--repeat", type=int, default=10000)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    gazetteer = Gazetteer.load(args.path)
+    print(f"Loaded {len(gazetteer)} places in {(time.perf_counter() - started) * 1000:.2f} ms")
+
+    print(f"{'lookup':<20} {'query':<16} {'us/op':>8}  result")
+    for label, method, query in QUERIES:
+        lookup = getattr(gazetteer, method)
+        result = lookup(query)
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            lookup(query)
+        micros = (time.perf_counter() - started) / args.repeat * 1e6
+        if isinstance(result, list):
+            result = ", ".join(port.name for port in result)
+        elif result is not None:
+            result = result.name
+        print(f"{label:<20} {query:<16} {micros:>8.2f}  {result}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+import argparse
+import heapq
+import json
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from functools import lru_cache
+from types import SimpleNamespace
+
+import numpy as np
+import requests
+
+from aco_engine import AntColony
+from forecast_tensor import ForecastTensor
+from geodesy import great_circle_nm, leg_distances_nm
+from sea_lattice import SeaLattice
+
+# Weather in the OpenWeatherMap 5 day / 3 hour forecast format, one file per scenario.
+# --record replaces them with live captures taken at the scenario's city.
+FIXTURE_DIR = "data/weather_fixtures"
+FIXTURES = ["calm", "monsoon", "cyclone"]
+
+SHIP = SimpleNamespace(ship_type="Cargo", max_speed=20, fuel_consumption=0.1,
+                       safety_rating=0.9, fuel_capacity=1000.0, vessel_weight=50.0)
+
+# Every synthetic lattice covers the same box, so larger sizes are finer grids of the same sea
+BOX_LAT, BOX_LON, BOX_DEGREES = 8.0, 80.5, 8.0
+SIDES = [32, 64, 128]
+
+# Islands per lattice and their radius range as a fraction of the side
+ISLANDS = 12
+ISLAND_RADIUS = (0.03, 0.09)
+
+
+def synthetic_lattice(side, seed=0):
+    """Square sea lattice with random round islands, its corners kept clear for the start and end"""
+    rng = np.random.default_rng(seed)
+    rows, cols = np.mgrid[0:side, 0:side]
+    land = np.zeros((side, side), dtype=bool)
+    for _ in range(ISLANDS):
+        row, col = rng.uniform(0.15, 0.85, size=2) * side
+        radius = rng.uniform(*ISLAND_RADIUS) * side
+        land |= (rows - row) ** 2 + (cols - col) ** 2 <= radius ** 2
+    clear = max(side // 10, 2)
+    land[:clear, :clear] = False
+    land[-clear:, -clear:] = False
+    return SeaLattice.from_mask(land, BOX_LAT, BOX_LON, BOX_DEGREES / side)
+
+
+def connected_lattice(side, seed=0):
+    """synthetic_lattice whose first and last nodes (the two clear corners) are connected, trying seeds upwards"""
+    while True:
+        lattice = synthetic_lattice(side, seed)
+        unit = np.ones(lattice.graph.num_edges)
+        if shortest_path_cost(lattice.graph, unit, 0, lattice.graph.num_nodes - 1) < float('inf'):
+            return lattice
+        seed += 1
+
+
+def shortest_path_cost(graph, costs, start, end):
+    """Exact minimum route cost under per-edge costs (Dijkstra), inf when end is unreachable"""
+    best = np.full(graph.num_nodes, np.inf)
+    best[start] = 0.0
+    heap = [(0.0, start)]
+    while heap:
+        cost, node = heapq.heappop(heap)
+        if node == end:
+            return cost
+        if cost > best[node]:
+            continue
+        first, last = graph.indptr[node], graph.indptr[node + 1]
+        for neighbor, edge_cost in zip(graph.indices[first:last].tolist(), costs[first:last].tolist()):
+            if cost + edge_cost < best[neighbor]:
+                best[neighbor] = cost + edge_cost
+                heapq.heappush(heap, (cost + edge_cost, neighbor))
+    return float('inf')
+
+
+def parse_entry(entry):
+    """WeatherData-like record of one OpenWeatherMap forecast entry"""
+    return SimpleNamespace(
+        temperature=entry["main"]["temp"],
+        feels_like=entry["main"]["feels_like"],
+        description=entry["weather"][0]["description"],
+        wind_speed=entry["wind"].get("speed", 0),
+        wind_direction=entry["wind"].get("deg", 0),
+        humidity=entry["main"]["humidity"],
+        pressure=entry["main"]["pressure"],
+        visibility=entry.get("visibility", 0) / 1000,
+        timestamp=datetime.fromtimestamp(entry["dt"], timezone.utc),
+    )
+
+
+def load_fixture(name, directory=FIXTURE_DIR):
+    """(current weather, forecast list) replayed from a fixture, the first step standing in for current"""
+    with open(os.path.join(directory, f"{name}.json")) as fixture_file:
+        data = json.load(fixture_file)
+    forecast = [parse_entry(entry) for entry in data["list"]]
+    return forecast[0], forecast
+
+
+def record_fixture(name, api_key, directory=FIXTURE_DIR):
+    """Replace a fixture with a live forecast for the city it was recorded at"""
+    path = os.path.join(directory, f"{name}.json")
+    with open(path) as fixture_file:
+        coord = json.load(fixture_file)["city"]["coord"]
+    response = requests.get("https://api.openweathermap.org/data/2.5/forecast",
+                            params={"lat": coord["lat"], "lon": coord["lon"], "appid": api_key, "units": "metric"},
+                            timeout=10)
+    response.raise_for_status()
+    with open(path, "w") as fixture_file:
+        json.dump(response.json(), fixture_file, indent=1)
+    print(f"Recorded {path}")
+
+
+@lru_cache(maxsize=None)
+def marine_analyzer():
+    """MarineWeatherAnalyzer shared by the ACO routers, with its tuning table and disaster store"""
+    from marine_optimizer import MarineWeatherAnalyzer
+    return MarineWeatherAnalyzer()
+
+
+def route_aco(case, args, forecast=None):
+    """ant_colony_optimization as the app calls it: tuned parameters unless --ants/--iterations are given,
+    and the disaster hazard layer"""
+    analyzer = marine_analyzer()
+    route, cost = analyzer.ant_colony_optimization(case.lattice.graph, case.start_node, case.end_node, SHIP,
+                                                   case.weather, num_ants=args.ants, max_iterations=args.iterations,
+                                                   seed=args.seed, forecast=forecast, hazards=analyzer.disasters)
+    return route, None, cost
+
+
+def route_aco_forecast(case, args):
+    return route_aco(case, args, forecast=ForecastTensor.from_forecast(case.forecast, case.weather.timestamp))
+
+
+def route_astar(case, args):
+    import chatbot
+    analyzer = chatbot.MarineWeatherAnalyzer()
+    waypoints = analyzer.optimize_route(case.start_coords, case.end_coords, SHIP, case.weather,
+                                        forecast=case.forecast, resolution=case.lattice.resolution)
+    return None, waypoints, None
+
+
+def route_twillo(case, args):
+    import twillo
+    route, cost = twillo.MarineWeatherAnalyzer.ant_colony_optimization(
+        None, case.lattice.graph, case.start_node, case.end_node, SHIP, case.weather)
+    return route, None, cost
+
+
+# name -> (router, what it is). The chatbot A* grid has no land mask, so its routes may cross the
+# synthetic islands and be reported invalid; the twillo router is a placeholder kept as a floor.
+ROUTERS = {
+    "aco": (route_aco, "marine_optimizer ant_colony_optimization with hazards, current weather"),
+    "aco_forecast": (route_aco_forecast, "marine_optimizer ant_colony_optimization with hazards, forecast"),
+    "astar": (route_astar, "chatbot optimize_route"),
+    "twillo": (route_twillo, "twillo ant_colony_optimization placeholder"),
+}
+
+
+def evaluate(case, route, waypoints):
+    """Route quality under the static cost model of the case, comparable across routers"""
+    graph = case.lattice.graph
+    quality = {"valid": False, "distance_nm": None, "detour": None, "lattice_cost": None, "gap": None}
+    if route is not None and len(route) > 0:
+        edges = [graph.edge_index(route[i], route[i + 1]) for i in range(len(route) - 1)]
+        quality["valid"] = route[0] == case.start_node and route[-1] == case.end_node and min(edges, default=0) >= 0
+        if quality["valid"]:
+            quality["lattice_cost"] = float(case.costs[edges].sum())
+            quality["gap"] = quality["lattice_cost"] / case.optimal_cost - 1
+        waypoints = case.lattice.waypoints(route)
+    elif waypoints:
+        # Every waypoint lies in a water cell of the lattice
+        quality["valid"] = all(case.lattice.contains(lat, lon) and case.lattice.node_grid[case.lattice.cell_of(lat, lon)] >= 0
+                               for lat, lon in waypoints)
+    if waypoints:
+        quality["distance_nm"] = float(leg_distances_nm(waypoints).sum())
+        quality["detour"] = quality["distance_nm"] / great_circle_nm(*case.start_coords, *case.end_coords)
+    return quality
+
+
+def measure(router, case, args):
+    """Peak traced memory of one run, which also warms up imports, then the best wall time over args.repeat runs"""
+    tracemalloc.start()
+    try:
+        router(case, args)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    times = []
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        result = router(case, args)
+        times.append(time.perf_counter() - started)
+    return result, min(times), peak
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the routers on synthetic lattices with recorded weather")
+    parser.add_argument("--sides", type=int, nargs="+", default=SIDES, help="lattice sides in cells")
+    parser.add_argument("--weather", nargs="+", default=FIXTURES, choices=FIXTURES)
+    parser.add_argument("--routers", nargs="+", default=list(ROUTERS), choices=list(ROUTERS))
+    parser.add_argument("--ants", type=int, help="ACO ants (default: the tuning table's)")
+    parser.add_argument("--iterations", type=int, help="ACO iterations (default: the tuning table's)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per case, the fastest is kept")
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--compare", help="JSON from an earlier --output run to compare against")
+    parser.add_argument("--record", metavar="API_KEY", help="re-record the weather fixtures first (needs network)")
+    args = parser.parse_args()
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+    if args.record:
+        for name in args.weather:
+            record_fixture(name, args.record)
+    previous = {}
+    if args.compare:
+        with open(args.compare) as compare_file:
+            previous = {(result["router"], result["side"], result["weather"]): result
+                        for result in json.load(compare_file)["results"]}
+
+    results = []
+    print(f"{'router':<13} {'side':>5} {'weather':<8} {'wall s':>8} {'peak MB':>8} {'valid':>5} "
+          f"{'gap':>7} {'detour':>7} {'vs prev':>8}")
+    for side in args.sides:
+        lattice = connected_lattice(side, args.seed)
+        start_coords = tuple(float(value) for value in lattice.waypoints([0])[0])
+        end_coords = tuple(float(value) for value in lattice.waypoints([lattice.graph.num_nodes - 1])[0])
+        for name in args.weather:
+            weather, forecast = load_fixture(name)
+            costs = AntColony(lattice.graph, SHIP, weather).costs
+            case = SimpleNamespace(lattice=lattice, weather=weather, forecast=forecast, costs=costs,
+                                   start_node=0, end_node=lattice.graph.num_nodes - 1,
+                                   start_coords=start_coords, end_coords=end_coords,
+                                   optimal_cost=shortest_path_cost(lattice.graph, costs, 0,
+                                                                   lattice.graph.num_nodes - 1))
+            for router_name in args.routers:
+                result = {"router": router_name, "side": side, "nodes": lattice.graph.num_nodes,
+                          "edges": lattice.graph.num_edges, "weather": name, "description": ROUTERS[router_name][1],
+                          "optimal_cost": case.optimal_cost}
+                try:
+                    (route, waypoints, cost), wall, peak = measure(ROUTERS[router_name][0], case, args)
+                except ImportError as e:
+                    result["error"] = f"skipped: {e}"
+                    print(f"{router_name:<13} {side:>5} {name:<8} {result['error']}")
+                    results.append(result)
+                    continue
+                result.update(wall_s=wall, peak_mb=peak / 1e6, router_cost=cost, **evaluate(case, route, waypoints))
+                results.append(result)
+
+                gap = f"{result['gap']:.3f}" if result["gap"] is not None else "-"
+                detour = f"{result['detour']:.3f}" if result["detour"] is not None else "-"
+                before = previous.get((router_name, side, name), {}).get("wall_s")
+                change = f"{wall / before:.2f}x" if before else ""
+                print(f"{router_name:<13} {side:>5} {name:<8} {wall:>8.3f} {result['peak_mb']:>8.2f} "
+                      f"{str(result['valid']):>5} {gap:>7} {detour:>7} {change:>8}")
+
+    if args.output:
+        report = {"revision": git_revision(), "created": datetime.now(timezone.utc).isoformat(),
+                  "python": platform.python_version(), "numpy": np.__version__,
+                  "parameters": {"ants": args.ants, "iterations": args.iterations, "seed": args.seed,
+                                 "repeat": args.repeat},
+                  "results": results}
+        with open(args.output, "w") as output_file:
+            json.dump(report, output_file, indent=2, default=lambda value: None)
+        print(f"Wrote {len(results)} results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
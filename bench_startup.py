@@ -0,0 +1,87 @@
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+
+# (label, code) of each entry point; scripts are run with runpy so their __main__ blocks stay off.
+# The first entry measures bare interpreter startup, whose imports are left out of the other listings.
+ENTRY_POINTS = [
+    ("interpreter", "pass"),
+    ("optimizer", "import marine_optimizer"),
+    ("gui", "import runpy; runpy.run_path('main .py')"),
+    ("api server", "import runpy; runpy.run_path('Weather forecast/appgg.py')"),
+    ("chatbot", "import chatbot"),
+    ("sms alerts", "import twillo"),
+    ("capsize risk", "import capsize_risk"),
+    ("tile export", "import tile_export"),
+]
+
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def measure(code, cwd):
+    """(total_us, {module: (cumulative_us, depth)}, error) of one interpreter run with -X importtime"""
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=cwd,
+                             capture_output=True, text=True)
+    modules = {}
+    total = 0
+    for match in IMPORT_LINE.finditer(process.stderr):
+        self_us, cumulative_us, indent, name = int(match[1]), int(match[2]), match[3], match[4]
+        total += self_us
+        modules[name] = (cumulative_us, (len(indent) - 1) // 2)
+    error = None
+    if process.returncode != 0:
+        error = process.stderr.strip().splitlines()[-1]
+    return total, modules, error
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure python -X importtime cost of each entry point")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per entry point, the fastest is kept")
+    parser.add_argument("--top", type=int, default=5, help="slowest direct imports listed per entry point")
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--baseline", help="JSON from an earlier --output run to compare against")
+    parser.add_argument("--max-ms", type=float, help="exit with status 1 when an entry point imports slower")
+    args = parser.parse_args()
+
+    root = os.path.dirname(os.path.abspath(__file__))
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = {entry["label"]: entry for entry in json.load(baseline_file)}
+
+    results = []
+    startup_modules = None
+    print(f"{'entry point':<14} {'import ms':>10} {'vs base':>9}  slowest direct imports")
+    for label, code in ENTRY_POINTS:
+        runs = [measure(code, root) for _ in range(args.repeat)]
+        total, modules, error = min(runs, key=lambda run: run[0])
+        if startup_modules is None:
+            startup_modules = set(modules)
+        slowest = sorted(((cumulative, name) for name, (cumulative, depth) in modules.items()
+                          if depth == 0 and (name not in startup_modules or label == ENTRY_POINTS[0][0])),
+                         reverse=True)[:args.top]
+        result = {"label": label, "code": code, "import_ms": total / 1000, "error": error,
+                  "slowest": [{"module": name, "ms": cumulative / 1000} for cumulative, name in slowest]}
+        results.append(result)
+
+        delta = ""
+        if label in baseline:
+            delta = f"{result['import_ms'] - baseline[label]['import_ms']:+.1f}"
+        details = error or ", ".join(f"{entry['module']} {entry['ms']:.1f}" for entry in result["slowest"])
+        print(f"{label:<14} {result['import_ms']:>10.1f} {delta:>9}  {details}")
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+    if args.max_ms is not None:
+        slow = [result["label"] for result in results if result["import_ms"] > args.max_ms]
+        if slow:
+            print(f"Slower than {args.max_ms} ms: {', '.join(slow)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
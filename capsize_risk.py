@@ -0,0 +1,185 @@
+import argparse
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Dict
+
+import numpy as np
+
+# Records fit_coefficients calibrates against, and the default input
+FISHERY_POINTS_PATH = "Fishery/public/edited3.json"
+
+# Wind stress tau = AIR_DENSITY * DRAG_COEFFICIENT * ws^2 (Pa, with ws in m/s). The drag
+# coefficient is the least-squares fit to the tau values of FISHERY_POINTS_PATH, which
+# it reproduces within 0.21 Pa (those values grow more slowly than ws^2).
+AIR_DENSITY = 1.225
+DRAG_COEFFICIENT = 4.57e-3
+
+# Boat classes of the Fishery dataset, keyed by the label used in its "boat" field
+BOAT_LENGTHS = {"9m": 9.0, "10m": 10.0, "11m": 11.0, "12m": 12.0}
+
+# Logistic model of the "cap" percentage: logit(p) = RISK_INTERCEPT
+# + WAVE_WEIGHT * wave height / hull length + WIND_WEIGHT * ws. Fitted by fit_coefficients
+# to FISHERY_POINTS_PATH, whose cap values it reproduces within 9 percentage points.
+RISK_INTERCEPT = -0.721
+WAVE_WEIGHT = 2.548
+WIND_WEIGHT = 0.0695
+
+# Lookup table resolution and range: wind 0-40 m/s, wave height 0-15 m
+WIND_STEP = 0.05
+WAVE_STEP = 0.01
+MAX_WIND = 40.0
+MAX_WAVE = 15.0
+
+
+def wind_stress(ws):
+    """Wind stress in Pa of wind speeds in m/s"""
+    ws = np.asarray(ws, dtype=np.float64)
+    return AIR_DENSITY * DRAG_COEFFICIENT * ws * ws
+
+
+def capsize_probability(ws, wave_height, boat_length):
+    """Exact model probability for broadcastable arrays of wind (m/s), wave height (m) and boat length (m)"""
+    ws, wave_height = np.asarray(ws, dtype=np.float64), np.asarray(wave_height, dtype=np.float64)
+    score = RISK_INTERCEPT + WAVE_WEIGHT * wave_height / boat_length + WIND_WEIGHT * ws
+    return 1 / (1 + np.exp(-score))
+
+
+def fit_coefficients(path=FISHERY_POINTS_PATH, boat_lengths=None):
+    """(drag coefficient, risk intercept, wave weight, wind weight) fitted to the tau and cap of a Fishery file"""
+    boat_lengths = boat_lengths or BOAT_LENGTHS
+    with open(path) as json_file:
+        records = json.load(json_file)
+    ws = np.array([record["ws"] for record in records], dtype=np.float64)
+    tau = np.array([record["tau"] for record in records], dtype=np.float64)
+    relative_wave = np.array([record["wave_height"] / boat_lengths[record.get("boat", "9m")] for record in records])
+    cap = np.clip([float(record["cap"].rstrip("%")) / 100 for record in records], 0.01, 0.99)
+    drag = (tau * ws ** 2).sum() / (ws ** 4).sum() / AIR_DENSITY
+    features = np.column_stack([np.ones_like(ws), relative_wave, ws])
+    intercept, wave_weight, wind_weight = np.linalg.lstsq(features, np.log(cap / (1 - cap)), rcond=None)[0]
+    return float(drag), float(intercept), float(wave_weight), float(wind_weight)
+
+
+@dataclass
+class RiskTable:
+    """Capsize probability of one boat class tabulated over (wind, wave height) bins"""
+    boat: str
+    length: float
+    probabilities: np.ndarray  # float32, shape (wind bins, wave bins)
+
+    @classmethod
+    def build(cls, boat, length) -> "RiskTable":
+        ws = np.arange(0, MAX_WIND + WIND_STEP / 2, WIND_STEP)
+        waves = np.arange(0, MAX_WAVE + WAVE_STEP / 2, WAVE_STEP)
+        probabilities = capsize_probability(ws[:, None], waves[None, :], length).astype(np.float32)
+        return cls(boat, length, probabilities)
+
+    def lookup(self, ws, wave_height) -> np.ndarray:
+        """Probability of the nearest table bin for arrays of conditions; values past the range are clamped"""
+        rows = np.clip(np.rint(np.asarray(ws) / WIND_STEP), 0, self.probabilities.shape[0] - 1).astype(np.intp)
+        cols = np.clip(np.rint(np.asarray(wave_height) / WAVE_STEP), 0, self.probabilities.shape[1] - 1).astype(np.intp)
+        return self.probabilities[rows, cols]
+
+
+class CapsizeRiskModel:
+    """Scores points for every boat class from lookup tables built once on first use"""
+
+    def __init__(self, boat_lengths: Dict[str, float] = None):
+        self.boat_lengths = dict(boat_lengths or BOAT_LENGTHS)
+        self._tables: Dict[str, RiskTable] = {}
+
+    def table(self, boat) -> RiskTable:
+        if boat not in self._tables:
+            self._tables[boat] = RiskTable.build(boat, self.boat_lengths[boat])
+        return self._tables[boat]
+
+    def score(self, ws, wave_height, boats):
+        """Probabilities for arrays of conditions, with boats a single class label or an array of labels"""
+        ws, wave_height = np.asarray(ws, dtype=np.float64), np.asarray(wave_height, dtype=np.float64)
+        if isinstance(boats, str):
+            return self.table(boats).lookup(ws, wave_height)
+        boats = np.asarray(boats)
+        probabilities = np.empty(ws.shape, dtype=np.float32)
+        for boat in np.unique(boats):
+            mask = boats == boat
+            probabilities[mask] = self.table(str(boat)).lookup(ws[mask], wave_height[mask])
+        return probabilities
+
+    def score_points(self, lats, lons, ws, wave_height, boats, capsize=None) -> Dict[str, np.ndarray]:
+        """Columns of the Fishery point schema for arrays of points.
+
+        capsize is the recorded capsize flag of each point, which the model does
+        not predict (the bundled records are 0 at 68-84% risk); it is passed
+        through, or 0 for points without one.
+        """
+        probabilities = self.score(ws, wave_height, boats)
+        return {
+            "latitude": np.asarray(lats, dtype=np.float64),
+            "longitude": np.asarray(lons, dtype=np.float64),
+            "tau": wind_stress(ws),
+            "ws": np.asarray(ws, dtype=np.float64),
+            "wave_height": np.asarray(wave_height, dtype=np.float64),
+            "capsize": np.zeros(np.shape(probabilities), dtype=np.int8) if capsize is None
+            else np.asarray(capsize, dtype=np.int8),
+            "probability": probabilities,
+            "boat": np.broadcast_to(np.asarray(boats), np.shape(probabilities)),
+        }
+
+
+def write_points_json(path, columns):
+    """Write scored columns as the JSON array the DeckGL overlay loads (edited3.json schema)"""
+    percents = np.rint(columns["probability"] * 100).astype(np.int64)
+    records = zip(columns["latitude"].tolist(), columns["longitude"].tolist(), columns["tau"].tolist(),
+                  columns["ws"].tolist(), columns["wave_height"].tolist(), columns["capsize"].tolist(),
+                  percents.tolist(), columns["boat"].tolist())
+    with open(path, "w") as json_file:
+        json_file.write("[\n")
+        json_file.write(",\n".join(
+            f'{{"latitude": {lat}, "longitude": {lon}, "tau": {tau:.6f}, "ws": {ws}, "wave_height": {wave}, '
+            f'"capsize": {capsize}, "cap": "{percent}%", "boat": "{boat}"}}'
+            for lat, lon, tau, ws, wave, capsize, percent, boat in records))
+        json_file.write("\n]\n")
+
+
+def load_points(path):
+    """Point columns from a Fishery JSON file, or an .npz of latitude, longitude, ws, wave_height, boat[, capsize]"""
+    if path.endswith(".npz"):
+        with np.load(path) as data:
+            columns = {name: data[name] for name in ("latitude", "longitude", "ws", "wave_height", "boat")}
+            columns["capsize"] = data["capsize"] if "capsize" in data else None
+            return columns
+    with open(path) as json_file:
+        records = json.load(json_file)
+    return {
+        "latitude": np.array([record["latitude"] for record in records], dtype=np.float64),
+        "longitude": np.array([record["longitude"] for record in records], dtype=np.float64),
+        "ws": np.array([record["ws"] for record in records], dtype=np.float64),
+        "wave_height": np.array([record["wave_height"] for record in records], dtype=np.float64),
+        "boat": np.array([record.get("boat", "9m") for record in records]),
+        "capsize": np.array([record.get("capsize", 0) for record in records], dtype=np.int8),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score capsize risk for Fishery points and write the overlay JSON")
+    parser.add_argument("--input", default=FISHERY_POINTS_PATH, help="Fishery JSON or .npz of point columns")
+    parser.add_argument("--output", required=True, help="JSON to write, which may not be the input")
+    parser.add_argument("--boat", help="score every point for this boat class instead of each point's own")
+    args = parser.parse_args()
+    if os.path.exists(args.output) and os.path.samefile(args.input, args.output):
+        parser.error("--output would overwrite --input")
+
+    started = time.perf_counter()
+    points = load_points(args.input)
+    model = CapsizeRiskModel()
+    columns = model.score_points(points["latitude"], points["longitude"], points["ws"], points["wave_height"],
+                                 args.boat or points["boat"], points["capsize"])
+    write_points_json(args.output, columns)
+    logging.info(f"Scored {len(columns['ws'])} points into {args.output}")
+    print(f"Scored {len(columns['ws'])} points in {time.perf_counter() - started:.2f} s -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,17 +2,32 @@ import requests
 from datetime import datetime
 from dataclasses import dataclass
 from typing import Optional, Dict, List
+from bisect import bisect_right
 import heapq
 import numpy as np
-import folium
-from groq import Groq
 import logging
-import arrow  # Make sure to install arrow if you haven't already
+from weather_field import WeatherField
+from beaufort import UNKNOWN_FORCE, classify_beaufort
+from forecast_tensor import ForecastTensor
+from geodesy import great_circle_nm
 
 # Replace these with your actual API keys
 WEATHER_API_KEY = "xxxxxxxxxxx"  # This can be removed if not used
 GROQ_API_KEY = "xxxxxxxxxxxxxxx"
 
+# Seconds a weather observation stays cached
+WEATHER_CACHE_TTL = 600
+
+# Route search grid spacing in degrees, and the A* expansion budget before giving up
+GRID_RESOLUTION = 0.1
+MAX_EXPANSIONS = 200000
+
+# Highest latitude the route search grid reaches, north or south
+MAX_ROUTE_LATITUDE = 85.0
+
+# (row, col) offsets of the 8 neighbors of a grid cell
+GRID_OFFSETS = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+
 # Configure logging
 logging.basicConfig(filename='marine_optimization.log', level=logging.INFO)
 
@@ -26,6 +41,7 @@ class WeatherData:
     humidity: int
     pressure: float
     visibility: float
+    timestamp: Optional[datetime] = None  # Time the forecast entry applies to
 
 @dataclass
 class Ship:
@@ -35,13 +51,27 @@ class Ship:
     safety_rating: float
 
 class MarineWeatherAnalyzer:
-    def _init_(self):
+    def __init__(self):
         """Initialize the analyzer with API clients"""
         self.weather_api_key = WEATHER_API_KEY
-        self.groq_client = Groq(api_key=GROQ_API_KEY)
+        self._groq_client = None
+        self.weather_field = WeatherField(ttl=WEATHER_CACHE_TTL)
+
+    @property
+    def groq_client(self):
+        """Groq client created on first use; groq is only imported then"""
+        if self._groq_client is None:
+            from groq import Groq
+            self._groq_client = Groq(api_key=GROQ_API_KEY)
+        return self._groq_client
 
     def fetch_weather_data(self, lat: float, lng: float) -> Optional[WeatherData]:
         """Fetch and parse marine weather data based on location using Storm Glass API"""
+        cached = self.weather_field.lookup(lat, lng)
+        if cached is not None:
+            return cached
+
+        import arrow  # Only imported for Storm Glass requests
         start = arrow.now().floor('day')
         end = arrow.now().ceil('day')
 
@@ -64,7 +94,7 @@ class MarineWeatherAnalyzer:
             # Extract relevant data from the response
             if json_data and 'hours' in json_data:
                 latest_data = json_data['hours'][0]  # Get the first hour of data
-                return WeatherData(
+                weather_data = WeatherData(
                     location=f"Coordinates: {lat}, {lng}",
                     temperature=latest_data.get('airTemperature', {}).get('noaa', None),
                     feels_like=None,  # You can calculate this if needed
@@ -74,6 +104,8 @@ class MarineWeatherAnalyzer:
                     pressure=None,  # Add if available
                     visibility=latest_data.get('visibility', {}).get('noaa', None)
                 )
+                self.weather_field.put(lat, lng, weather_data)
+                return weather_data
             else:
                 logging.error("No weather data found.")
                 return None
@@ -102,48 +134,30 @@ class MarineWeatherAnalyzer:
                     humidity=entry['main']['humidity'],
                     pressure=entry['main']['pressure'],
                     visibility=entry.get('visibility', 0) / 1000,
+                    timestamp=datetime.fromtimestamp(entry['dt']),
                 ))
             return forecast
         except requests.RequestException as e:
             logging.error(f"Error fetching weather forecast: {e}")
             return []
 
-    def calculate_beaufort_scale(self, wind_speed: float) -> Dict[str, any]:
-        """Calculate Beaufort scale force and description"""
+    def calculate_beaufort_scale(self, wind_speed) -> Dict[str, any]:
+        """Calculate Beaufort scale force and description.
+
+        A scalar wind speed (m/s) gives plain values, with force and knots None when it is NaN;
+        an array gives arrays of the same shape.
+        """
         try:
-            wind_knots = wind_speed * 1.944  # Convert m/s to knots
-            
-            beaufort_scale = [
-                (0, 1, "Calm", "Sea like a mirror"),
-                (1, 3, "Light air", "Ripples with appearance of scales"),
-                (4, 6, "Light breeze", "Small wavelets"),
-                (7, 10, "Gentle breeze", "Large wavelets"),
-                (11, 16, "Moderate breeze", "Small waves with breaking crests"),
-                (17, 21, "Fresh breeze", "Moderate waves with whitecaps"),
-                (22, 27, "Strong breeze", "Larger waves with extensive whitecaps"),
-                (28, 33, "Near gale", "Sea heaps up, foam begins to streak"),
-                (34, 40, "Gale", "Moderately high waves with breaking crests"),
-                (41, 47, "Strong gale", "High waves with dense foam"),
-                (48, 55, "Storm", "Very high waves with overhanging crests"),
-                (56, 63, "Violent storm", "Exceptionally high waves"),
-                (64, float('inf'), "Hurricane", "Air filled with foam and spray")
-            ]
-            
-            for force, (min_speed, max_speed, condition, sea_state) in enumerate(beaufort_scale):
-                if min_speed <= wind_knots <= max_speed:
-                    return {
-                        "force": force,
-                        "condition": condition,
-                        "sea_state": sea_state,
-                        "wind_knots": round(wind_knots, 1)
-                    }
-            
-            return {
-                "force": 12,
-                "condition": "Hurricane",
-                "sea_state": "Air filled with foam and spray",
-                "wind_knots": round(wind_knots, 1)
-            }
+            scale = classify_beaufort(wind_speed)
+            if np.ndim(wind_speed) == 0:
+                known = scale["force"] != UNKNOWN_FORCE
+                return {
+                    "force": int(scale["force"]) if known else None,
+                    "condition": str(scale["condition"]),
+                    "sea_state": str(scale["sea_state"]),
+                    "wind_knots": float(scale["wind_knots"]) if known else None
+                }
+            return scale
         except Exception as e:
             logging.error(f"Error calculating Beaufort scale: {e}")
             return {
@@ -178,55 +192,116 @@ class MarineWeatherAnalyzer:
         """Handle queries that the chatbot cannot process."""
         return self.generate_llm_response(f"I'm not sure how to answer this: {user_query}. Can you rephrase or provide more details?")
 
-    def optimize_route(self, start: tuple, end: tuple, ship: Ship, weather_data: WeatherData) -> List[tuple]:
-        """Optimize the route based on weather conditions and ship characteristics"""
-        def heuristic(a, b):
-            return np.sqrt((a[0] - b[0])*2 + (a[1] - b[1])*2)
+    def optimize_route(self, start: tuple, end: tuple, ship: Ship, weather_data: WeatherData,
+                       forecast: Optional[List[WeatherData]] = None, resolution=GRID_RESOLUTION,
+                       max_expansions=MAX_EXPANSIONS) -> List[tuple]:
+        """Optimize the route based on weather conditions and ship characteristics.
 
-        def cost_function(current, neighbor, weather_data, ship):
-            # Calculate cost based on distance, weather, and ship characteristics
-            distance = heuristic(current, neighbor)
-            wind_speed = weather_data.wind_speed
+        A* over an 8-connected grid of integer (row, col) cells ``resolution``
+        degrees apart. Both endpoints are snapped to their nearest cell and the
+        returned (lat, lon) path starts and ends at the exact coordinates. With a
+        forecast (see fetch_weather_forecast) each leg uses the wind expected at
+        the time the ship starts it. Columns wrap around the antimeridian and rows
+        stop at MAX_ROUTE_LATITUDE. Returns [] if the goal is not reached within
+        max_expansions node expansions.
+        """
+        columns = round(360 / resolution)  # Columns around the globe; col and col + columns are one cell
+        max_row = int(MAX_ROUTE_LATITUDE / resolution)
+
+        def wrap(col):
+            return (col + columns // 2) % columns - columns // 2
+
+        def cell_of(point):
+            return (max(-max_row, min(max_row, round(point[0] / resolution))), wrap(round(point[1] / resolution)))
+
+        def coords(cell):
+            return (cell[0] * resolution, cell[1] * resolution)
+
+        def safety_cost(wind_speed):
             wave_height = wind_speed * 0.1  # Simplified wave height estimation
+            return (wind_speed / 20) + (wave_height / 2)  # Higher cost for worse conditions
+
+        # Safety cost per forecast slice, looked up by hours since departure
+        if forecast:
+            wind_forecast = ForecastTensor.from_forecast(forecast, value=lambda entry: entry.wind_speed)
+            safety_costs = [safety_cost(float(wind)) for wind in wind_forecast.values]
+            slice_starts = wind_forecast.start_hours.tolist()
+        else:
+            safety_costs = [safety_cost(weather_data.wind_speed)]
+            slice_starts = [0.0]
+
+        def cost_function(distance, hours):
+            # Calculate cost based on distance, weather, and ship characteristics
             fuel_cost = distance * ship.fuel_consumption
-            safety_cost = (wind_speed / 20) + (wave_height / 2)  # Higher cost for worse conditions
             time_cost = distance / ship.max_speed
-            return fuel_cost + safety_cost + time_cost
+            return fuel_cost + safety_costs[max(bisect_right(slice_starts, hours) - 1, 0)] + time_cost
 
-        open_set = []
-        heapq.heappush(open_set, (0, start))
+        # Every leg costs at least per_nm per nautical mile of great-circle distance plus the
+        # cheapest safety cost, and no leg is longer than max_leg, so this heuristic never
+        # overestimates and stays consistent along any edge
+        goal = cell_of(end)
+        goal_lat, goal_lon = coords(goal)
+        max_leg = great_circle_nm(0, 0, resolution, resolution)
+        per_nm = ship.fuel_consumption + 1 / ship.max_speed + min(safety_costs) / max_leg
+
+        def heuristic(cell):
+            lat, lon = coords(cell)
+            return per_nm * great_circle_nm(lat, lon, goal_lat, goal_lon)
+
+        leg_lengths = {}  # row -> distance of each neighbor offset, which only varies with latitude
+
+        def legs(row):
+            if row not in leg_lengths:
+                lat = row * resolution
+                leg_lengths[row] = [great_circle_nm(lat, 0, lat + d_row * resolution, d_col * resolution)
+                                    for d_row, d_col in GRID_OFFSETS]
+            return leg_lengths[row]
+
+        origin = cell_of(start)
+        g_score = {origin: 0.0}
+        elapsed = {origin: 0.0}  # Sailing hours from start to each cell along its best path
         came_from = {}
-        g_score = {start: 0}
-        f_score = {start: heuristic(start, end)}
+        closed = set()
+        open_set = [(heuristic(origin), origin)]
+        expansions = 0
 
         while open_set:
-            current = heapq.heappop(open_set)[1]
-
-            if current == end:
-                path = []
+            _, current = heapq.heappop(open_set)
+            if current in closed:
+                continue  # Stale entry left behind by a later, cheaper push
+            if current == goal:
+                path = [end]
                 while current in came_from:
-                    path.append(current)
                     current = came_from[current]
-                path.append(start)
-                return path[::-1]
+                    path.append(coords(current))
+                path[-1] = start
+                return path[::-1] if origin != goal else [start, end]
 
-            for neighbor in self.get_neighbors(current):
-                tentative_g_score = g_score[current] + cost_function(current, neighbor, weather_data, ship)
+            closed.add(current)
+            expansions += 1
+            if expansions > max_expansions:
+                logging.warning(f"A* gave up after {max_expansions} expansions between {start} and {end}")
+                return []
 
-                if neighbor not in g_score or tentative_g_score < g_score[neighbor]:
+            row, col = current
+            for (d_row, d_col), distance in zip(GRID_OFFSETS, legs(row)):
+                if abs(row + d_row) > max_row:
+                    continue
+                neighbor = (row + d_row, wrap(col + d_col))
+                if neighbor in closed:
+                    continue
+                tentative_g_score = g_score[current] + cost_function(distance, elapsed[current])
+                if tentative_g_score < g_score.get(neighbor, float('inf')):
                     came_from[neighbor] = current
                     g_score[neighbor] = tentative_g_score
-                    f_score[neighbor] = tentative_g_score + heuristic(neighbor, end)
-                    heapq.heappush(open_set, (f_score[neighbor], neighbor))
+                    elapsed[neighbor] = elapsed[current] + distance / ship.max_speed
+                    heapq.heappush(open_set, (tentative_g_score + heuristic(neighbor), neighbor))
 
         return []
 
-    def get_neighbors(self, point: tuple) -> List[tuple]:
-        """Get neighboring points for route optimization"""
-        neighbors = []
-        for dx, dy in [(-0.1, 0), (0.1, 0), (0, -0.1), (0, 0.1)]:
-            neighbors.append((point[0] + dx, point[1] + dy))
-        return neighbors
+    def get_neighbors(self, cell: tuple) -> List[tuple]:
+        """Get the 8 neighboring (row, col) grid cells used for route optimization"""
+        return [(cell[0] + d_row, cell[1] + d_col) for d_row, d_col in GRID_OFFSETS]
 
     def visualize_route(self, route: List[tuple]):
         """Visualize the optimized route on a map"""
@@ -234,6 +309,8 @@ class MarineWeatherAnalyzer:
             print("No route to visualize.")
             return
 
+        import folium  # Imported on first use, it is slow to import and only needed for maps
+
         # Create a map centered at the start point
         map_center = route[0]
         m = folium.Map(location=map_center, zoom_start=10)
@@ -0,0 +1,164 @@
+import json
+import logging
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from geodesy import KM_PER_NM, haversine_nm
+
+DISASTER_PATH = "Fishery/data/disaster.json"
+
+# Grid index cell size in degrees; a query only scans the cells its search box overlaps
+INDEX_CELL_SIZE = 0.5
+
+# Hazard layer defaults: disasters within HAZARD_RADIUS_KM of an edge add HAZARD_WEIGHT per level to its cost factor
+HAZARD_RADIUS_KM = 50.0
+HAZARD_WEIGHT = 0.05
+
+KM_PER_DEGREE = 111.195
+# Column offset keeping grid keys positive and row stride separating rows
+_COL_OFFSET = 1 << 20
+_ROW_STRIDE = 1 << 21
+
+
+class DisasterStore:
+    """Typed columnar store of disaster records with a uniform grid index.
+
+    Records are sorted by grid cell key, so the records of a run of adjacent
+    cells in one grid row form one contiguous slice found by two bisections.
+    Disaster types are stored as integer codes into ``types``; a missing year
+    is -1.
+    """
+
+    def __init__(self, ids, years, types, levels, lats, lons, cell_size=INDEX_CELL_SIZE):
+        self.cell_size = cell_size
+        self.types, type_codes = np.unique(np.asarray(types, dtype=str), return_inverse=True)
+        rows, cols = self._cells(np.asarray(lats, dtype=np.float64), np.asarray(lons, dtype=np.float64))
+        keys = rows * _ROW_STRIDE + cols
+        order = np.argsort(keys, kind="stable")
+        self._keys = keys[order]
+        self.ids = np.asarray(ids, dtype=str)[order]
+        self.years = np.asarray(years, dtype=np.int16)[order]
+        self.type_codes = type_codes.astype(np.int8)[order]
+        self.levels = np.asarray(levels, dtype=np.int8)[order]
+        self.lats = np.asarray(lats, dtype=np.float64)[order]
+        self.lons = np.asarray(lons, dtype=np.float64)[order]
+
+    @classmethod
+    def load(cls, path=DISASTER_PATH, cell_size=INDEX_CELL_SIZE) -> "DisasterStore":
+        """Load a JSON array of string-typed records, skipping records without coordinates"""
+        with open(path) as json_file:
+            records = json.load(json_file)
+        records = [record for record in records if record.get("latitude") and record.get("longitude")]
+        logging.info(f"Loaded {len(records)} disaster records from {path}")
+        return cls([record.get("id", "") for record in records],
+                   [int(record["year"]) if str(record.get("year", "")).isdigit() else -1 for record in records],
+                   [record.get("disastertype", "unknown") for record in records],
+                   [int(record["level"]) if str(record.get("level", "")).isdigit() else 0 for record in records],
+                   [float(record["latitude"]) for record in records],
+                   [float(record["longitude"]) for record in records], cell_size)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def within(self, lat, lon, radius_km, types: Optional[Iterable[str]] = None,
+               years: Optional[Tuple[int, int]] = None) -> np.ndarray:
+        """Indices of disasters within radius_km of a point, nearest first, filtered by type and (first, last) year"""
+        candidates = self._filter(self._candidates(lat, lat, lon, lon, radius_km), types, years)
+        distances = haversine_nm(self.lats[candidates], self.lons[candidates], lat, lon) * KM_PER_NM
+        inside = distances <= radius_km
+        return candidates[inside][np.argsort(distances[inside], kind="stable")]
+
+    def near_route(self, waypoints, radius_km, types: Optional[Iterable[str]] = None,
+                   years: Optional[Tuple[int, int]] = None) -> np.ndarray:
+        """Indices of disasters within radius_km of a (lat, lon) polyline, in index order"""
+        points = np.asarray(waypoints, dtype=np.float64).reshape(-1, 2)
+        if len(points) == 1:
+            return np.sort(self.within(points[0, 0], points[0, 1], radius_km, types, years))
+        starts, ends = points[:-1], points[1:]
+        candidates = np.unique(np.concatenate([
+            self._candidates(min(a[0], b[0]), max(a[0], b[0]), min(a[1], b[1]), max(a[1], b[1]), radius_km)
+            for a, b in zip(starts, ends)]))
+        candidates = self._filter(candidates, types, years)
+        if candidates.size == 0:
+            return candidates
+        distances = segment_distances_km(self.lats[candidates], self.lons[candidates], starts, ends)
+        return candidates[distances.min(axis=1) <= radius_km]
+
+    def records(self, indices) -> List[dict]:
+        """Plain dicts of the given records, with numeric fields typed"""
+        return [{"id": str(self.ids[i]), "year": int(self.years[i]), "disastertype": str(self.types[self.type_codes[i]]),
+                 "level": int(self.levels[i]), "latitude": float(self.lats[i]), "longitude": float(self.lons[i])}
+                for i in indices]
+
+    def hazard_factors(self, lats, lons, radius_km=HAZARD_RADIUS_KM, weight=HAZARD_WEIGHT,
+                       types: Optional[Iterable[str]] = None, years: Optional[Tuple[int, int]] = None) -> np.ndarray:
+        """Cost multiplier 1 + weight * (sum of disaster levels within radius_km) at every point.
+
+        Pass AntColony.edge_midpoints() to get a layer for AntColony.apply_hazard_factors.
+        Points are binned into the grid index cells, and each occupied cell is
+        measured only against the records its grown box overlaps.
+        """
+        lats, lons = np.asarray(lats, dtype=np.float64), np.asarray(lons, dtype=np.float64)
+        factors = np.ones(lats.shape)
+        rows, cols = self._cells(lats.ravel(), lons.ravel())
+        order = np.argsort(rows * _ROW_STRIDE + cols, kind="stable")
+        cells, firsts = np.unique((rows * _ROW_STRIDE + cols)[order], return_index=True)
+        flat = factors.reshape(-1)
+        for cell, first, last in zip(cells.tolist(), firsts.tolist(), firsts[1:].tolist() + [len(order)]):
+            row, col = divmod(cell, _ROW_STRIDE)
+            lat_min, lon_min = row * self.cell_size, (col - _COL_OFFSET) * self.cell_size
+            candidates = self._filter(self._candidates(lat_min, lat_min + self.cell_size, lon_min,
+                                                       lon_min + self.cell_size, radius_km), types, years)
+            if candidates.size == 0:
+                continue
+            points = order[first:last]
+            distances = haversine_nm(lats.ravel()[points, None], lons.ravel()[points, None],
+                                     self.lats[candidates], self.lons[candidates]) * KM_PER_NM
+            flat[points] += weight * ((distances <= radius_km) @ self.levels[candidates].astype(np.float64))
+        return factors
+
+    def _cells(self, lats, lons):
+        rows = np.floor(np.asarray(lats) / self.cell_size).astype(np.int64)
+        cols = np.floor(np.asarray(lons) / self.cell_size).astype(np.int64) + _COL_OFFSET
+        return rows, cols
+
+    def _candidates(self, lat_min, lat_max, lon_min, lon_max, radius_km) -> np.ndarray:
+        """Indices of every record in the grid cells overlapping a box grown by radius_km"""
+        lat_margin = radius_km / KM_PER_DEGREE
+        widest = min(max(abs(lat_min), abs(lat_max)) + lat_margin, 89.0)
+        lon_margin = lat_margin / np.cos(np.radians(widest))
+        (row_min, row_max), (col_min, col_max) = self._cells(
+            [lat_min - lat_margin, lat_max + lat_margin], [lon_min - lon_margin, lon_max + lon_margin])
+        rows = np.arange(row_min, row_max + 1)
+        starts = np.searchsorted(self._keys, rows * _ROW_STRIDE + col_min)
+        stops = np.searchsorted(self._keys, rows * _ROW_STRIDE + col_max, side="right")
+        return np.concatenate([np.arange(start, stop) for start, stop in zip(starts, stops)] or [np.empty(0, int)])
+
+    def _filter(self, indices, types, years) -> np.ndarray:
+        indices = np.asarray(indices, dtype=np.intp)
+        if types is not None:
+            codes = np.flatnonzero(np.isin(self.types, list(types)))
+            indices = indices[np.isin(self.type_codes[indices], codes)]
+        if years is not None:
+            year = self.years[indices]
+            indices = indices[(year >= years[0]) & (year <= years[1])]
+        return indices
+
+
+def segment_distances_km(lats, lons, starts, ends) -> np.ndarray:
+    """(points, segments) distance in km from each point to each great-circle-short segment.
+
+    Uses a local equirectangular projection per segment, which is accurate to a
+    fraction of a percent at the tens-of-kilometer radii used for hazard queries.
+    """
+    lats, lons = np.asarray(lats, dtype=np.float64)[:, None], np.asarray(lons, dtype=np.float64)[:, None]
+    scale = np.cos(np.radians((starts[:, 0] + ends[:, 0]) / 2))[None, :]
+    ax, ay = starts[None, :, 1] * scale, starts[None, :, 0]
+    bx, by = ends[None, :, 1] * scale, ends[None, :, 0]
+    px, py = lons * scale, lats
+    dx, dy = bx - ax, by - ay
+    length2 = dx * dx + dy * dy
+    with np.errstate(invalid="ignore", divide="ignore"):
+        t = np.clip(np.where(length2 > 0, ((px - ax) * dx + (py - ay) * dy) / length2, 0), 0, 1)
+    return np.hypot(px - (ax + t * dx), py - (ay + t * dy)) * KM_PER_DEGREE
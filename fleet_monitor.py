@@ -0,0 +1,156 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Alert thresholds: wind above 20 knots, visibility below 2 km, temperature outside 0-35°C
+HIGH_WIND_SPEED = 10.3  # m/s
+LOW_VISIBILITY = 2.0  # km
+HIGH_TEMPERATURE = 35.0
+LOW_TEMPERATURE = 0.0
+
+# Conditions reported by check_conditions, in message order
+CONDITIONS = ["high_wind", "low_visibility", "high_temperature", "low_temperature"]
+
+# Seconds between fleet polls and grid cell size in degrees used to share one fetch between nearby vessels
+POLL_INTERVAL = 300
+POLL_CELL_SIZE = 0.25
+
+
+@dataclass
+class Alert:
+    vessel_id: str
+    condition: str  # One of CONDITIONS
+    value: float
+    message: str
+    lat: float
+    lon: float
+
+
+def parse_conditions(data) -> Tuple[float, float, float]:
+    """(wind m/s, visibility km, temperature °C) of an OpenWeatherMap current-weather response"""
+    return (data.get('wind', {}).get('speed', 0), data.get('visibility', 10000) / 1000,
+            data.get('main', {}).get('temp', 0))
+
+
+def check_conditions(wind_speed, visibility, temperature) -> Dict[str, np.ndarray]:
+    """Boolean array per condition over arrays of observations; NaN (no data) never alerts"""
+    wind_speed, visibility, temperature = (np.asarray(value, dtype=np.float64)
+                                           for value in (wind_speed, visibility, temperature))
+    return {
+        "high_wind": wind_speed > HIGH_WIND_SPEED,
+        "low_visibility": visibility < LOW_VISIBILITY,
+        "high_temperature": temperature > HIGH_TEMPERATURE,
+        "low_temperature": temperature < LOW_TEMPERATURE,
+    }
+
+
+def alert_message(condition, value) -> str:
+    if condition == "high_wind":
+        return f"HIGH WIND ALERT: Wind speed is {value} m/s ({value * 1.944:.1f} knots)"
+    if condition == "low_visibility":
+        return f"LOW VISIBILITY ALERT: Visibility is {value} km"
+    if condition == "high_temperature":
+        return f"HIGH TEMPERATURE ALERT: Temperature is {value}°C"
+    return f"LOW TEMPERATURE ALERT: Temperature is {value}°C"
+
+
+class LogSink:
+    """Writes every alert to the log"""
+
+    async def emit(self, alerts: List[Alert], observed: List[str]):
+        for alert in alerts:
+            logging.warning(f"{alert.vessel_id} at {alert.lat:.2f}, {alert.lon:.2f}: {alert.message}")
+
+
+class CallbackSink:
+    """Passes each non-empty batch of alerts to a plain or async callback"""
+
+    def __init__(self, callback: Callable):
+        self.callback = callback
+
+    async def emit(self, alerts: List[Alert], observed: List[str]):
+        if not alerts:
+            return
+        result = self.callback(alerts)
+        if asyncio.iscoroutine(result):
+            await result
+
+
+class FleetMonitor:
+    """Polls the weather for every tracked vessel from one asyncio task.
+
+    Each tick snaps vessel positions to ``cell_size`` degree cells and fetches
+    every occupied cell once through ``fetch(points)``, an async callable
+    returning one (wind, visibility, temperature) tuple or None per point, such
+    as AsyncWeatherFetcher.fetch_many with parse=parse_conditions. The alert
+    thresholds are checked for the whole fleet in one vectorized pass. Every
+    round ends with ``await sink.emit(alerts, observed)`` on each sink, where
+    observed lists the vessels that had weather data, so that stateful sinks
+    can tell a cleared condition from a failed fetch.
+    """
+
+    def __init__(self, fetch: Callable, sinks: Sequence, interval=POLL_INTERVAL, cell_size=POLL_CELL_SIZE):
+        self.fetch = fetch
+        self.sinks = list(sinks)
+        self.interval = interval
+        self.cell_size = cell_size
+        self._positions: Dict[str, Tuple[float, float]] = {}
+
+    def track(self, vessel_id, lat, lon):
+        """Add a vessel or update its position"""
+        self._positions[vessel_id] = (lat, lon)
+
+    def untrack(self, vessel_id):
+        self._positions.pop(vessel_id, None)
+
+    @property
+    def num_vessels(self) -> int:
+        return len(self._positions)
+
+    async def poll_once(self) -> List[Alert]:
+        """Fetch, check and emit one round for the whole fleet, returning the alerts"""
+        if not self._positions:
+            return []
+        vessel_ids = list(self._positions)
+        positions = np.array([self._positions[vessel_id] for vessel_id in vessel_ids], dtype=np.float64)
+        cells, vessel_cell = np.unique(np.round(positions / self.cell_size).astype(np.int64), axis=0,
+                                       return_inverse=True)
+        vessel_cell = vessel_cell.reshape(-1)
+        centers = cells * self.cell_size
+
+        records = await self.fetch([(float(lat), float(lon)) for lat, lon in centers])
+        observations = np.array([record if record is not None else (np.nan, np.nan, np.nan) for record in records],
+                                dtype=np.float64).reshape(len(cells), 3)
+        wind_speed, visibility, temperature = observations[vessel_cell].T
+        flags = check_conditions(wind_speed, visibility, temperature)
+        values = {"high_wind": wind_speed, "low_visibility": visibility,
+                  "high_temperature": temperature, "low_temperature": temperature}
+
+        alerts = []
+        for condition in CONDITIONS:
+            for vessel in np.flatnonzero(flags[condition]):
+                value = float(values[condition][vessel])
+                alerts.append(Alert(vessel_ids[vessel], condition, value, alert_message(condition, value),
+                                    float(positions[vessel, 0]), float(positions[vessel, 1])))
+        observed = [vessel_ids[vessel] for vessel in np.flatnonzero(~np.isnan(wind_speed))]
+        logging.info(f"Polled {len(cells)} weather cells for {len(vessel_ids)} vessels, {len(alerts)} alerts")
+        await asyncio.gather(*(sink.emit(alerts, observed) for sink in self.sinks))
+        return alerts
+
+    async def run(self, stop: Optional[asyncio.Event] = None):
+        """Poll every interval seconds until stop is set; errors in one round are logged and retried"""
+        stop = stop or asyncio.Event()
+        while not stop.is_set():
+            started = time.monotonic()
+            try:
+                await self.poll_once()
+            except Exception as e:
+                logging.error(f"Error in fleet weather monitoring: {e}")
+            try:
+                await asyncio.wait_for(stop.wait(), max(self.interval - (time.monotonic() - started), 0))
+            except asyncio.TimeoutError:
+                pass
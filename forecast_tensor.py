@@ -0,0 +1,68 @@
+from datetime import datetime
+from typing import List, Optional
+
+import numpy as np
+
+from aco_engine import weather_factor
+
+# OpenWeatherMap's 5 day forecast is issued in 3 hour steps
+FORECAST_STEP_HOURS = 3.0
+
+
+class ForecastTensor:
+    """Per-slice forecast values for one voyage, by default ACO weather cost factors.
+
+    ``values`` has shape (slices,) when one forecast applies everywhere, or
+    (slices, edges) when it varies per edge. Slice ``k`` is valid from
+    ``start_hours[k]`` hours after departure until the next slice starts
+    (``k * step_hours`` when no start hours are given); times before the first
+    slice use it, as do times past the last one.
+    """
+
+    def __init__(self, values, step_hours=FORECAST_STEP_HOURS, start_hours=None):
+        self.values = np.asarray(values, dtype=np.float64)
+        self.step_hours = step_hours
+        if start_hours is None:
+            start_hours = np.arange(self.values.shape[0]) * step_hours
+        self.start_hours = np.asarray(start_hours, dtype=np.float64)
+
+    @classmethod
+    def from_forecast(cls, forecast: List, departure: Optional[datetime] = None, step_hours=FORECAST_STEP_HOURS,
+                      value=None) -> "ForecastTensor":
+        """Build a spatially uniform tensor from a list of WeatherData, one per forecast step, in time order.
+
+        Each slice starts at its entry's timestamp, in hours after departure
+        (now by default, in the timestamps' time zone); entries without a
+        timestamp are taken to be step_hours apart from departure.
+        value(entry) picks the stored quantity; weather cost factors are used when it is None.
+        """
+        if value is not None:
+            values = [value(entry) for entry in forecast]
+        else:
+            wind_speed = np.array([entry.wind_speed or 0 for entry in forecast], dtype=float)
+            visibility = np.array([np.inf if entry.visibility is None else entry.visibility for entry in forecast])
+            values = weather_factor(wind_speed, visibility)
+        timestamps = [getattr(entry, "timestamp", None) for entry in forecast]
+        if not forecast or None in timestamps:
+            return cls(values, step_hours)
+        departure = departure or datetime.now(timestamps[0].tzinfo)
+        start_hours = [(timestamp - departure).total_seconds() / 3600 for timestamp in timestamps]
+        return cls(values, step_hours, start_hours)
+
+    @property
+    def num_slices(self) -> int:
+        return self.values.shape[0]
+
+    def slice_index(self, elapsed_hours):
+        """Forecast slice valid after elapsed_hours, for scalars or arrays"""
+        index = np.searchsorted(self.start_hours, elapsed_hours, side="right") - 1
+        return np.clip(index, 0, self.num_slices - 1)
+
+    def at(self, elapsed_hours, edges=None):
+        """Values valid after elapsed_hours, for edges on per-edge tensors; arguments broadcast together"""
+        index = self.slice_index(elapsed_hours)
+        if self.values.ndim == 1:
+            if edges is None:
+                return self.values[index]
+            return np.broadcast_to(self.values[index], np.broadcast(index, edges).shape)
+        return self.values[index, edges]
@@ -0,0 +1,186 @@
+import bisect
+import csv
+import logging
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from geocode_cache import normalize_location
+
+# Bundled ports and anchorages: name, country, lat, lon, kind
+PORTS_PATH = "data/ports.csv"
+
+# Normalized names accepted after a comma for each ISO country code in PORTS_PATH,
+# besides the code itself ("Chennai, India" and "Chennai, IN")
+COUNTRY_NAMES = {
+    "AE": ["united arab emirates", "uae"], "AR": ["argentina"], "AU": ["australia"], "BD": ["bangladesh"],
+    "BE": ["belgium"], "BR": ["brazil"], "CA": ["canada"], "CI": ["cote d ivoire", "côte d ivoire", "ivory coast"],
+    "CL": ["chile"], "CN": ["china"], "CO": ["colombia"], "DE": ["germany"], "DJ": ["djibouti"],
+    "EC": ["ecuador"], "EG": ["egypt"], "ES": ["spain"], "FR": ["france"],
+    "GB": ["united kingdom", "uk", "great britain", "england", "scotland", "wales"], "GH": ["ghana"],
+    "GI": ["gibraltar"], "GR": ["greece"], "HK": ["hong kong"], "ID": ["indonesia"], "IN": ["india"],
+    "IR": ["iran"], "IS": ["iceland"], "IT": ["italy"], "JM": ["jamaica"], "JP": ["japan"], "KE": ["kenya"],
+    "KR": ["south korea", "korea"], "KW": ["kuwait"], "LK": ["sri lanka"], "MA": ["morocco"],
+    "MM": ["myanmar", "burma"], "MU": ["mauritius"], "MV": ["maldives"], "MX": ["mexico"], "MY": ["malaysia"],
+    "NG": ["nigeria"], "NL": ["netherlands", "holland"], "NO": ["norway"], "NZ": ["new zealand"], "OM": ["oman"],
+    "PA": ["panama"], "PE": ["peru"], "PH": ["philippines"], "PK": ["pakistan"], "PL": ["poland"],
+    "PT": ["portugal"], "QA": ["qatar"], "RU": ["russia"], "SA": ["saudi arabia"], "SE": ["sweden"],
+    "SG": ["singapore"], "SN": ["senegal"], "TH": ["thailand"], "TR": ["turkey", "turkiye"], "TW": ["taiwan"],
+    "TZ": ["tanzania"], "US": ["united states", "usa", "us", "america"], "UY": ["uruguay"], "VN": ["vietnam"],
+    "YE": ["yemen"], "ZA": ["south africa"],
+}
+
+
+@dataclass
+class Port:
+    name: str
+    country: str
+    lat: float
+    lon: float
+    kind: str  # "port" or "anchorage"
+
+    @property
+    def coords(self) -> Tuple[float, float]:
+        return (self.lat, self.lon)
+
+
+class Gazetteer:
+    """Offline port index with prefix search and typo-tolerant matching.
+
+    Every normalized name is indexed under itself and under each suffix that
+    starts at a word ("port louis" is also found as "louis"). The keys live in
+    one sorted list, so a prefix search is a pair of bisections over it; the
+    place data is kept in parallel NumPy arrays indexed by place id. Fuzzy
+    matching first discards names whose letter counts alone rule them out,
+    in one vectorized pass, and only aligns the survivors.
+    """
+
+    def __init__(self, names, countries, lats, lons, kinds):
+        self.names = list(names)
+        self.countries = np.asarray(countries)
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lons = np.asarray(lons, dtype=np.float64)
+        self.kinds = np.asarray(kinds)
+        self._normalized = [normalize_location(name) for name in self.names]
+        self._lengths = np.array([len(name) for name in self._normalized])
+        self._letters = np.array([letter_counts(name) for name in self._normalized]).reshape(len(self.names), -1)
+        self._exact = {}  # normalized name -> place ids, in file order
+        entries = []
+        for place, name in enumerate(self._normalized):
+            self._exact.setdefault(name, []).append(place)
+            words = name.split()
+            for start in range(len(words)):
+                # Full names sort ahead of word suffixes so that they are returned first
+                entries.append((" ".join(words[start:]), start > 0, place))
+        entries.sort()
+        self._keys = [key for key, _, _ in entries]
+        self._places = np.array([place for _, _, place in entries], dtype=np.int32)
+
+    @classmethod
+    def load(cls, path=PORTS_PATH) -> "Gazetteer":
+        with open(path, newline="", encoding="utf-8") as csv_file:
+            rows = list(csv.DictReader(csv_file))
+        logging.info(f"Loaded {len(rows)} gazetteer entries from {path}")
+        return cls([row["name"] for row in rows], [row.get("country", "") for row in rows],
+                   [float(row["lat"]) for row in rows], [float(row["lon"]) for row in rows],
+                   [row.get("kind", "port") for row in rows])
+
+    def __len__(self):
+        return len(self.names)
+
+    def place(self, place_id) -> Port:
+        return Port(self.names[place_id], str(self.countries[place_id]), float(self.lats[place_id]),
+                    float(self.lons[place_id]), str(self.kinds[place_id]))
+
+    def exact(self, text) -> List[Port]:
+        """Every place named exactly text, in file order"""
+        return [self.place(place_id) for place_id in self._exact.get(normalize_location(text), [])]
+
+    def prefix(self, text, limit=10) -> List[Port]:
+        """Places with a name or name word starting with text, in key order without duplicates"""
+        key = normalize_location(text)
+        if not key:
+            return []
+        lo = bisect.bisect_left(self._keys, key)
+        hi = bisect.bisect_left(self._keys, key + "\uffff", lo)
+        seen = []
+        for place_id in self._places[lo:hi]:
+            if place_id not in seen:
+                seen.append(place_id)
+                if len(seen) == limit:
+                    break
+        return [self.place(place_id) for place_id in seen]
+
+    def fuzzy(self, text, max_distance=2, limit=5) -> List[Tuple[Port, int]]:
+        """Places within max_distance edits (insert, delete, substitute, transpose) of text, closest first"""
+        key = normalize_location(text)
+        # Each edit changes the letter histogram by at most 2, so this never drops a true match
+        bound = np.abs(self._letters - letter_counts(key)).sum(axis=1)
+        candidates = np.flatnonzero((np.abs(self._lengths - len(key)) <= max_distance) & (bound <= 2 * max_distance))
+        matches = []
+        for place_id in candidates:
+            distance = edit_distance(key, self._normalized[place_id], max_distance)
+            if distance <= max_distance:
+                matches.append((distance, int(place_id)))
+        matches.sort()
+        return [(self.place(place_id), distance) for distance, place_id in matches[:limit]]
+
+    def resolve(self, text) -> Optional[Port]:
+        """The one place named exactly text, or None so the caller can geocode it.
+
+        Text after the first comma must name the place's country (see
+        COUNTRY_NAMES); "Lagos, Portugal" and "Alexandria, Virginia" are not
+        resolved to the ports of those names. A name shared by places in
+        several countries needs the country to be resolved.
+        """
+        name, _, qualifier = text.partition(",")
+        ports = self.exact(name)
+        qualifier = normalize_location(qualifier)
+        if qualifier:
+            ports = [port for port in ports
+                     if qualifier == port.country.lower() or qualifier in COUNTRY_NAMES.get(port.country, [])]
+        return ports[0] if len(ports) == 1 else None
+
+    def suggest(self, text, limit=5) -> List[Port]:
+        """Places the user may be typing: prefix matches, else the closest fuzzy matches.
+
+        Short names tolerate a single typo, longer ones two. For suggestions
+        only, never to resolve a location, as a non-port name easily matches a port.
+        """
+        text = text.split(",")[0]
+        ports = self.prefix(text, limit=limit)
+        if ports or not normalize_location(text):
+            return ports
+        max_distance = 1 if len(normalize_location(text)) <= 5 else 2
+        return [port for port, _ in self.fuzzy(text, max_distance=max_distance, limit=limit)]
+
+
+def letter_counts(text):
+    """Histogram of a-z, digits and everything else in a normalized name"""
+    counts = np.zeros(37, dtype=np.int16)
+    for char in text:
+        if "a" <= char <= "z":
+            counts[ord(char) - ord("a")] += 1
+        elif "0" <= char <= "9":
+            counts[26 + ord(char) - ord("0")] += 1
+        else:
+            counts[36] += 1
+    return counts
+
+
+def edit_distance(a, b, max_distance):
+    """Optimal string alignment distance between a and b, or max_distance + 1 once it is exceeded"""
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if previous2 is not None and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > max_distance and min(previous) > max_distance:
+            return max_distance + 1
+        previous2, previous = previous, current
+    return previous[-1]
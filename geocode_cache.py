@@ -0,0 +1,130 @@
+import csv
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+# Seconds a geocoding result stays valid; misses are retried sooner in case the geocoder was at fault
+GEOCODE_TTL = 30 * 24 * 3600
+NEGATIVE_TTL = 24 * 3600
+
+# Returned by lookup() when a location has no fresh entry, since None is a cached "not found"
+MISS = object()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS geocode (
+    key TEXT PRIMARY KEY,
+    lat REAL,
+    lon REAL,
+    expires_at REAL
+);
+CREATE TABLE IF NOT EXISTS preload (
+    path TEXT PRIMARY KEY,
+    digest TEXT
+);
+"""
+
+
+def normalize_location(location: str) -> str:
+    """Cache key of a place name: case-folded, punctuation dropped, whitespace collapsed"""
+    return " ".join(re.sub(r"[^\w\s]", " ", location.casefold()).split())
+
+
+class GeocodeCache:
+    """Persistent SQLite cache of place name -> (lat, lon), with an in-memory front.
+
+    Entries expire after ``ttl`` seconds, cached misses (None) after
+    ``negative_ttl``. Rows loaded by preload_csv never expire. Safe to share
+    between threads.
+    """
+
+    def __init__(self, path, ttl=GEOCODE_TTL, negative_ttl=NEGATIVE_TTL, clock=time.time):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._memory = {}  # key -> (expires_at, coords)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(SCHEMA)
+
+    def lookup(self, location: str):
+        """Return cached (lat, lon), None for a cached miss, or MISS when the geocoder must be asked"""
+        key = normalize_location(location)
+        now = self.clock()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                row = self._db.execute("SELECT lat, lon, expires_at FROM geocode WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    coords = None if row[0] is None else (row[0], row[1])
+                    entry = (float("inf") if row[2] is None else row[2], coords)
+                    self._memory[key] = entry
+            if entry is None or entry[0] <= now:
+                self.misses += 1
+                return MISS
+            self.hits += 1
+            return entry[1]
+
+    def put(self, location: str, coords):
+        """Cache the coordinates of a location, or None to remember that it was not found"""
+        key = normalize_location(location)
+        expires_at = self.clock() + (self.ttl if coords is not None else self.negative_ttl)
+        lat, lon = coords if coords is not None else (None, None)
+        with self._lock, self._db:
+            self._db.execute("INSERT OR REPLACE INTO geocode VALUES (?, ?, ?, ?)", (key, lat, lon, expires_at))
+            self._memory[key] = (expires_at, coords)
+
+    def preload_csv(self, path, name_column="name", lat_column="lat", lon_column="lon", country_column="country"):
+        """Bulk-load permanent entries from a gazetteer CSV, skipped when the file is unchanged.
+
+        Every row is stored under "name country" (so "Chennai, IN" hits), and
+        under its bare name unless another row shares that name. Returns the
+        number of entries loaded.
+        """
+        with open(path, "rb") as csv_file:
+            digest = hashlib.sha1(csv_file.read()).hexdigest()
+        with self._lock:
+            row = self._db.execute("SELECT digest FROM preload WHERE path = ?", (os.path.abspath(path),)).fetchone()
+        if row is not None and row[0] == digest:
+            return 0
+
+        with open(path, newline="", encoding="utf-8") as csv_file:
+            records = list(csv.DictReader(csv_file))
+        names = Counter(normalize_location(record[name_column]) for record in records)
+        rows = []
+        for record in records:
+            name, lat, lon = normalize_location(record[name_column]), float(record[lat_column]), float(record[lon_column])
+            if names[name] == 1:
+                rows.append((name, lat, lon, None))
+            if record.get(country_column):
+                rows.append((normalize_location(f"{name} {record[country_column]}"), lat, lon, None))
+        with self._lock, self._db:
+            self._db.executemany("INSERT OR REPLACE INTO geocode VALUES (?, ?, ?, ?)", rows)
+            self._db.execute("INSERT OR REPLACE INTO preload VALUES (?, ?)", (os.path.abspath(path), digest))
+            self._memory.clear()
+        logging.info(f"Preloaded {len(rows)} geocode entries from {path}")
+        return len(rows)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM geocode").fetchone()[0]
+        return {
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def close(self):
+        with self._lock:
+            self._db.close()
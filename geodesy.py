@@ -0,0 +1,71 @@
+import math
+from dataclasses import dataclass
+
+import numpy as np
+
+EARTH_RADIUS_NM = 3440.065
+KM_PER_NM = 1.852
+
+
+@dataclass
+class VoyageProfile:
+    """Per-waypoint distance, time and fuel along a polyline; index 0 is the departure point"""
+    leg_nm: np.ndarray  # (N-1,) length of each leg
+    cumulative_nm: np.ndarray  # (N,) distance sailed on arrival at each waypoint
+    leg_hours: np.ndarray  # (N-1,) sailing time of each leg
+    eta_hours: np.ndarray  # (N,) hours after departure each waypoint is reached
+    leg_fuel: np.ndarray  # (N-1,) fuel burned on each leg
+    fuel_remaining: np.ndarray  # (N,) fuel left on arrival at each waypoint, floored at 0
+
+    @property
+    def total_nm(self) -> float:
+        return float(self.cumulative_nm[-1])
+
+    @property
+    def total_hours(self) -> float:
+        return float(self.eta_hours[-1])
+
+
+def haversine_nm(lat1, lon1, lat2, lon2):
+    """Great-circle distance in nautical miles, broadcasting over arrays"""
+    lat1, lon1, lat2, lon2 = (np.radians(value) for value in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_NM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def great_circle_nm(lat1, lon1, lat2, lon2):
+    """Scalar haversine_nm using the math module, for tight per-node loops"""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_NM * math.asin(math.sqrt(min(a, 1.0)))
+
+
+def leg_distances_nm(points) -> np.ndarray:
+    """Length of each leg of an (N, 2) lat/lon polyline, shape (N-1,)"""
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    return haversine_nm(points[:-1, 0], points[:-1, 1], points[1:, 0], points[1:, 1])
+
+
+def cumulative_distance_nm(points) -> np.ndarray:
+    """Distance sailed on reaching each point of an (N, 2) polyline, shape (N,) starting at 0"""
+    return np.concatenate([[0.0], np.cumsum(leg_distances_nm(points))])
+
+
+def effective_speed(ship) -> float:
+    """Cruising speed in knots after the ship's fuel-load speed adjustment"""
+    adjustment = 1 + (ship.max_speed * 0.1 * (ship.fuel_consumption / ship.fuel_capacity))
+    return ship.max_speed / adjustment
+
+
+def voyage_profile(points, speed_knots, fuel_per_nm, fuel_capacity) -> VoyageProfile:
+    """Legs, cumulative distance, ETAs and fuel along an (N, 2) polyline in one NumPy pass"""
+    leg_nm = leg_distances_nm(points)
+    cumulative_nm = np.concatenate([[0.0], np.cumsum(leg_nm)])
+    if speed_knots > 0:
+        leg_hours = leg_nm / speed_knots
+    else:
+        leg_hours = np.full(leg_nm.shape, np.inf)
+    eta_hours = np.concatenate([[0.0], np.cumsum(leg_hours)])
+    leg_fuel = leg_nm * fuel_per_nm
+    fuel_remaining = np.maximum(fuel_capacity - cumulative_nm * fuel_per_nm, 0)
+    return VoyageProfile(leg_nm, cumulative_nm, leg_hours, eta_hours, leg_fuel, fuel_remaining)
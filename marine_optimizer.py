@@ -0,0 +1,720 @@
+import requests
+from datetime import datetime
+from dataclasses import dataclass, astuple
+from typing import Optional, Dict, List, Tuple, Iterable, Iterator
+import numpy as np
+import logging
+import random
+import time
+import threading
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from aco_engine import AntColony, ColonyProcessPool, edge_cost, optimize_batch
+from aco_metrics import ACOMetrics
+from aco_tuning import ACO_TUNING_PATH, ACOTuningTable, weather_severity
+from forecast_tensor import ForecastTensor
+from geodesy import KM_PER_NM, VoyageProfile, effective_speed, great_circle_nm, voyage_profile
+from sea_graph import SeaGraph
+from sea_lattice import SeaLattice, load_or_build_lattice
+from weather_field import WeatherField
+from geocode_cache import GeocodeCache, MISS
+from gazetteer import Gazetteer
+from disaster_index import DISASTER_PATH, DisasterStore
+
+# Replace these with your actual API keys
+WEATHER_API_KEY = "xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx"
+GROQ_API_KEY = "xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx"
+
+# Land mask used to build the ocean lattice; open water is assumed when it is missing
+LAND_MASK_PATH = "data/land_mask.npz"
+SEA_LATTICE_CACHE_DIR = "cache/sea_lattice"
+
+# Persistent geocoding cache; port names are resolved offline from the bundled gazetteer first
+GEOCODE_CACHE_PATH = "cache/geocode.sqlite3"
+PORT_GAZETTEER_PATH = "data/ports.csv"
+
+# Seconds a weather observation stays cached (OpenWeatherMap refreshes about every 10 minutes)
+WEATHER_CACHE_TTL = 600
+
+# Configure logging
+logging.basicConfig(filename='marine_optimization.log', level=logging.INFO,
+                   format='%(asctime)s - %(levelname)s - %(message)s')
+
+@dataclass
+class WeatherData:
+    location: str
+    temperature: float
+    feels_like: float
+    description: str
+    wind_speed: float
+    wind_direction: float
+    humidity: int
+    pressure: float
+    visibility: float
+    timestamp: datetime
+
+@dataclass
+class Ship:
+    ship_type: str
+    max_speed: float
+    fuel_consumption: float
+    safety_rating: float
+    fuel_capacity: float  # in liters or tons
+    vessel_weight: float  # in tons
+
+@dataclass
+class Voyage:
+    start_location: str
+    end_location: str
+    ship: Ship
+    graph: Optional[SeaGraph] = None  # Defaults to the ocean lattice around the endpoints
+    start_node: Optional[int] = None  # Defaults to the node nearest the start location
+    end_node: Optional[int] = None  # Defaults to the node nearest the end location
+
+@dataclass
+class VoyageResult:
+    voyage: Voyage
+    start_coords: Optional[Tuple[float, float]] = None
+    end_coords: Optional[Tuple[float, float]] = None
+    weather_data: Optional[WeatherData] = None
+    route: Optional[List[int]] = None
+    cost: float = float('inf')
+    error: Optional[str] = None
+    waypoints: Optional[List[Tuple[float, float]]] = None  # Only set when routed over the ocean lattice
+    profile: Optional[VoyageProfile] = None
+
+class MarineWeatherAnalyzer:
+    def __init__(self, root=""):
+        """Initialize the analyzer with API clients and caching.
+
+        The data and cache paths are resolved against root, by default the working directory.
+        """
+        self.root = root
+        self.weather_api_key = WEATHER_API_KEY
+        self._groq_client = None
+        self._geolocator = None
+        self._land_lattice = None
+        self._aco_tuning = None
+        self.colony = None  # Colony of the last optimization, reused by check_weather_and_optimize
+        self._hazard_layers = {}  # (graph id, store id) -> (graph, store, per-edge hazard factors)
+        self.weather_field = WeatherField(ttl=WEATHER_CACHE_TTL)
+        self.geocode_cache = GeocodeCache(self.path(GEOCODE_CACHE_PATH))
+        gazetteer_path, disaster_path = self.path(PORT_GAZETTEER_PATH), self.path(DISASTER_PATH)
+        self.gazetteer = Gazetteer.load(gazetteer_path) if os.path.exists(gazetteer_path) else None
+        if self.gazetteer is not None:
+            self.geocode_cache.preload_csv(gazetteer_path)  # A no-op unless the CSV changed
+        self.disasters = DisasterStore.load(disaster_path) if os.path.exists(disaster_path) else None
+
+    def path(self, relative_path):
+        """A data or cache path resolved against the analyzer's root"""
+        return os.path.join(self.root, relative_path)
+
+    @property
+    def groq_client(self):
+        """Groq client created on first use; groq is only imported then"""
+        if self._groq_client is None:
+            from groq import Groq
+            self._groq_client = Groq(api_key=GROQ_API_KEY)
+        return self._groq_client
+
+    @property
+    def geolocator(self):
+        """Nominatim geocoder created on first use, which most lookups never reach thanks to the gazetteer and cache"""
+        if self._geolocator is None:
+            from geopy.geocoders import Nominatim
+            self._geolocator = Nominatim(
+                user_agent="marine_optimization_v1.0",
+                timeout=5
+            )
+        return self._geolocator
+
+    @property
+    def aco_tuning(self):
+        """ACO parameter table written by tune_aco.py, loaded on first use"""
+        if self._aco_tuning is None:
+            self._aco_tuning = ACOTuningTable.load(self.path(ACO_TUNING_PATH))
+        return self._aco_tuning
+
+    def tuned_aco_params(self, graph, weather_data, **aco_params):
+        """aco_params completed with the tuned parameters for the graph's size and the weather's severity"""
+        severity = weather_severity(weather_data)
+        tuned = self.aco_tuning.lookup(graph.num_nodes if isinstance(graph, SeaGraph) else len(graph), severity)
+        tuned.update((name, value) for name, value in aco_params.items() if value is not None)
+        return tuned
+
+    def hazard_layer(self, colony: AntColony, hazards: DisasterStore):
+        """Hazard factors of the colony's edges, computed once per graph and disaster store"""
+        key = (id(colony.graph), id(hazards))
+        cached = self._hazard_layers.get(key)
+        if cached is None or cached[0] is not colony.graph or cached[1] is not hazards:
+            cached = (colony.graph, hazards, hazards.hazard_factors(*colony.edge_midpoints()))
+            self._hazard_layers[key] = cached
+        return cached[2]
+
+    def get_coordinates(self, location: str) -> Optional[Tuple[float, float]]:
+        """Get coordinates from the port gazetteer, then the persistent geocode cache, then Nominatim"""
+        location = location.lower().strip()
+        if self.gazetteer is not None:
+            port = self.gazetteer.resolve(location)
+            if port is not None:
+                logging.info(f"Resolved {location} to {port.name} from the port gazetteer")
+                return port.coords
+        cached = self.geocode_cache.lookup(location)
+        if cached is not MISS:
+            return cached
+
+        try:
+            max_retries = 3
+            for attempt in range(max_retries):
+                try:
+                    logging.info(f"Attempting to geocode location: {location} (attempt {attempt + 1})")
+                    loc = self.geolocator.geocode(location)
+                    if loc:
+                        coords = (loc.latitude, loc.longitude)
+                        logging.info(f"Successfully geocoded location: {location}")
+                        self.geocode_cache.put(location, coords)
+                        return coords
+                except Exception as e:
+                    if attempt == max_retries - 1:
+                        logging.error(f"Failed to geocode after {max_retries} attempts: {e}")
+                        raise
+                    logging.warning(f"Geocoding attempt {attempt + 1} failed, retrying...")
+                    time.sleep(2 ** attempt)  # Exponential backoff
+            logging.warning(f"Could not find coordinates for location: {location}")
+            self.geocode_cache.put(location, None)
+            return None
+        except Exception as e:
+            logging.error(f"Error fetching coordinates: {e}")
+            return None
+
+    def fetch_weather_data(self, lat: float, lon: float) -> Optional[WeatherData]:
+        """Fetch and parse marine weather data with retry logic, served from the weather field when cached"""
+        cached = self.weather_field.lookup(lat, lon)
+        if cached is not None:
+            return cached
+
+        max_retries = 3
+        for attempt in range(max_retries):
+            try:
+                url = (
+                    f"https://api.openweathermap.org/data/2.5/weather?lat={lat}&lon={lon}&appid={self.weather_api_key}&units=metric"
+                )
+                response = requests.get(url, timeout=10)
+                response.raise_for_status()
+                data = response.json()
+                weather_data = self.parse_weather_response(data, lat, lon)
+                logging.info(f"Successfully fetched weather data for {weather_data.location}")
+                self.weather_field.put(lat, lon, weather_data)
+                return weather_data
+
+            except requests.RequestException as e:
+                if attempt == max_retries - 1:
+                    logging.error(f"Failed to fetch weather data after {max_retries} attempts: {e}")
+                    return None
+                logging.warning(f"Weather data fetch attempt {attempt + 1} failed, retrying...")
+                time.sleep(2 ** attempt)  # Exponential backoff
+            except KeyError as e:
+                logging.error(f"Error parsing weather data: {e}")
+                return None
+
+    def parse_weather_response(self, data, lat: float, lon: float) -> WeatherData:
+        """Parse an OpenWeatherMap current-weather response into WeatherData"""
+        location = data.get('name', 'Open Water')
+        if not location or location == '':
+            location = f"Coordinates: {lat:.2f}°N, {lon:.2f}°E"
+        
+        return WeatherData(
+            location=location,
+            temperature=data['main']['temp'],
+            feels_like=data['main']['feels_like'],
+            description=data['weather'][0]['description'],
+            wind_speed=data['wind'].get('speed', 0),
+            wind_direction=data['wind'].get('deg', 0),
+            humidity=data['main']['humidity'],
+            pressure=data['main']['pressure'],
+            visibility=data.get('visibility', 0) / 1000,  # Convert to km
+            timestamp=datetime.fromtimestamp(data['dt'])
+        )
+
+    def fetch_weather_forecast(self, lat: float, lon: float) -> List[WeatherData]:
+        """Fetch the 5 day / 3 hour forecast, one WeatherData per step, or [] on failure"""
+        try:
+            url = (
+                f"https://api.openweathermap.org/data/2.5/forecast?lat={lat}&lon={lon}&appid={self.weather_api_key}&units=metric"
+            )
+            response = requests.get(url, timeout=10)
+            response.raise_for_status()
+            data = response.json()
+            forecast = []
+            for entry in data['list']:
+                entry.setdefault('name', data['city'].get('name'))
+                forecast.append(self.parse_weather_response(entry, lat, lon))
+            logging.info(f"Fetched {len(forecast)} forecast steps for {lat}, {lon}")
+            return forecast
+        except requests.RequestException as e:
+            logging.error(f"Error fetching weather forecast: {e}")
+            return []
+        except KeyError as e:
+            logging.error(f"Error parsing weather forecast: {e}")
+            return []
+
+    def fetch_weather_many(self, points: List[Tuple[float, float]], refresh=False,
+                           **fetcher_options) -> List[Optional[WeatherData]]:
+        """Fetch weather for many points concurrently, returning WeatherData (or None) in order.
+
+        Points already in the weather field are served from it, unless refresh
+        is set; the rest are fetched in parallel over one pooled HTTP session
+        and cached. A failed refresh leaves the cached record in place.
+        Called from inside a running event loop, the fetch runs on a helper
+        thread with its own loop; coroutines should await fetch_weather_many_async instead.
+        """
+        fetch = self.fetch_weather_many_async(points, refresh, **fetcher_options)
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is None:
+            return asyncio.run(fetch)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, fetch).result()
+
+    async def fetch_weather_many_async(self, points: List[Tuple[float, float]], refresh=False,
+                                       **fetcher_options) -> List[Optional[WeatherData]]:
+        """fetch_weather_many as a coroutine, for callers already running an event loop"""
+        results = [None if refresh else self.weather_field.lookup(lat, lon) for lat, lon in points]
+        missing = [i for i, result in enumerate(results) if result is None]
+        if not missing:
+            return results
+
+        from weather_fetcher import AsyncWeatherFetcher  # aiohttp is only imported for batch fetches
+
+        async with AsyncWeatherFetcher(self.weather_api_key, parse=self.parse_weather_response,
+                                       **fetcher_options) as fetcher:
+            fetched = await fetcher.fetch_many([points[i] for i in missing])
+        for i, weather_data in zip(missing, fetched):
+            if weather_data is not None:
+                self.weather_field.put(*points[i], weather_data)
+            elif refresh:
+                weather_data = self.weather_field.lookup(*points[i])
+            results[i] = weather_data
+        return results
+
+    def ant_colony_optimization(self, graph, start, end, ship: Ship, weather_data: WeatherData, num_ants=None, max_iterations=None, alpha=None, beta=None, evaporation_rate=None, seed=None, vectorized=True, workers=1, colonies=1, forecast: Optional[ForecastTensor] = None, hazards: Optional[DisasterStore] = None, progress=None, stop=None, metrics: Optional[ACOMetrics] = None, pool: Optional[ColonyProcessPool] = None):
+        """Implement Ant Colony Optimization with fuel, weight, and weather considerations.
+
+        With a forecast, each leg is costed with the weather expected when the ship reaches it.
+        With a disaster store, legs near past disasters are made more expensive.
+        progress and stop are passed to AntColony.optimize to report each iteration and end the run early,
+        and metrics to record per-iteration convergence figures and phase timings.
+        With a ColonyProcessPool the run happens in one of its worker processes.
+        ACO parameters left as None come from the tuning table (see tuned_aco_params).
+        """
+        params = self.tuned_aco_params(graph, weather_data, num_ants=num_ants,
+                                       max_iterations=max_iterations, alpha=alpha, beta=beta,
+                                       evaporation_rate=evaporation_rate)
+        colony = AntColony(graph, ship, weather_data)
+        if hazards is not None:
+            colony.apply_hazard_factors(self.hazard_layer(colony, hazards))
+        self.colony = colony
+        optimize = colony.optimize if pool is None else partial(pool.optimize, colony)
+        return optimize(start, end, **params, seed=seed, vectorized=vectorized, workers=workers,
+                        colonies=colonies, forecast=forecast, progress=progress, stop=stop, metrics=metrics)
+
+    def calculate_edge_cost(self, current, neighbor, graph, ship: Ship, weather_data: WeatherData):
+        """Calculate the cost of an edge considering fuel, weight, and weather"""
+        if isinstance(graph, SeaGraph):
+            return edge_cost(graph.weight(current, neighbor), ship, weather_data)
+        return edge_cost(graph[current][neighbor], ship, weather_data)
+
+    def calculate_cost(self, route, graph, ship: Ship, weather_data: WeatherData):
+        """Calculate route cost considering fuel, weight, and weather"""
+        return sum(self.calculate_edge_cost(route[i], route[i + 1], graph, ship, weather_data) for i in range(len(route) - 1))
+
+    def optimize_many(self, voyages: Iterable[Voyage], workers=None, **aco_params) -> Iterator[VoyageResult]:
+        """Optimize many voyages, yielding a VoyageResult as each one finishes.
+
+        Each distinct location is geocoded once, each distinct start position
+        fetches weather once, and voyages sharing a graph, weather and ship reuse
+        one precomputed cost array. ACO runs are spread over workers processes.
+        """
+        voyages = list(voyages)
+        names = {location.lower().strip() for voyage in voyages
+                 for location in (voyage.start_location, voyage.end_location)}
+        coordinates = {name: self.get_coordinates(name) for name in names}
+
+        weather = {}
+        colonies = {}
+        colony_keys = {}
+        results = {}
+        jobs = []
+        for index, voyage in enumerate(voyages):
+            result = VoyageResult(voyage,
+                                  start_coords=coordinates[voyage.start_location.lower().strip()],
+                                  end_coords=coordinates[voyage.end_location.lower().strip()])
+            results[index] = result
+            if not result.start_coords or not result.end_coords:
+                result.error = "Could not find coordinates for the specified locations."
+                yield result
+                continue
+
+            weather_key = (round(result.start_coords[0], 2), round(result.start_coords[1], 2))
+            if weather_key not in weather:
+                weather[weather_key] = self.fetch_weather_data(*weather_key)
+            result.weather_data = weather[weather_key]
+            if not result.weather_data:
+                result.error = "Could not fetch weather data."
+                yield result
+                continue
+
+            graph, start_node, end_node = voyage.graph, voyage.start_node, voyage.end_node
+            if graph is None:
+                lattice = self.load_sea_lattice(result.start_coords, result.end_coords)
+                graph = lattice.graph
+                start_node = lattice.nearest_node(*result.start_coords)
+                end_node = lattice.nearest_node(*result.end_coords)
+                if start_node < 0 or end_node < 0:
+                    result.error = "Could not find navigable water near the specified locations."
+                    yield result
+                    continue
+            cache_key = (id(graph), weather_key, astuple(voyage.ship))
+            if cache_key not in colony_keys:
+                colony_keys[cache_key] = len(colonies)
+                colony = AntColony(graph, voyage.ship, result.weather_data)
+                if self.disasters is not None:
+                    colony.apply_hazard_factors(self.hazard_layer(colony, self.disasters))
+                colonies[len(colonies)] = colony
+            start_node = start_node if start_node is not None else 0
+            end_node = end_node if end_node is not None else graph.num_nodes - 1
+            jobs.append((index, colony_keys[cache_key], start_node, end_node,
+                         self.tuned_aco_params(graph, result.weather_data, **aco_params)))
+
+        logging.info(f"Optimizing {len(jobs)} voyages with {len(colonies)} distinct cost arrays")
+        for index, route, cost in optimize_batch(colonies, jobs, workers=workers):
+            result = results[index]
+            result.route, result.cost = route, cost
+            yield result
+
+    def plan_voyage(self, voyage: Voyage, use_forecast=True, **aco_params) -> VoyageResult:
+        """Geocode, fetch weather and optimize one voyage without console or GUI output.
+
+        On failure only the result's error is set. Routes over the ocean lattice
+        also carry their waypoints and voyage profile.
+        """
+        result = VoyageResult(voyage, start_coords=self.get_coordinates(voyage.start_location),
+                              end_coords=self.get_coordinates(voyage.end_location))
+        if not result.start_coords or not result.end_coords:
+            result.error = "Could not find coordinates for the specified locations."
+            return result
+        result.weather_data = self.fetch_weather_data(*result.start_coords)
+        if not result.weather_data:
+            result.error = "Could not fetch weather data."
+            return result
+
+        lattice = None
+        graph, start_node, end_node = voyage.graph, voyage.start_node, voyage.end_node
+        if graph is None:
+            lattice = self.load_sea_lattice(result.start_coords, result.end_coords)
+            graph = lattice.graph
+            start_node = lattice.nearest_node(*result.start_coords)
+            end_node = lattice.nearest_node(*result.end_coords)
+            if start_node < 0 or end_node < 0:
+                result.error = "Could not find navigable water near the specified locations."
+                return result
+        start_node = start_node if start_node is not None else 0
+        end_node = end_node if end_node is not None else graph.num_nodes - 1
+
+        forecast = self.fetch_weather_forecast(*result.start_coords) if use_forecast else []
+        result.route, result.cost = self.ant_colony_optimization(
+            graph, start_node, end_node, voyage.ship, result.weather_data,
+            forecast=ForecastTensor.from_forecast(forecast) if forecast else None, hazards=self.disasters,
+            **aco_params)
+        if result.route is None:
+            result.error = "No ant reached the destination, try more iterations."
+        elif lattice is not None:
+            result.waypoints = lattice.waypoints(result.route)
+            result.profile = self.voyage_profile(result.waypoints, voyage.ship)
+        return result
+
+    def load_sea_lattice(self, start_coords, end_coords) -> SeaLattice:
+        """Return the ocean lattice to route over, cached on disk and reused between voyages"""
+        mask_path = self.path(LAND_MASK_PATH)
+        if os.path.exists(mask_path):
+            if self._land_lattice is None:
+                self._land_lattice = load_or_build_lattice(mask_path, self.path(SEA_LATTICE_CACHE_DIR))
+            return self._land_lattice
+        logging.warning(f"Land mask {mask_path} not found, routing over open water")
+        return SeaLattice.open_water(start_coords, end_coords)
+
+    def generate_route_summary(self, route, weather_data: WeatherData, ship: Ship) -> str:
+        """Generate a concise route summary with key details"""
+        try:
+            optimized_distance = len(route) - 1  # Assuming distance is based on route length
+            summary = f"""
+            **Optimized Route Summary**
+            - Start: {route[0]}
+            - End: {route[-1]}
+            - Total Distance: {optimized_distance} nautical miles
+            
+            **Vessel Details**
+            - Fuel Capacity: {ship.fuel_capacity} liters/tons
+            - Vessel Weight: {ship.vessel_weight} tons
+            
+            **Recommendations**
+            - Maintain optimal speed for fuel efficiency.
+            - Monitor fuel consumption closely.
+            - Be prepared for potential weather changes.
+            """
+            return summary.strip()
+        except Exception as e:
+            logging.error(f"Error generating route summary: {e}")
+            return "Error generating route summary. Please check the logs for details."
+
+    def check_weather_and_optimize(self, ship: Ship, optimized_route, initial_fuel_capacity, lattice: SeaLattice, end_node, replan_iterations=20, weather_threshold=0.05):
+        """Check weather every minute, re-plan from the vessel's position if necessary, and update fuel capacity.
+
+        The colony of the last optimization is kept between ticks: only edges whose
+        weather factor moved past weather_threshold are re-costed, and re-plans run
+        replan_iterations iterations from the warm pheromones instead of a cold start,
+        with the other ACO parameters tuned for the lattice and the latest weather.
+        """
+        distance_traveled = 0  # Initialize distance traveled
+        distance_on_route = 0  # Distance covered since the route was last planned
+        colony = self.colony if self.colony is not None and self.colony.graph is lattice.graph else None
+        current_node = optimized_route[0]
+        while True:
+            time.sleep(60)  # Wait for 1 minute
+
+            # Advance the vessel along the current route (assuming a constant speed for simplicity)
+            distance_traveled += ship.max_speed / 60  # Speed in nautical miles per minute
+            distance_on_route += ship.max_speed / 60
+            next_node = optimized_route[lattice.graph.route_position(optimized_route, distance_on_route)]
+            moved = next_node != current_node
+            current_node = next_node
+            current_coords = lattice.waypoints([current_node])[0]
+
+            weather_data = self.fetch_weather_data(current_coords[0], current_coords[1])
+            
+            if not weather_data:
+                logging.warning("Could not fetch weather data during the journey.")
+                continue
+            
+            # Check for dangerous weather conditions
+            if weather_data.wind_speed > 10 or weather_data.visibility < 2:  # Example danger conditions
+                logging.warning("Dangerous weather conditions detected! Finding an alternative route...")
+                print("Finding an alternative optimized path...")
+            else:
+                print("Weather is safe. Continue on the current path.")
+            
+            # Re-cost only the edges whose weather changed, then re-plan from the current node.
+            # Edges are costed from the cached weather field, falling back to this observation.
+            if colony is None:
+                colony = AntColony(lattice.graph, ship, weather_data)
+                if self.disasters is not None:
+                    colony.apply_hazard_factors(self.hazard_layer(colony, self.disasters))
+            changed_edges = colony.apply_weather_field(self.weather_field, fallback=weather_data,
+                                                       threshold=weather_threshold)
+            if changed_edges or moved:
+                params = self.tuned_aco_params(lattice.graph, weather_data, max_iterations=replan_iterations)
+                route, cost = colony.optimize(current_node, end_node, **params, warm_start=True)
+                if route is not None:
+                    optimized_route, distance_on_route = route, 0
+                    print(f"New Optimized Route: {optimized_route} with cost: {cost:.2f} nautical miles")
+            else:
+                print("Weather and position unchanged, keeping the current route.")
+            
+            # Update fuel capacity
+            remaining_fuel = self.update_fuel_capacity(initial_fuel_capacity, distance_traveled, ship)
+            print(f"Remaining Fuel Capacity: {remaining_fuel:.2f} liters/tons")
+            
+            # Check if fuel is below a certain threshold
+            if remaining_fuel <= 0:
+                print("Warning: Fuel capacity is critically low!")
+                break  # Exit the loop or implement further logic
+
+            if current_node == end_node:
+                print("Destination reached.")
+                break
+
+    def haversine_distance(self, coord1, coord2):
+        """Calculate the great-circle distance between two points on the Earth in kilometers."""
+        return great_circle_nm(coord1[0], coord1[1], coord2[0], coord2[1]) * KM_PER_NM
+
+    def calculate_eta(self, start_coords, end_coords, ship: Ship) -> float:
+        """Calculate the estimated time of arrival based on the start and end coordinates and ship conditions."""
+        distance_nautical_miles = great_circle_nm(start_coords[0], start_coords[1], end_coords[0], end_coords[1])
+        speed = effective_speed(ship)  # Adjusted speed considering fuel load
+        return distance_nautical_miles / speed if speed > 0 else float('inf')
+
+    def voyage_profile(self, waypoints, ship: Ship) -> VoyageProfile:
+        """Leg distances, ETAs and fuel burn along a list of (lat, lon) waypoints, computed in one pass"""
+        return voyage_profile(waypoints, effective_speed(ship), ship.fuel_consumption, ship.fuel_capacity)
+
+    def calculate_fuel_consumption(self, distance_nautical_miles: float, ship: Ship) -> float:
+        """Calculate the fuel consumed based on distance and ship specifications."""
+        return distance_nautical_miles * ship.fuel_consumption
+
+    def update_fuel_capacity(self, initial_fuel_capacity: float, distance_nautical_miles: float, ship: Ship) -> float:
+        """Update the fuel capacity based on distance traveled."""
+        fuel_consumed = self.calculate_fuel_consumption(distance_nautical_miles, ship)
+        return max(0, initial_fuel_capacity - fuel_consumed)  # Ensure fuel doesn't go below 0
+
+    def generate_report(self, start_location, end_location, optimized_route, weather_data: WeatherData, eta_hours, remaining_fuel, vessel_details, profile: Optional[VoyageProfile] = None):
+        """Generate a report of the voyage and save it to a text file."""
+        route_details = ""
+        if profile is not None:
+            route_details = (
+                f"Route Distance: {profile.total_nm:.1f} nautical miles over {len(profile.leg_nm)} legs\n"
+                f"        Fuel Burned: {profile.leg_fuel.sum():.2f} liters/tons\n"
+                f"        Longest Leg: {profile.leg_nm.max(initial=0):.1f} nautical miles"
+            )
+        report_content = f"""
+        === Marine Voyage Report ===
+        
+        Start Location: {start_location}
+        End Location: {end_location}
+        
+        Vessel Details:
+        - Ship Type: {vessel_details.ship_type}
+        - Max Speed: {vessel_details.max_speed} knots
+        - Fuel Capacity: {vessel_details.fuel_capacity} liters/tons
+        - Vessel Weight: {vessel_details.vessel_weight} tons
+        
+        Optimized Route: {optimized_route}
+        {route_details}
+        
+        Weather Conditions:
+        - Location: {weather_data.location}
+        - Temperature: {weather_data.temperature}°C
+        - Wind Speed: {weather_data.wind_speed} m/s
+        - Visibility: {weather_data.visibility} km
+        
+        Estimated Time of Arrival: {eta_hours:.2f} hours
+        Remaining Fuel Capacity: {remaining_fuel:.2f} liters/tons
+        
+        Thank you for using the Marine Route Optimizer!
+        """
+        
+        with open("marine_voyage_report.txt", "w") as report_file:
+            report_file.write(report_content.strip())
+        print("Report saved as 'marine_voyage_report.txt'.")
+
+    def create_map(self, start_coords, end_coords, sea_route_waypoints):
+        """Create a map with the optimized sea route and save it as an HTML file."""
+        import folium  # Imported on first use, it is slow to import and only needed for maps
+
+        # Create a map centered around the start location
+        m = folium.Map(location=start_coords, zoom_start=7)
+
+        # Add markers for start and end locations
+        folium.Marker(start_coords, tooltip='Start Location', icon=folium.Icon(color='green')).add_to(m)
+        folium.Marker(end_coords, tooltip='End Location', icon=folium.Icon(color='red')).add_to(m)
+
+        # Add the sea route as a polyline
+        folium.PolyLine(locations=sea_route_waypoints, color='blue', weight=5, opacity=0.7).add_to(m)
+
+        # Optionally, add weather markers along the route
+        for waypoint in sea_route_waypoints:
+            folium.Marker(waypoint, tooltip='Waypoint', icon=folium.Icon(color='orange')).add_to(m)
+
+        # Save the map to an HTML file
+        m.save("marine_route_map.html")
+        print("Map saved as 'marine_route_map.html'.")
+
+def main(start_location, end_location, fuel_capacity, vessel_weight, progress=None, stop=None):
+    """Optimize one voyage and print the results; progress and stop are passed to the ACO run"""
+    ship = None  # Initialize ship variable
+    profile = None  # Distance, ETA and fuel along the optimized route
+    try:
+        print("Initializing MarineWeatherAnalyzer...")
+        analyzer = MarineWeatherAnalyzer()
+        
+        print("Fetching coordinates...")
+        start_coords = analyzer.get_coordinates(start_location)
+        end_coords = analyzer.get_coordinates(end_location)
+
+        if not start_coords or not end_coords:
+            print("Error: Could not find coordinates for the specified locations.")
+            return
+
+        print("Fetching weather data for the starting location...")
+        weather_data = analyzer.fetch_weather_data(start_coords[0], start_coords[1])
+        if not weather_data:
+            print("Error: Could not fetch weather data.")
+            return
+
+        print("Calculating optimal route...")
+        # Build (or load from cache) the ocean lattice and snap the endpoints to water nodes
+        lattice = analyzer.load_sea_lattice(start_coords, end_coords)
+        start_node = lattice.nearest_node(*start_coords)
+        end_node = lattice.nearest_node(*end_coords)
+        if start_node < 0 or end_node < 0:
+            print("Error: Could not find navigable water near the specified locations.")
+            return
+
+        # Collect additional ship details
+        ship = Ship(
+            ship_type="Cargo",
+            max_speed=20,
+            fuel_consumption=0.1,
+            safety_rating=0.9,
+            fuel_capacity=float(fuel_capacity),
+            vessel_weight=float(vessel_weight)
+        )
+
+        # Cost each leg with the forecast for the time the ship gets there, when one is available
+        forecast = analyzer.fetch_weather_forecast(start_coords[0], start_coords[1])
+        forecast_tensor = ForecastTensor.from_forecast(forecast) if forecast else None
+
+        # Pass ship and weather data to ACO
+        optimized_route, cost = analyzer.ant_colony_optimization(
+            lattice.graph, start=start_node, end=end_node, ship=ship, weather_data=weather_data,
+            forecast=forecast_tensor, hazards=analyzer.disasters, progress=progress, stop=stop
+        )
+        if optimized_route is None:
+            print("Error: No ant reached the destination, try more iterations.")
+            return
+        
+        print("\n=== Results ===")
+        print(f"Start Location: {start_location} {start_coords}")
+        print(f"End Location: {end_location} {end_coords}")
+        print(f"Optimized Route: {optimized_route}")
+        print(f"Total Cost: {cost:.2f} nautical miles")
+
+        # Waypoints of the optimized route on the ocean lattice
+        sea_route_waypoints = lattice.waypoints(optimized_route)
+
+        # Calculate distance, ETA and fuel along the route's waypoints
+        profile = analyzer.voyage_profile(sea_route_waypoints, ship)
+        eta_hours = profile.total_hours
+        print(f"Route Distance: {profile.total_nm:.2f} nautical miles")
+        print(f"Estimated Time of Arrival: {eta_hours:.2f} hours")
+
+        # Start a thread to check weather and optimize path
+        weather_thread = threading.Thread(target=analyzer.check_weather_and_optimize, args=(ship, optimized_route, ship.fuel_capacity, lattice, end_node))
+        weather_thread.start()
+
+        print("\n=== Weather Conditions ===")
+        print(f"Location: {weather_data.location}")
+        print(f"Temperature: {weather_data.temperature}°C")
+        print(f"Wind Speed: {weather_data.wind_speed} m/s")
+        print(f"Visibility: {weather_data.visibility} km")
+
+        print("\n=== Generating Route Analysis ===")
+        route_summary = analyzer.generate_route_summary(optimized_route, weather_data, ship)
+        print("\n🌊 Route Summary and Recommendations:")
+        print(route_summary)
+
+        # Create and save the map visualization
+        analyzer.create_map(start_coords, end_coords, sea_route_waypoints)
+
+    except KeyboardInterrupt:
+        print("\nOperation cancelled by user.")
+    except Exception as e:
+        logging.error(f"Unexpected error in main: {e}")
+        print(f"\nAn unexpected error occurred. Please check the logs for details.")
+    finally:
+        if ship and profile is not None:  # Check if a route was found before reporting
+            remaining_fuel = float(profile.fuel_remaining[-1])
+            analyzer.generate_report(start_location, end_location, optimized_route, weather_data, eta_hours, remaining_fuel, ship, profile)
@@ -0,0 +1,136 @@
+import logging
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+# Worker threads running jobs. They only track status and cancellation: CPU-bound work such as
+# ACO belongs in a process pool the job waits on (see aco_engine.ColonyProcessPool), since its
+# small per-step numpy calls would otherwise hold the GIL against the request threads
+JOB_WORKERS = 4
+
+# Jobs waiting or running beyond this are refused so a burst cannot queue unbounded work
+MAX_PENDING_JOBS = 64
+
+# Seconds a finished job's result stays available for polling
+JOB_TTL = 3600
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    status: str = "queued"  # "queued", "running", "done", "failed" or "cancelled"
+    submitted_at: float = 0.0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Any = None
+    error: Optional[str] = None
+    iteration: Optional[int] = None  # Last progress report
+    best_cost: Optional[float] = None
+    stop: threading.Event = field(default_factory=threading.Event)
+    progress: queue.Queue = field(default_factory=queue.Queue)  # (iteration, best_cost) reports, oldest first
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed", "cancelled")
+
+    def report(self, iteration, best_cost):
+        """Progress callback for AntColony.optimize, read back from the progress queue by the caller"""
+        self.iteration, self.best_cost = iteration, best_cost
+        self.progress.put((iteration, best_cost))
+
+    def cancel(self):
+        """Ask the job to stop; a queued job never starts, a running one stops after its current iteration"""
+        self.stop.set()
+
+    def to_dict(self):
+        return {"id": self.id, "kind": self.kind, "status": self.status, "submitted_at": self.submitted_at,
+                "started_at": self.started_at, "finished_at": self.finished_at, "error": self.error,
+                "iteration": self.iteration,
+                "best_cost": self.best_cost if self.best_cost != float('inf') else None}
+
+
+class JobPool:
+    """Runs callables on a bounded thread pool and keeps their results under a job id for polling.
+
+    The threads are for bookkeeping; a callable doing CPU-bound work should hand it
+    to a process pool and wait, relaying progress and cancellation.
+
+    Each callable gets its Job as the first argument, so it can report progress
+    through job.report and stop early once job.stop is set; a job that was
+    cancelled while running ends as "cancelled" with its partial result.
+    Finished jobs are dropped ``ttl`` seconds after they complete. At most
+    ``max_pending`` jobs may be queued or running; submit() raises
+    JobQueueFull past that.
+    """
+
+    def __init__(self, workers=JOB_WORKERS, max_pending=MAX_PENDING_JOBS, ttl=JOB_TTL, clock=time.time):
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self.clock = clock
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+
+    def submit(self, kind, fn: Callable, *args, **kwargs) -> Job:
+        with self._lock:
+            self._expire()
+            if sum(not job.finished for job in self._jobs.values()) >= self.max_pending:
+                raise JobQueueFull(f"{self.max_pending} jobs already pending")
+            job = Job(uuid.uuid4().hex, kind, submitted_at=self.clock())
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def get(self, job_id) -> Optional[Job]:
+        with self._lock:
+            self._expire()
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id) -> Optional[Job]:
+        job = self.get(job_id)
+        if job is not None:
+            job.cancel()
+        return job
+
+    def stats(self):
+        with self._lock:
+            counts = {"queued": 0, "running": 0, "done": 0, "failed": 0, "cancelled": 0}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+            return counts
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
+
+    def _run(self, job, fn, args, kwargs):
+        job.started_at = self.clock()
+        if job.stop.is_set():
+            job.finished_at = job.started_at
+            job.status = "cancelled"
+            return
+        job.status = "running"
+        try:
+            job.result = fn(job, *args, **kwargs)
+            status = "cancelled" if job.stop.is_set() else "done"
+        except Exception as e:
+            logging.error(f"{job.kind} job {job.id} failed: {e}")
+            job.error = str(e)
+            status = "failed"
+        job.finished_at = self.clock()  # Set before the status, which is what pollers and _expire() look at
+        job.status = status
+        logging.info(f"{job.kind} job {job.id} {job.status} in {job.finished_at - job.started_at:.2f} s")
+
+    def _expire(self):
+        now = self.clock()
+        expired = [job_id for job_id, job in self._jobs.items() if job.finished and now - job.finished_at > self.ttl]
+        for job_id in expired:
+            del self._jobs[job_id]
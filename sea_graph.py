@@ -0,0 +1,119 @@
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from geodesy import haversine_nm
+
+# Rows of a dense matrix scanned per chunk when converting to CSR
+DENSE_CHUNK_ROWS = 1024
+
+
+@dataclass
+class SeaGraph:
+    """Directed sea graph in compressed sparse row (CSR) form.
+
+    The neighbors of node ``u`` are ``indices[indptr[u]:indptr[u + 1]]``, sorted
+    ascending, with the matching edge weights in ``weights``. Edge ids are
+    positions in these arrays, so per-edge data (costs, pheromones) is stored as
+    flat arrays of length ``num_edges``.
+    """
+    indptr: np.ndarray
+    indices: np.ndarray
+    weights: np.ndarray
+    lat: Optional[np.ndarray] = None
+    lon: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_dense(cls, matrix, lat=None, lon=None) -> "SeaGraph":
+        """Build a graph from a dense adjacency matrix where 0 means no edge"""
+        matrix = np.asarray(matrix)
+        num_nodes = matrix.shape[0]
+        indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+        indices, weights = [], []
+        for row in range(0, num_nodes, DENSE_CHUNK_ROWS):
+            block = matrix[row:row + DENSE_CHUNK_ROWS]
+            rows, cols = np.nonzero(block)
+            indptr[row + 1:row + 1 + block.shape[0]] = np.bincount(rows, minlength=block.shape[0])
+            indices.append(cols)
+            weights.append(block[rows, cols])
+        np.cumsum(indptr, out=indptr)
+        return cls(indptr, np.concatenate(indices).astype(np.int32),
+                   np.concatenate(weights), _coords(lat), _coords(lon))
+
+    @classmethod
+    def from_edges(cls, num_nodes, sources, targets, weights, lat=None, lon=None) -> "SeaGraph":
+        """Build a graph from parallel arrays of edge sources, targets and weights"""
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+        weights = np.asarray(weights)
+        order = np.lexsort((targets, sources))
+        indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=num_nodes), out=indptr[1:])
+        return cls(indptr, targets[order].astype(np.int32), weights[order],
+                   _coords(lat), _coords(lon))
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.indptr) - 1
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.indices)
+
+    def degrees(self) -> np.ndarray:
+        return np.diff(self.indptr)
+
+    def neighbors(self, node):
+        """Return the (targets, weights) arrays of the edges leaving node"""
+        start, end = self.indptr[node], self.indptr[node + 1]
+        return self.indices[start:end], self.weights[start:end]
+
+    def edge_index(self, source, target) -> int:
+        """Return the edge id of source -> target, or -1 if there is no such edge"""
+        start, end = self.indptr[source], self.indptr[source + 1]
+        position = start + np.searchsorted(self.indices[start:end], target)
+        if position < end and self.indices[position] == target:
+            return int(position)
+        return -1
+
+    def weight(self, source, target):
+        """Return the weight of source -> target, 0 if there is no such edge"""
+        edge = self.edge_index(source, target)
+        return self.weights[edge] if edge >= 0 else 0
+
+    def route_position(self, route, distance) -> int:
+        """Index of the last node of route reached after travelling distance along its edges"""
+        legs = [self.weight(route[i], route[i + 1]) for i in range(len(route) - 1)]
+        return int(np.searchsorted(np.cumsum(legs), distance, side='right'))
+
+    def edge_sources(self) -> np.ndarray:
+        """Source node of every edge, aligned with indices"""
+        return np.repeat(np.arange(self.num_nodes, dtype=np.int32), self.degrees())
+
+    def to_dense(self) -> np.ndarray:
+        matrix = np.zeros((self.num_nodes, self.num_nodes), dtype=self.weights.dtype)
+        matrix[self.edge_sources(), self.indices] = self.weights
+        return matrix
+
+    def has_coordinates(self) -> bool:
+        return self.lat is not None and self.lon is not None
+
+    def distances_to(self, node) -> np.ndarray:
+        """Great-circle distance in nautical miles from every node to node"""
+        return haversine_nm(self.lat, self.lon, self.lat[node], self.lon[node])
+
+    def nbytes(self) -> int:
+        arrays = [self.indptr, self.indices, self.weights, self.lat, self.lon]
+        return sum(array.nbytes for array in arrays if array is not None)
+
+
+def as_sea_graph(graph) -> SeaGraph:
+    """Return graph unchanged if it is a SeaGraph, otherwise convert the dense matrix"""
+    if isinstance(graph, SeaGraph):
+        return graph
+    return SeaGraph.from_dense(graph)
+
+
+def _coords(values):
+    return None if values is None else np.asarray(values, dtype=np.float64)
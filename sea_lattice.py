@@ -0,0 +1,182 @@
+import json
+import logging
+import os
+from dataclasses import dataclass
+
+import numpy as np
+
+from geodesy import haversine_nm
+from sea_graph import SeaGraph
+
+# Forward neighbor offsets (row, col); each one also yields the reverse edge
+LATTICE_OFFSETS = [(0, 1), (1, -1), (1, 0), (1, 1)]
+
+# Arrays written to the cache directory, loaded back with np.load(mmap_mode='r')
+CACHE_ARRAYS = ["indptr", "indices", "weights", "lat", "lon", "node_grid"]
+
+# Part of each cache directory name; bump it when from_mask builds different edges so stale caches are rebuilt
+CACHE_VERSION = 2
+
+
+@dataclass
+class SeaLattice:
+    """Navigable ocean lattice: a SeaGraph over the water cells of a regular lat/lon grid.
+
+    ``node_grid[row, col]`` holds the node id of each water cell and -1 for land,
+    which doubles as the spatial index used to snap coordinates to nodes.
+    Row 0 is the southernmost row and cell centers sit at
+    ``lat_min + row * resolution``, ``lon_min + col * resolution``.
+    """
+    graph: SeaGraph
+    node_grid: np.ndarray
+    lat_min: float
+    lon_min: float
+    resolution: float
+
+    @classmethod
+    def from_mask(cls, land_mask, lat_min, lon_min, resolution) -> "SeaLattice":
+        """Connect every water cell of a boolean land mask (True = land) to its 8 neighbors.
+
+        When the mask spans all 360 degrees of longitude, the last column is
+        connected to the first across the antimeridian.
+        """
+        water = ~np.asarray(land_mask, dtype=bool)
+        rows, cols = water.shape
+        wraps = cols * resolution >= 360 and cols > 2
+        node_grid = np.full(water.shape, -1, dtype=np.int32)
+        node_grid[water] = np.arange(np.count_nonzero(water), dtype=np.int32)
+        water_rows, water_cols = np.nonzero(water)
+        lat = lat_min + water_rows * resolution
+        lon = lon_min + water_cols * resolution
+
+        sources, targets = [], []
+        for d_row, d_col in LATTICE_OFFSETS:
+            r, c = water_rows + d_row, water_cols + d_col
+            if wraps:
+                c = c % cols
+            inside = (r < rows) & (c >= 0) & (c < cols)
+            neighbor = np.full(r.shape, -1, dtype=np.int32)
+            neighbor[inside] = node_grid[r[inside], c[inside]]
+            keep = neighbor >= 0
+            sources.append(node_grid[water_rows[keep], water_cols[keep]])
+            targets.append(neighbor[keep])
+        sources, targets = np.concatenate(sources), np.concatenate(targets)
+        weights = haversine_nm(lat[sources], lon[sources], lat[targets], lon[targets])
+
+        graph = SeaGraph.from_edges(len(lat), np.concatenate([sources, targets]),
+                                    np.concatenate([targets, sources]),
+                                    np.concatenate([weights, weights]), lat, lon)
+        return cls(graph, node_grid, float(lat_min), float(lon_min), float(resolution))
+
+    @classmethod
+    def open_water(cls, start_coords, end_coords, margin=1.0, max_cells=100) -> "SeaLattice":
+        """All-water lattice covering the box around two points, used when no land mask is available"""
+        lat_min = min(start_coords[0], end_coords[0]) - margin
+        lon_min = min(start_coords[1], end_coords[1]) - margin
+        span = max(abs(start_coords[0] - end_coords[0]), abs(start_coords[1] - end_coords[1])) + 2 * margin
+        resolution = max(span / max_cells, 0.05)
+        rows = int(np.ceil((abs(start_coords[0] - end_coords[0]) + 2 * margin) / resolution)) + 1
+        cols = int(np.ceil((abs(start_coords[1] - end_coords[1]) + 2 * margin) / resolution)) + 1
+        return cls.from_mask(np.zeros((rows, cols), dtype=bool), lat_min, lon_min, resolution)
+
+    @property
+    def wraps(self) -> bool:
+        """Whether the grid spans all 360 degrees of longitude, so columns wrap around"""
+        return self.node_grid.shape[1] * self.resolution >= 360
+
+    def contains(self, lat, lon) -> bool:
+        """Whether a coordinate lies within the cells of the grid"""
+        rows, cols = self.node_grid.shape
+        row = (lat - self.lat_min) / self.resolution
+        col = (lon - self.lon_min) / self.resolution
+        return -0.5 <= row < rows - 0.5 and (self.wraps or -0.5 <= col < cols - 0.5)
+
+    def cell_of(self, lat, lon):
+        """Grid (row, col) of the cell containing a coordinate, clamped to the grid"""
+        rows, cols = self.node_grid.shape
+        row = int(np.clip(round((lat - self.lat_min) / self.resolution), 0, rows - 1))
+        col = round((lon - self.lon_min) / self.resolution)
+        col = int(col % cols if self.wraps else np.clip(col, 0, cols - 1))
+        return row, col
+
+    def nearest_node(self, lat, lon, max_radius=None) -> int:
+        """Snap a coordinate to the nearest water node, or return -1 if none is within max_radius cells.
+
+        Coordinates outside the grid are rejected with -1 rather than snapped to its edge.
+        Searches square rings of cells outward from the containing cell; once a
+        water cell is found the window is doubled so that closer nodes in the
+        corners of the next rings are not missed.
+        """
+        if not self.contains(lat, lon):
+            return -1
+        row, col = self.cell_of(lat, lon)
+        if self.node_grid[row, col] >= 0:
+            return int(self.node_grid[row, col])
+
+        max_radius = max_radius or max(self.node_grid.shape)
+        for radius in range(1, max_radius + 1):
+            if self._window(row, col, radius).max() >= 0:
+                window = self._window(row, col, 2 * radius)
+                candidates = window[window >= 0]
+                distances = haversine_nm(self.graph.lat[candidates], self.graph.lon[candidates], lat, lon)
+                return int(candidates[np.argmin(distances)])
+        return -1
+
+    def waypoints(self, route):
+        """(lat, lon) tuples of the nodes along a route"""
+        return [(float(self.graph.lat[node]), float(self.graph.lon[node])) for node in route]
+
+    def save(self, directory):
+        """Write the lattice as raw .npy arrays that load() can memory-map"""
+        os.makedirs(directory, exist_ok=True)
+        arrays = {"indptr": self.graph.indptr, "indices": self.graph.indices, "weights": self.graph.weights,
+                  "lat": self.graph.lat, "lon": self.graph.lon, "node_grid": self.node_grid}
+        for name in CACHE_ARRAYS:
+            np.save(os.path.join(directory, f"{name}.npy"), arrays[name])
+        with open(os.path.join(directory, "lattice.json"), "w") as meta_file:
+            json.dump({"lat_min": self.lat_min, "lon_min": self.lon_min, "resolution": self.resolution}, meta_file)
+
+    @classmethod
+    def load(cls, directory, mmap=True) -> "SeaLattice":
+        mode = "r" if mmap else None
+        arrays = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mode) for name in CACHE_ARRAYS}
+        with open(os.path.join(directory, "lattice.json")) as meta_file:
+            meta = json.load(meta_file)
+        graph = SeaGraph(arrays["indptr"], arrays["indices"], arrays["weights"], arrays["lat"], arrays["lon"])
+        return cls(graph, arrays["node_grid"], meta["lat_min"], meta["lon_min"], meta["resolution"])
+
+    def _window(self, row, col, radius):
+        rows = self.node_grid[max(row - radius, 0):row + radius + 1]
+        cols = self.node_grid.shape[1]
+        if not self.wraps:
+            return rows[:, max(col - radius, 0):col + radius + 1]
+        if 2 * radius + 1 >= cols:
+            return rows
+        return rows[:, np.arange(col - radius, col + radius + 1) % cols]
+
+
+def load_land_mask(path):
+    """Read a land mask .npz holding mask (True = land), lat_min, lon_min and resolution"""
+    with np.load(path) as data:
+        return (data["mask"].astype(bool), float(data["lat_min"]), float(data["lon_min"]),
+                float(data["resolution"]))
+
+
+def load_or_build_lattice(mask_path, cache_dir) -> SeaLattice:
+    """Load the lattice for a land mask from the disk cache, building and caching it on a miss.
+
+    The cache entry is keyed by the mask file's size and modification time,
+    which a stat call reads without hashing the whole mask on every startup,
+    so replacing the mask invalidates it automatically, and by CACHE_VERSION.
+    """
+    stat = os.stat(mask_path)
+    directory = os.path.join(cache_dir, f"v{CACHE_VERSION}-{stat.st_size:x}-{stat.st_mtime_ns:x}")
+    if os.path.exists(os.path.join(directory, "lattice.json")):
+        logging.info(f"Loading cached sea lattice from {directory}")
+        return SeaLattice.load(directory)
+
+    logging.info(f"Building sea lattice from {mask_path}")
+    lattice = SeaLattice.from_mask(*load_land_mask(mask_path))
+    lattice.save(directory)
+    logging.info(f"Cached sea lattice with {lattice.graph.num_nodes} nodes in {directory}")
+    return SeaLattice.load(directory)
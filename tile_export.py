@@ -0,0 +1,194 @@
+import argparse
+import json
+import logging
+import os
+import re
+import struct
+
+import numpy as np
+
+# Binary tile layout: 16 byte header (magic, point count, column count, reserved) followed by
+# one little-endian float32 array per column, each holding every point of the tile
+TILE_MAGIC = b"MTL1"
+TILE_COLUMNS = ["longitude", "latitude", "weight"]
+
+# Leaves are split until they hold at most MAX_TILE_POINTS points or reach MAX_ZOOM
+MAX_TILE_POINTS = 5000
+MAX_ZOOM = 14
+
+# Hexagon radii in meters aggregated ahead of time; 10609 m is the DeckGL overlay's HexagonLayer radius
+HEXBIN_RADII = [10609]
+
+WEB_MERCATOR_RADIUS = 6378137.0
+MAX_MERCATOR_LAT = 85.0511
+
+
+def parse_number(value, default=np.nan):
+    """Float from a number or a string such as "26.34", "83%" or "3.19m", default when there is none"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = re.search(r"-?\d+(?:\.\d+)?", str(value))
+    return float(match.group()) if match else default
+
+
+def load_points(path, weight_field="level"):
+    """lon, lat and weight float32 columns of a JSON array of records with string or numeric fields.
+
+    Records without coordinates are dropped; a missing weight counts as 1.
+    """
+    with open(path) as json_file:
+        records = json.load(json_file)
+    lats = np.array([parse_number(record.get("latitude")) for record in records], dtype=np.float64)
+    lons = np.array([parse_number(record.get("longitude")) for record in records], dtype=np.float64)
+    weights = np.array([parse_number(record.get(weight_field), 1.0) for record in records], dtype=np.float64)
+    keep = ~(np.isnan(lats) | np.isnan(lons))
+    if not keep.all():
+        logging.warning(f"Dropped {np.count_nonzero(~keep)} records without coordinates from {path}")
+    return lons[keep].astype(np.float32), lats[keep].astype(np.float32), weights[keep].astype(np.float32)
+
+
+def tile_coordinates(lons, lats, zoom):
+    """Integer Web Mercator (x, y) tile of each point at a zoom level"""
+    scale = 2 ** zoom
+    lat = np.radians(np.clip(lats.astype(np.float64), -MAX_MERCATOR_LAT, MAX_MERCATOR_LAT))
+    x = (lons.astype(np.float64) + 180) / 360 * scale
+    y = (1 - np.log(np.tan(lat) + 1 / np.cos(lat)) / np.pi) / 2 * scale
+    return (np.clip(x.astype(np.int64), 0, scale - 1), np.clip(y.astype(np.int64), 0, scale - 1))
+
+
+def morton_code(x, y, bits):
+    """Interleave the low bits of x and y so that every quadtree tile is one contiguous code range"""
+    code = np.zeros(np.shape(x), dtype=np.uint64)
+    x, y = np.asarray(x, dtype=np.uint64), np.asarray(y, dtype=np.uint64)
+    for bit in range(bits):
+        code |= ((x >> np.uint64(bit)) & np.uint64(1)) << np.uint64(2 * bit)
+        code |= ((y >> np.uint64(bit)) & np.uint64(1)) << np.uint64(2 * bit + 1)
+    return code
+
+
+def quadtree_tiles(lons, lats, max_points=MAX_TILE_POINTS, max_zoom=MAX_ZOOM):
+    """Sort points along the quadtree and return (order, leaves) with leaves as (z, x, y, start, stop).
+
+    Points order[start:stop] fall in leaf tile (z, x, y). Tiles are split into
+    their four children while they hold more than max_points points.
+    """
+    x, y = tile_coordinates(lons, lats, max_zoom)
+    codes = morton_code(x, y, max_zoom)
+    order = np.argsort(codes, kind="stable")
+    codes = codes[order]
+
+    leaves = []
+    stack = [(0, 0, 0)]
+    while stack:
+        z, tx, ty = stack.pop()
+        shift = np.uint64(2 * (max_zoom - z))
+        first = int(morton_code(tx, ty, z)) << int(shift)
+        start, stop = np.searchsorted(codes, [first, first + (1 << int(shift))])
+        if stop == start:
+            continue
+        if stop - start > max_points and z < max_zoom:
+            stack.extend((z + 1, 2 * tx + dx, 2 * ty + dy) for dy in (1, 0) for dx in (1, 0))
+        else:
+            leaves.append((z, tx, ty, int(start), int(stop)))
+    return order, leaves
+
+
+def hexbin(lons, lats, weights, radius):
+    """Aggregate points into pointy-top hexagons of a radius in Web Mercator meters.
+
+    Returns center lon, center lat, point count and weight sum per occupied hexagon.
+    """
+    lat = np.radians(np.clip(lats.astype(np.float64), -MAX_MERCATOR_LAT, MAX_MERCATOR_LAT))
+    mx = WEB_MERCATOR_RADIUS * np.radians(lons.astype(np.float64))
+    my = WEB_MERCATOR_RADIUS * np.log(np.tan(np.pi / 4 + lat / 2))
+
+    # Axial coordinates, then cube rounding to the nearest hexagon
+    q = (np.sqrt(3) / 3 * mx - my / 3) / radius
+    r = (2 / 3 * my) / radius
+    s = -q - r
+    rq, rr, rs = np.rint(q), np.rint(r), np.rint(s)
+    dq, dr, ds = np.abs(rq - q), np.abs(rr - r), np.abs(rs - s)
+    fix_q = (dq > dr) & (dq > ds)
+    fix_r = ~fix_q & (dr > ds)
+    rq = np.where(fix_q, -rr - rs, rq)
+    rr = np.where(fix_r, -rq - rs, rr)
+
+    # One int64 key per hexagon; axial coordinates stay far below 2**31 for any radius over a meter
+    keys, inverse = np.unique((rq.astype(np.int64) << 32) + (rr.astype(np.int64) + 2 ** 31), return_inverse=True)
+    counts = np.bincount(inverse, minlength=len(keys))
+    sums = np.bincount(inverse, weights=weights, minlength=len(keys))
+    cells_q, cells_r = keys >> 32, (keys & 0xFFFFFFFF) - 2 ** 31
+    cx = radius * np.sqrt(3) * (cells_q + cells_r / 2)
+    cy = radius * 1.5 * cells_r
+    center_lons = np.degrees(cx / WEB_MERCATOR_RADIUS)
+    center_lats = np.degrees(2 * np.arctan(np.exp(cy / WEB_MERCATOR_RADIUS)) - np.pi / 2)
+    return center_lons, center_lats, counts, sums
+
+
+def write_columns(path, columns):
+    """Write equal-length columns as a binary tile of float32 arrays"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    count = len(columns[0])
+    with open(path, "wb") as tile_file:
+        tile_file.write(TILE_MAGIC + struct.pack("<III", count, len(columns), 0))
+        for column in columns:
+            tile_file.write(np.ascontiguousarray(column, dtype="<f4").tobytes())
+
+
+def read_columns(path):
+    """Read a binary tile back into a list of float32 columns"""
+    with open(path, "rb") as tile_file:
+        data = tile_file.read()
+    if data[:4] != TILE_MAGIC:
+        raise ValueError(f"{path} is not a binary tile")
+    count, num_columns, _ = struct.unpack("<III", data[4:16])
+    return list(np.frombuffer(data, dtype="<f4", offset=16).reshape(num_columns, count))
+
+
+def export_tiles(source, output_dir, weight_field="level", max_points=MAX_TILE_POINTS, max_zoom=MAX_ZOOM,
+                 hexbin_radii=HEXBIN_RADII):
+    """Convert a JSON point dataset into quadtree tiles, hexbin aggregates and an index.json manifest"""
+    lons, lats, weights = load_points(source, weight_field)
+    order, leaves = quadtree_tiles(lons, lats, max_points, max_zoom)
+    lons, lats, weights = lons[order], lats[order], weights[order]
+
+    tiles = []
+    for z, x, y, start, stop in leaves:
+        path = f"{z}/{x}/{y}.bin"
+        write_columns(os.path.join(output_dir, path), [lons[start:stop], lats[start:stop], weights[start:stop]])
+        tiles.append({"z": z, "x": x, "y": y, "count": stop - start, "path": path,
+                      "bbox": [float(lons[start:stop].min()), float(lats[start:stop].min()),
+                               float(lons[start:stop].max()), float(lats[start:stop].max())]})
+
+    hexbins = []
+    for radius in hexbin_radii:
+        center_lons, center_lats, counts, sums = hexbin(lons, lats, weights, radius)
+        path = f"hexbin_{radius:g}.bin"
+        write_columns(os.path.join(output_dir, path), [center_lons, center_lats, counts, sums])
+        hexbins.append({"radius": radius, "count": len(counts), "path": path,
+                        "columns": ["longitude", "latitude", "count", "weight"]})
+
+    manifest = {"source": os.path.basename(source), "columns": TILE_COLUMNS, "points": int(len(lons)),
+                "max_zoom": max_zoom, "tiles": tiles, "hexbins": hexbins}
+    with open(os.path.join(output_dir, "index.json"), "w") as index_file:
+        json.dump(manifest, index_file)
+    logging.info(f"Exported {len(lons)} points from {source} into {len(tiles)} tiles in {output_dir}")
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a Fishery JSON dataset as binary quadtree tiles")
+    parser.add_argument("source", help="JSON array of records with latitude/longitude fields")
+    parser.add_argument("output_dir")
+    parser.add_argument("--weight-field", default="level")
+    parser.add_argument("--max-points", type=int, default=MAX_TILE_POINTS)
+    parser.add_argument("--max-zoom", type=int, default=MAX_ZOOM)
+    parser.add_argument("--hexbin-radius", type=float, nargs="*", default=HEXBIN_RADII)
+    args = parser.parse_args()
+    manifest = export_tiles(args.source, args.output_dir, args.weight_field, args.max_points, args.max_zoom,
+                            args.hexbin_radius)
+    print(f"Wrote {manifest['points']} points in {len(manifest['tiles'])} tiles to {args.output_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+import argparse
+import itertools
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+from functools import lru_cache
+
+import numpy as np
+
+from aco_engine import AntColony
+from aco_metrics import ACOMetrics
+from aco_tuning import ACO_DEFAULTS, ACO_TUNING_PATH, ACOTuningTable, TuningEntry, size_bucket, weather_severity
+from bench_routing import FIXTURES, SHIP, SIDES, connected_lattice, git_revision, load_fixture
+from forecast_tensor import ForecastTensor
+
+# Values tried for each parameter; --samples configurations are drawn from their product
+SEARCH_SPACE = {
+    "num_ants": [5, 10, 20, 40],
+    "max_iterations": [25, 50, 100, 200],
+    "alpha": [0.5, 1, 2],
+    "beta": [1, 2, 3, 5],
+    "evaporation_rate": [0.1, 0.3, 0.5, 0.7],
+}
+
+
+@lru_cache(maxsize=None)
+def tuning_case(side, weather, seed):
+    """(colony, forecast) of one corpus graph, built once per worker process"""
+    lattice = connected_lattice(side, seed)
+    current, forecast = load_fixture(weather)
+    return AntColony(lattice.graph, SHIP, current), ForecastTensor.from_forecast(forecast, current.timestamp)
+
+
+def run_trial(side, weather, graph_seed, params, seed):
+    """Route cost (inf without a route), wall time and iteration use of one optimize run on a corpus graph"""
+    colony, forecast = tuning_case(side, weather, graph_seed)
+    metrics = ACOMetrics(keep_runs=1)
+    started = time.perf_counter()
+    route, cost = colony.optimize(0, colony.num_nodes - 1, seed=seed, forecast=forecast, metrics=metrics, **params)
+    seconds = time.perf_counter() - started
+    summary = metrics.runs[-1].summary()
+    return {"graph": (side, weather, graph_seed), "cost": cost if route is not None else np.inf,
+            "seconds": seconds, "iterations": summary["iterations"], "best_found_at": summary["best_found_at"]}
+
+
+def sample_configs(samples, seed):
+    """ACO_DEFAULTS followed by samples distinct configurations drawn from SEARCH_SPACE"""
+    grid = [dict(zip(SEARCH_SPACE, values)) for values in itertools.product(*SEARCH_SPACE.values())]
+    grid = [params for params in grid if params != ACO_DEFAULTS]
+    return [dict(ACO_DEFAULTS)] + random.Random(seed).sample(grid, min(samples, len(grid)))
+
+
+def score(trials, best_known):
+    """(mean gap, mean seconds) over a configuration's trials; a run that found no route scores an infinite gap.
+
+    Forecast costs depend on when each leg is sailed, so the gap is taken to the
+    best cost any configuration found on the same graph rather than to a static shortest path.
+    """
+    gaps = [trial["cost"] / best_known[trial["graph"]] - 1 for trial in trials]
+    return float(np.mean(gaps)), float(np.mean([trial["seconds"] for trial in trials]))
+
+
+def best_known_costs(results):
+    """Lowest route cost found on each corpus graph over all configurations"""
+    best_known = {}
+    for trial in itertools.chain.from_iterable(results):
+        best_known[trial["graph"]] = min(best_known.get(trial["graph"], np.inf), trial["cost"])
+    return best_known
+
+
+def choose(results, tolerance):
+    """Index of the fastest configuration whose mean gap is within tolerance of the best mean gap"""
+    best_known = best_known_costs(results)
+    scores = [score(trials, best_known) for trials in results]
+    best_gap = min(gap for gap, _ in scores)
+    eligible = [index for index, (gap, _) in enumerate(scores) if gap <= best_gap + tolerance]
+    return min(eligible, key=lambda index: scores[index][1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search ACO parameters per graph size and weather severity")
+    parser.add_argument("--sides", type=int, nargs="+", default=SIDES, help="corpus lattice sides in cells")
+    parser.add_argument("--weather", nargs="+", default=FIXTURES, choices=FIXTURES)
+    parser.add_argument("--graphs", type=int, default=2, help="corpus graphs per side")
+    parser.add_argument("--seeds", type=int, default=3, help="colony seeds per graph")
+    parser.add_argument("--samples", type=int, default=24, help="configurations tried besides the defaults")
+    parser.add_argument("--tolerance", type=float, default=0.02,
+                        help="mean cost gap over the best configuration accepted in exchange for speed")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=ACO_TUNING_PATH)
+    args = parser.parse_args()
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+    configs = sample_configs(args.samples, args.seed)
+    # Fixtures of the same severity pool their trials into one table entry
+    cells = {}
+    for side in args.sides:
+        for weather in args.weather:
+            severity = weather_severity(load_fixture(weather)[0])
+            # The corpus graph's size is known only once its islands are drawn
+            num_nodes = connected_lattice(side, args.seed).graph.num_nodes
+            cells.setdefault((size_bucket(num_nodes), severity), []).append((side, weather))
+
+    tasks = [(cell, index, (side, weather, args.seed + graph, params, args.seed + run))
+             for cell, cases in cells.items() for side, weather in cases
+             for index, params in enumerate(configs) for graph in range(args.graphs) for run in range(args.seeds)]
+    print(f"{len(configs)} configurations x {len(cells)} cells: {len(tasks)} runs on {args.workers} workers")
+    results = {cell: [[] for _ in configs] for cell in cells}
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = {pool.submit(run_trial, *trial): (cell, index) for cell, index, trial in tasks}
+        for done, future in enumerate(as_completed(futures), 1):
+            cell, index = futures[future]
+            results[cell][index].append(future.result())
+            if done % 100 == 0 or done == len(tasks):
+                print(f"  {done}/{len(tasks)} runs, {time.perf_counter() - started:.0f} s")
+
+    table = ACOTuningTable(created=datetime.now(timezone.utc).isoformat(), revision=git_revision())
+    print(f"{'nodes <=':>8} {'severity':<8} {'gap':>7} {'s/run':>7} {'default gap':>11} {'s/run':>7}  parameters")
+    for (max_nodes, severity), trials in sorted(results.items()):
+        index = choose(trials, args.tolerance)
+        best_known = best_known_costs(trials)
+        gap, seconds = score(trials[index], best_known)
+        default_gap, default_seconds = score(trials[0], best_known)
+        table.entries.append(TuningEntry(max_nodes, severity, configs[index], gap, seconds,
+                                         default_gap, default_seconds))
+        print(f"{max_nodes:>8} {severity:<8} {gap:>7.3f} {seconds:>7.3f} {default_gap:>11.3f} {default_seconds:>7.3f}"
+              f"  {configs[index]}")
+    table.save(args.output)
+    print(f"Wrote {len(table.entries)} entries to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
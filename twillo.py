@@ -1,14 +1,19 @@
 import requests
-from geopy.geocoders import Nominatim
 from datetime import datetime
 import numpy as np
 import logging
+import asyncio
+import os
 import random
 import time
-from functools import lru_cache
 import threading
 from math import radians, sin, cos, sqrt, atan2
-from twilio.rest import Client
+from weather_field import WeatherField
+from geocode_cache import GeocodeCache, MISS
+from gazetteer import PORTS_PATH, Gazetteer
+from fleet_monitor import (CONDITIONS, POLL_INTERVAL, CallbackSink, FleetMonitor, alert_message,
+                           check_conditions, parse_conditions)
+from alerting import AlertingSink, AlertStateMachine, SmsDispatcher, TwilioTransport
 
 # Replace these with your actual API keys
 WEATHER_API_KEY = "xxxxxxx"
@@ -17,35 +22,62 @@ TWILIO_AUTH_TOKEN ="xxxxxxxxxxx"
 TWILIO_PHONE_NUMBER = "xxxxxxxxxx"
 RECIPIENT_PHONE_NUMBER = "xxxxxxxxxx"
 
+# Numbers texted per alert escalation level; the last entry is reused for higher levels
+ALERT_RECIPIENTS = [[RECIPIENT_PHONE_NUMBER]]
+
+# Persistent geocoding cache shared with the route optimizer
+GEOCODE_CACHE_PATH = "cache/geocode.sqlite3"
+
+# Seconds a weather observation stays cached, shorter than the 5 minute monitoring interval
+WEATHER_CACHE_TTL = 240
+
 # Configure logging
 logging.basicConfig(filename='marine_optimization.log', level=logging.INFO,
                    format='%(asctime)s - %(levelname)s - %(message)s')
 
 class MarineWeatherAnalyzer:
-    def _init_(self):
+    def __init__(self):
         """Initialize the analyzer with API clients and caching"""
         self.weather_api_key = WEATHER_API_KEY
-        self.geolocator = Nominatim(
-            user_agent="marine_optimization_v1.0",
-            timeout=5
-        )
+        self._geolocator = None
+        self.weather_field = WeatherField(ttl=WEATHER_CACHE_TTL)
+        self.geocode_cache = GeocodeCache(GEOCODE_CACHE_PATH)
+        self.gazetteer = Gazetteer.load(PORTS_PATH) if os.path.exists(PORTS_PATH) else None
+        if self.gazetteer is not None:
+            self.geocode_cache.preload_csv(PORTS_PATH)  # A no-op unless the CSV changed
+        self._sms_client = None
+        self._fetcher = None  # AsyncWeatherFetcher shared by every poll while monitor_fleet runs
 
-    @lru_cache(maxsize=100)
     def get_coordinates(self, location: str):
-        """Get coordinates with caching for faster repeated lookups"""
+        """Get coordinates from the port gazetteer, then the persistent geocode cache, then Nominatim"""
         location = location.lower().strip()
+        port = self.gazetteer.resolve(location) if self.gazetteer is not None else None
+        if port is not None:
+            return port.coords
+        cached = self.geocode_cache.lookup(location)
+        if cached is not MISS:
+            return cached
         loc = self.geolocator.geocode(location)
-        if loc:
-            return (loc.latitude, loc.longitude)
-        return None
+        coords = (loc.latitude, loc.longitude) if loc else None
+        self.geocode_cache.put(location, coords)
+        return coords
 
     def fetch_weather_data(self, lat: float, lon: float):
-        """Fetch and parse marine weather data"""
+        """Fetch and parse marine weather data, served from the weather field when cached"""
+        cached = self.weather_field.lookup(lat, lon)
+        if cached is not None:
+            return cached
+
         url = (
             f"https://api.openweathermap.org/data/2.5/weather?lat={lat}&lon={lon}&appid={self.weather_api_key}&units=metric"
         )
         response = requests.get(url)
         data = response.json()
+        if 'main' in data:
+            self.weather_field.put(lat, lon, data, values={
+                'wind_speed': data.get('wind', {}).get('speed'),
+                'visibility': data.get('visibility', 10000) / 1000,
+            })
         return data
 
     def ant_colony_optimization(self, graph, start, end, ship, weather_data):
@@ -53,11 +85,29 @@ class MarineWeatherAnalyzer:
         # Simplified route optimization logic
         return [start, end], 0
 
+    @property
+    def geolocator(self):
+        """Nominatim geocoder created on first use; geopy is only imported then"""
+        if self._geolocator is None:
+            from geopy.geocoders import Nominatim
+            self._geolocator = Nominatim(
+                user_agent="marine_optimization_v1.0",
+                timeout=5
+            )
+        return self._geolocator
+
+    @property
+    def sms_client(self):
+        """Twilio client created on first use and shared by every send; twilio is only imported then"""
+        if self._sms_client is None:
+            from twilio.rest import Client
+            self._sms_client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
+        return self._sms_client
+
     def send_sms_notification(self, message):
         """Send SMS notification using Twilio"""
         try:
-            client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
-            client.messages.create(
+            self.sms_client.messages.create(
                 body=message,
                 from_=TWILIO_PHONE_NUMBER,
                 to=RECIPIENT_PHONE_NUMBER
@@ -70,26 +120,12 @@ class MarineWeatherAnalyzer:
     def check_weather_conditions(self, weather_data):
         """Check weather conditions and return alert message if conditions are dangerous"""
         try:
-            wind_speed = weather_data.get('wind', {}).get('speed', 0)
-            temperature = weather_data.get('main', {}).get('temp', 0)
-            visibility = weather_data.get('visibility', 10000) / 1000  # Convert to km
-            
-            alerts = []
-            
-            # Wind speed alert (> 20 knots / 10.3 m/s)
-            if wind_speed > 10.3:
-                alerts.append(f"HIGH WIND ALERT: Wind speed is {wind_speed} m/s ({wind_speed * 1.944:.1f} knots)")
-            
-            # Poor visibility alert (< 2 km)
-            if visibility < 2:
-                alerts.append(f"LOW VISIBILITY ALERT: Visibility is {visibility} km")
-            
-            # Extreme temperature alert
-            if temperature > 35:
-                alerts.append(f"HIGH TEMPERATURE ALERT: Temperature is {temperature}°C")
-            elif temperature < 0:
-                alerts.append(f"LOW TEMPERATURE ALERT: Temperature is {temperature}°C")
-            
+            wind_speed, visibility, temperature = parse_conditions(weather_data)
+            flags = check_conditions(wind_speed, visibility, temperature)
+            values = {"high_wind": wind_speed, "low_visibility": visibility,
+                      "high_temperature": temperature, "low_temperature": temperature}
+            alerts = [alert_message(condition, values[condition]) for condition in CONDITIONS if flags[condition]]
+
             if alerts:
                 return "\n".join(alerts)
             return None
@@ -98,38 +134,92 @@ class MarineWeatherAnalyzer:
             logging.error(f"Error checking weather conditions: {e}")
             return None
 
+    async def fetch_conditions(self, points):
+        """(wind, visibility, temperature) per point, from the weather field or fetched concurrently.
+
+        Fetches go through the monitor's open session, or a session opened for this call outside monitor_fleet.
+        """
+        records = [self.weather_field.lookup(lat, lon) for lat, lon in points]
+        missing = [i for i, record in enumerate(records) if record is None]
+        if missing:
+            if self._fetcher is not None:
+                fetched = await self._fetcher.fetch_many([points[i] for i in missing])
+            else:
+                from weather_fetcher import AsyncWeatherFetcher  # aiohttp is only imported once weather is fetched
+                async with AsyncWeatherFetcher(self.weather_api_key) as fetcher:
+                    fetched = await fetcher.fetch_many([points[i] for i in missing])
+            for i, data in zip(missing, fetched):
+                if data is not None and 'main' in data:
+                    self.weather_field.put(*points[i], data, values={
+                        'wind_speed': data.get('wind', {}).get('speed'),
+                        'visibility': data.get('visibility', 10000) / 1000,
+                    })
+                    records[i] = data
+        return [parse_conditions(record) if record is not None else None for record in records]
+
+    def print_conditions(self, conditions):
+        wind_speed, visibility, temperature = conditions
+        print("\nCurrent Weather Conditions:")
+        print(f"Temperature: {temperature}°C")
+        print(f"Wind Speed: {wind_speed} m/s")
+        print(f"Visibility: {visibility} km")
+
+    def print_alerts(self, alerts):
+        """Print one block per vessel for a batch of fleet alerts"""
+        by_vessel = {}
+        for alert in alerts:
+            by_vessel.setdefault(alert.vessel_id, []).append(alert.message)
+        for vessel_id, messages in by_vessel.items():
+            print(f"\nALERT CONDITIONS DETECTED for {vessel_id}!")
+            print("\n".join(messages))
+
+    def monitor_fleet(self, positions, sinks=None, interval=POLL_INTERVAL, print_conditions=False):
+        """Monitor many vessels from one event loop; positions maps vessel id to (lat, lon).
+
+        By default alerts are printed every poll and texted through the alert
+        state machine, which suppresses repeats and escalates long-running alerts.
+        With print_conditions the weather of every polled cell is printed too.
+        One weather session is kept open for the whole run.
+        """
+        dispatcher = None
+        if sinks is None:
+            dispatcher = SmsDispatcher(TwilioTransport(self.sms_client, TWILIO_PHONE_NUMBER))
+            sinks = [CallbackSink(self.print_alerts), AlertingSink(AlertStateMachine(ALERT_RECIPIENTS), dispatcher)]
+
+        async def fetch(points):
+            conditions = await self.fetch_conditions(points)
+            if print_conditions:
+                for record in conditions:
+                    if record is not None:
+                        self.print_conditions(record)
+            return conditions
+
+        async def run():
+            from weather_fetcher import AsyncWeatherFetcher
+            async with AsyncWeatherFetcher(self.weather_api_key) as fetcher:
+                self._fetcher = fetcher
+                try:
+                    await monitor.run()
+                finally:
+                    self._fetcher = None
+
+        monitor = FleetMonitor(fetch, sinks, interval=interval)
+        for vessel_id, (lat, lon) in positions.items():
+            monitor.track(vessel_id, lat, lon)
+        try:
+            asyncio.run(run())
+        finally:
+            if dispatcher is not None:
+                dispatcher.close()
+
     def monitor_weather(self, start_coords):
         """Continuously monitor weather and send alerts"""
         print("\nStarting weather monitoring...")
         print("The system will send SMS alerts when:")
-        print("- Wind speed exceeds 1 knots (1 m/s)")
+        print("- Wind speed exceeds 20 knots (10.3 m/s)")
         print("- Visibility drops below 2 km")
         print("- Temperature goes above 35°C or below 0°C")
-        
-        while True:
-            try:
-                weather_data = self.fetch_weather_data(start_coords[0], start_coords[1])
-                if weather_data:
-                    alert_message = self.check_weather_conditions(weather_data)
-                    
-                    if alert_message:
-                        print(f"\nALERT CONDITIONS DETECTED!")
-                        print(alert_message)
-                        self.send_sms_notification(alert_message)
-                        print("SMS alert sent!")
-                    
-                    # Print current conditions
-                    print("\nCurrent Weather Conditions:")
-                    print(f"Temperature: {weather_data.get('main', {}).get('temp', 'N/A')}°C")
-                    print(f"Wind Speed: {weather_data.get('wind', {}).get('speed', 'N/A')} m/s")
-                    print(f"Visibility: {weather_data.get('visibility', 'N/A')/1000} km")
-                    
-                time.sleep(300)  # Check every 5 minutes
-                
-            except Exception as e:
-                logging.error(f"Error in weather monitoring: {e}")
-                print(f"Error in weather monitoring: {e}")
-                time.sleep(60)  # Wait a minute before retrying
+        self.monitor_fleet({"vessel": start_coords}, print_conditions=True)
 
     def simulate_dangerous_weather(self):
         """Simulate dangerous weather conditions for demonstration"""
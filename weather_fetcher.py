@@ -0,0 +1,95 @@
+import asyncio
+import logging
+import time
+from typing import Callable, List, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+
+import aiohttp
+
+OPENWEATHER_URL = "https://api.openweathermap.org/data/2.5/weather"
+
+# Requests per second allowed per provider host; unknown hosts use DEFAULT_RATE_LIMIT
+PROVIDER_RATE_LIMITS = {
+    "api.openweathermap.org": 50,
+    "api.stormglass.io": 5,
+}
+DEFAULT_RATE_LIMIT = 20
+
+
+class RateLimiter:
+    """Token bucket allowing rate requests per second, with bursts of up to burst requests"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst or rate
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class AsyncWeatherFetcher:
+    """Concurrent OpenWeatherMap client over one pooled aiohttp session.
+
+    At most ``concurrency`` requests are in flight and requests are paced by the
+    provider's rate limit. Failed requests are retried with exponential backoff
+    that awaits instead of blocking the thread. ``parse(data, lat, lon)`` turns
+    each JSON response into the returned record; the raw dict is returned when
+    it is None. Use as an async context manager.
+    """
+
+    def __init__(self, api_key, base_url=OPENWEATHER_URL, concurrency=16, rate_limit=None,
+                 max_retries=3, timeout=10, parse: Optional[Callable] = None):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.concurrency = concurrency
+        host = urlparse(base_url).hostname
+        self.rate_limiter = RateLimiter(rate_limit or PROVIDER_RATE_LIMITS.get(host, DEFAULT_RATE_LIMIT))
+        self.max_retries = max_retries
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.parse = parse
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._session = None
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(limit=self.concurrency)
+        self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self._session.close()
+
+    async def fetch(self, lat: float, lon: float):
+        """Fetch and parse the weather at one point, returning None after max_retries failures"""
+        params = {"lat": lat, "lon": lon, "appid": self.api_key, "units": "metric"}
+        for attempt in range(self.max_retries):
+            try:
+                async with self._semaphore:
+                    await self.rate_limiter.acquire()
+                    async with self._session.get(self.base_url, params=params) as response:
+                        response.raise_for_status()
+                        data = await response.json()
+                return self.parse(data, lat, lon) if self.parse else data
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt == self.max_retries - 1:
+                    logging.error(f"Failed to fetch weather data for {lat}, {lon} after {self.max_retries} attempts: {e}")
+                    return None
+                logging.warning(f"Weather data fetch attempt {attempt + 1} for {lat}, {lon} failed, retrying...")
+                await asyncio.sleep(2 ** attempt)  # Exponential backoff
+            except KeyError as e:
+                logging.error(f"Error parsing weather data: {e}")
+                return None
+
+    async def fetch_many(self, points: Sequence[Tuple[float, float]]) -> List:
+        """Fetch every point concurrently, returning records in the order of points"""
+        return await asyncio.gather(*(self.fetch(lat, lon) for lat, lon in points))
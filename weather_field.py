@@ -0,0 +1,140 @@
+import logging
+import threading
+import time
+
+import numpy as np
+
+# Numeric weather attributes stored per cell and interpolated by sample()
+DEFAULT_FIELDS = ("wind_speed", "visibility")
+
+# put() sweeps out expired cells once every this many inserts, so cells nobody looks up again still go
+SWEEP_EVERY = 256
+
+
+class WeatherField:
+    """Weather observations keyed by lat/lon grid cell, with TTL eviction.
+
+    Each cell keeps the record it was filled with (returned as-is by lookup) and
+    the numeric values of ``fields``, which sample() interpolates bilinearly
+    between cell centers without any network access. Cell centers sit at
+    multiples of ``cell_size`` degrees. Expired cells are dropped when looked
+    up, sampled or every ``sweep_every`` puts. All methods are safe to call
+    from several threads.
+    """
+
+    def __init__(self, cell_size=0.25, ttl=1800, fields=DEFAULT_FIELDS, clock=time.monotonic, sweep_every=SWEEP_EVERY):
+        self.cell_size = cell_size
+        self.ttl = ttl
+        self.fields = tuple(fields)
+        self.clock = clock
+        self.sweep_every = sweep_every
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._cells = {}  # (row, col) -> (expires_at, record, values)
+        self._grid_cache = None  # Materialized arrays used by sample(), None after a change
+        self._puts_since_sweep = 0
+        self._lock = threading.RLock()
+
+    def cell_key(self, lat, lon):
+        return int(round(lat / self.cell_size)), int(round(lon / self.cell_size))
+
+    def put(self, lat, lon, record, values=None):
+        """Store a record for the cell containing (lat, lon); values default to the record's attributes"""
+        if values is None:
+            values = {name: getattr(record, name, None) for name in self.fields}
+        numeric = tuple(np.nan if values.get(name) is None else float(values[name]) for name in self.fields)
+        key = self.cell_key(lat, lon)
+        with self._lock:
+            self._cells[key] = (self.clock() + self.ttl, record, numeric)
+            self._grid_cache = None
+            self._puts_since_sweep += 1
+            if self._puts_since_sweep >= self.sweep_every:
+                self.evict_expired()
+
+    def lookup(self, lat, lon):
+        """Return the fresh record of the cell containing (lat, lon), or None on a miss"""
+        key = self.cell_key(lat, lon)
+        with self._lock:
+            entry = self._cells.get(key)
+            if entry is not None and entry[0] <= self.clock():
+                self._evict(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[1]
+
+    def evict_expired(self):
+        """Drop every expired cell and return how many were removed"""
+        now = self.clock()
+        with self._lock:
+            expired = [key for key, entry in self._cells.items() if entry[0] <= now]
+            for key in expired:
+                self._evict(key)
+            self._puts_since_sweep = 0
+        return len(expired)
+
+    def sample(self, lats, lons):
+        """Interpolate every field at arrays of coordinates, returning {field: array}.
+
+        Corners without data are left out of the bilinear weights; points with no
+        data at any of their four corners come back as NaN.
+        """
+        with self._lock:
+            self.evict_expired()
+            grid = self._grid()
+        lats = np.asarray(lats, dtype=float) / self.cell_size
+        lons = np.asarray(lons, dtype=float) / self.cell_size
+        if grid is None:
+            return {name: np.full(lats.shape, np.nan) for name in self.fields}
+        row0, col0, values = grid
+
+        rows, cols = np.floor(lats), np.floor(lons)
+        row_frac, col_frac = lats - rows, lons - cols
+        rows, cols = rows.astype(np.int64) - row0, cols.astype(np.int64) - col0
+        total = np.zeros((len(self.fields),) + lats.shape)
+        weight_sum = np.zeros((len(self.fields),) + lats.shape)
+        for d_row, d_col, weight in [(0, 0, (1 - row_frac) * (1 - col_frac)), (0, 1, (1 - row_frac) * col_frac),
+                                     (1, 0, row_frac * (1 - col_frac)), (1, 1, row_frac * col_frac)]:
+            r, c = rows + d_row, cols + d_col
+            inside = (r >= 0) & (r < values.shape[1]) & (c >= 0) & (c < values.shape[2])
+            corner = np.full((len(self.fields),) + lats.shape, np.nan)
+            corner[:, inside] = values[:, r[inside], c[inside]]
+            known = ~np.isnan(corner)
+            total += np.where(known, corner * weight, 0.0)
+            weight_sum += np.where(known, weight, 0.0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            result = np.where(weight_sum > 0, total / weight_sum, np.nan)
+        return dict(zip(self.fields, result))
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "cells": len(self._cells),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _evict(self, key):
+        del self._cells[key]
+        self._grid_cache = None
+        self.evictions += 1
+
+    def _grid(self):
+        """Dense (field, row, col) array of every cell, rebuilt after changes"""
+        if self._grid_cache is None:
+            keys = list(self._cells)
+            if not keys:
+                return None
+            rows = np.array([key[0] for key in keys])
+            cols = np.array([key[1] for key in keys])
+            values = np.full((len(self.fields), rows.max() - rows.min() + 1, cols.max() - cols.min() + 1), np.nan)
+            values[:, rows - rows.min(), cols - cols.min()] = np.array([self._cells[key][2] for key in keys]).T
+            self._grid_cache = (rows.min(), cols.min(), values)
+            logging.debug(f"Materialized weather grid with {len(keys)} cells")
+        return self._grid_cache